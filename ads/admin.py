@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from ads.models import Ad, ExchangeProposal
+from ads.models import Ad, ArchivedExchangeProposal, ExchangeProposal
 
 
 @admin.register(Ad)
@@ -14,6 +14,7 @@ class AdAdmin(admin.ModelAdmin):
         "category",
         "condition",
         "created_at",
+        "deleted_at",
     )
     list_filter = (
         "category",
@@ -24,9 +25,28 @@ class AdAdmin(admin.ModelAdmin):
         "description",
     )
 
+    def get_queryset(self, request):
+        """В админке видны и мягко удаленные объявления."""
+
+        return Ad.all_objects.all()
+
 
 @admin.register(ExchangeProposal)
 class ExchangeProposalAdmin(admin.ModelAdmin):
     """Админка для модели ExchangeProposal."""
 
     list_display = ("id", "owner", "comment", "status", "created_at")
+
+
+@admin.register(ArchivedExchangeProposal)
+class ArchivedExchangeProposalAdmin(admin.ModelAdmin):
+    """Админка для архива предложений обмена (только просмотр)."""
+
+    list_display = ("id", "owner", "status", "created_at", "archived_at")
+    list_filter = ("status",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
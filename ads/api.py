@@ -0,0 +1,231 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import HttpResponse
+from django.views import View
+
+from ads.geo import location_params, nearby
+from ads.models import Ad, ExchangeProposal
+from ads.search import filter_ads, normalize_search_params
+from ads.services import mark_thread_read, participant_proposals, thread_messages
+from ads.storage import content_addressed_storage
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость
+    orjson = None
+
+
+def dumps(data):
+    """Кодирует данные в JSON (bytes): orjson, если установлен, иначе стандартный json."""
+
+    if orjson is not None:
+        return orjson.dumps(data)
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=datetime.isoformat).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type="application/json", status=status)
+
+
+def encode_cursor(created_at, pk):
+    """Непрозрачный курсор позиции в выдаче: время создания и id последней записи страницы."""
+
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; ValueError, если он поврежден."""
+
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError) as error:
+        raise ValueError("Некорректный курсор") from error
+
+
+class PageLimitMixin:
+    """Размер страницы JSON-списка из ?limit= с ограничением сверху."""
+
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self):
+        """Размер страницы (?limit=) в пределах 1..max_limit."""
+
+        try:
+            limit = int(self.request.GET.get("limit", self.default_limit))
+        except ValueError as error:
+            raise ValueError("limit должен быть целым числом") from error
+
+        return min(max(limit, 1), self.max_limit)
+
+
+class CursorListApiView(PageLimitMixin, View):
+    """Базовое представление JSON-списка только для чтения.
+
+    Поддерживает выбор полей (?fields=id,title), курсорную пагинацию по (created_at, id)
+    (?cursor=..., ?limit=...) и фильтры подклассов. Записи читаются через values(),
+    без создания экземпляров моделей.
+    """
+
+    http_method_names = ["get"]
+    fields = ()
+    default_fields = ()
+    # вычисляемые поля: имя -> функция над значением из БД
+    converters = {}
+    login_required = False
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if self.login_required and not request.user.is_authenticated:
+            return json_response({"error": "Требуется авторизация"}, status=401)
+
+        try:
+            fields = self.get_fields()
+            limit = self.get_limit()
+            queryset = self.get_queryset().order_by("-created_at", "-id")
+            cursor = request.GET.get("cursor")
+            if cursor:
+                created_at, pk = decode_cursor(cursor)
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        except ValueError as error:
+            return json_response({"error": str(error)}, status=400)
+
+        # id и created_at нужны для курсора, остальные колонки — только запрошенные
+        names = list(dict.fromkeys(("id", "created_at", *fields)))
+        rows = list(queryset.values_list(*names)[: limit + 1])
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+
+        columns = [(field, names.index(field), self.converters.get(field)) for field in fields]
+        results = [
+            {field: convert(row[index]) if convert else row[index] for field, index, convert in columns}
+            for row in rows[:limit]
+        ]
+
+        return json_response({"results": results, "next": next_cursor})
+
+    def get_fields(self):
+        """Запрошенные поля (?fields=), по умолчанию default_fields."""
+
+        requested = self.request.GET.get("fields")
+        if not requested:
+            return list(self.default_fields)
+
+        fields = list(dict.fromkeys(field.strip() for field in requested.split(",") if field.strip()))
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown or not fields:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(self.fields)}")
+
+        return fields
+
+
+def image_url(name):
+    return content_addressed_storage.url(name) if name else None
+
+
+class AdListApiView(CursorListApiView):
+    """Объявления: ?query=, ?category=, ?condition= — те же фильтры, что и в поиске (и, как в поиске,
+    без своих объявлений); ?radius= (км) с ?lat=, ?lon= или местоположением из профиля — только объявления рядом."""
+
+    fields = (
+        "id",
+        "title",
+        "description",
+        "image_url",
+        "category",
+        "condition",
+        "created_at",
+        "user_id",
+        "latitude",
+        "longitude",
+    )
+    default_fields = ("id", "title", "image_url", "category", "condition", "created_at")
+    converters = {"image_url": image_url}
+
+    def get_queryset(self):
+        query, category, condition = normalize_search_params(
+            self.request.GET.get("query", ""),
+            self.request.GET.get("category", ""),
+            self.request.GET.get("condition", ""),
+        )
+
+        user = self.request.user
+        queryset = Ad.objects.exclude(user=user) if user.is_authenticated else Ad.objects.all()
+        queryset = filter_ads(queryset, query, category, condition)
+        location = location_params(self.request.GET, self.request.user)
+        if location:
+            queryset = nearby(queryset, *location)
+
+        return queryset
+
+
+class ExchangeProposalListApiView(CursorListApiView):
+    """Предложения обмена, в которых участвует текущий пользователь: ?status= фильтрует по статусу."""
+
+    fields = ("id", "status", "comment", "created_at", "owner_id", "ad_sender_id", "ad_receiver_id")
+    default_fields = fields
+    login_required = True
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ExchangeProposal.objects.filter(Q(ad_sender__user=user) | Q(ad_receiver__user=user))
+        status = self.request.GET.get("status")
+        if status:
+            queryset = queryset.filter(status=status)
+
+        return queryset
+
+
+class ProposalMessageListApiView(PageLimitMixin, View):
+    """Переписка по предложению обмена для дозагрузки новых сообщений.
+
+    ?after= — курсор из next предыдущего ответа: приходят сообщения после него (по возрастанию)
+    и повторно — сообщения последней минуты до него (см. thread_messages), клиент пропускает
+    уже показанные id. Без курсора — последние limit. next — курсор последнего нового сообщения
+    (или тот же after, если новых нет), его и передают в следующем опросе.
+    """
+
+    http_method_names = ["get"]
+    default_limit = 50
+
+    def get(self, request, pk, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return json_response({"error": "Требуется авторизация"}, status=401)
+
+        proposal = participant_proposals(request.user).filter(pk=pk).first()
+        if proposal is None:
+            return json_response({"error": "Предложение не найдено"}, status=404)
+        try:
+            limit = self.get_limit()
+            after = request.GET.get("after")
+            after_key = decode_cursor(after) if after else None
+            messages = thread_messages(proposal, after=after_key, limit=limit)
+        except ValueError as error:
+            return json_response({"error": str(error)}, status=400)
+
+        if messages:
+            mark_thread_read(proposal, request.user)
+        results = [
+            {
+                "id": message.pk,
+                "author_id": message.author_id,
+                "mine": message.author_id == request.user.pk,
+                "text": message.text,
+                "created_at": message.created_at,
+            }
+            for message in messages
+        ]
+        last = messages[-1] if messages else None
+        # повторно отданные сообщения окна курсор не сдвигают
+        if last and (after_key is None or (last.created_at, last.pk) > after_key):
+            next_cursor = encode_cursor(last.created_at, last.pk)
+        else:
+            next_cursor = after
+
+        return json_response({"results": results, "next": next_cursor})
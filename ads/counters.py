@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from config.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# прибавляет накопленные просмотры; объявления, удаленные из БД за время буферизации, пропускаются
+UPSERT_SQL = """
+INSERT INTO ads_adstats (ad_id, views, updated_at)
+SELECT pending.ad_id, pending.views, now()
+FROM (VALUES {values}) AS pending (ad_id, views)
+JOIN ads_ad ON ads_ad.id = pending.ad_id
+ON CONFLICT (ad_id) DO UPDATE
+SET views = ads_adstats.views + EXCLUDED.views, updated_at = EXCLUDED.updated_at
+"""
+BATCH_SIZE = 1000
+
+
+class BufferedViewCounter:
+    """Счетчик просмотров объявлений с буфером в памяти процесса.
+
+    increment только увеличивает число в словаре; накопленное раз в AD_VIEWS_FLUSH_INTERVAL
+    секунд (или раньше, если в буфере больше AD_VIEWS_MAX_PENDING объявлений) записывается
+    фоновым потоком пачками INSERT ... ON CONFLICT DO UPDATE. При аварийном завершении
+    теряется не больше одного интервала просмотров, при обычном — буфер сбрасывается в atexit.
+    Если запись не удалась, просмотры возвращаются в буфер, но после AD_VIEWS_FLUSH_RETRIES
+    неудач подряд отбрасываются с записью в лог, чтобы буфер не рос, пока БД недоступна.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._failures = 0
+
+    def increment(self, ad_id, value=1):
+        """Учитывает value просмотров объявления ad_id."""
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # после fork буфер и поток родителя не наши
+                self._pending.clear()
+                self._pid = os.getpid()
+                self._thread = None
+                self._failures = 0
+            self._pending[ad_id] = self._pending.get(ad_id, 0) + value
+            overflow = len(self._pending) >= settings.AD_VIEWS_MAX_PENDING
+            start = self._thread is None and settings.AD_VIEWS_FLUSH_INTERVAL
+
+            if start:
+                self._thread = threading.Thread(target=self._run, name="ad-views-flush", daemon=True)
+                self._thread.start()
+
+        if overflow:
+            self._wakeup.set()
+
+    def flush(self):
+        """Записывает накопленные просмотры в БД и очищает буфер. Возвращает число объявлений."""
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        # строки по возрастанию ad_id: параллельные сбросы из разных процессов не ждут друг друга по кругу
+        rows = sorted(pending.items())
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for offset in range(0, len(rows), BATCH_SIZE):
+                    batch = rows[offset : offset + BATCH_SIZE]
+                    values = ", ".join(["(%s, %s)"] * len(batch))
+                    cursor.execute(UPSERT_SQL.format(values=values), [value for row in batch for value in row])
+        except Exception:
+            with self._lock:
+                self._failures += 1
+                dropped = self._failures > settings.AD_VIEWS_FLUSH_RETRIES
+                if dropped:
+                    self._failures = 0
+                else:
+                    # просмотры возвращаются в буфер и будут записаны при следующем сбросе
+                    for ad_id, views in pending.items():
+                        self._pending[ad_id] = self._pending.get(ad_id, 0) + views
+            if dropped:
+                views = sum(pending.values())
+                metrics.increment("ad_views.dropped", views)
+                logger.error(
+                    "Просмотры отброшены после %s неудачных сбросов: %s", settings.AD_VIEWS_FLUSH_RETRIES, views
+                )
+            raise
+        self._failures = 0
+        metrics.increment("ad_views.flushed_ads", len(rows))
+
+        return len(rows)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.AD_VIEWS_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception("Не удалось записать просмотры объявлений")
+
+
+ad_views = BufferedViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    if ad_views._pid == os.getpid():
+        try:
+            ad_views.flush()
+        except Exception:
+            logger.exception("Не удалось записать просмотры объявлений при завершении")
@@ -0,0 +1,253 @@
+import hashlib
+import re
+import zlib
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import Subquery
+
+from ads.models import Ad, AdSignature, AdSignatureBucket
+
+# MinHash: 128 перестановок, LSH из 16 полос по 8 строк — пара с похожестью Жаккара 0.8
+# попадает в общую корзину с вероятностью ~0.98, с похожестью 0.5 — ~0.06
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+TEXT_SIMILARITY = 0.8
+MERSENNE_PRIME = (1 << 61) - 1
+SEED = 42
+# dHash 64 бита режется на 4 полосы по 16: при расстоянии Хэмминга до 3 одна полоса совпадет обязательно
+IMAGE_BANDS = 4
+IMAGE_DISTANCE = 3
+IMAGE_SIZE = 8
+# корзины, в которые попало больше объявлений, неинформативны (шаблонный текст, заглушка вместо фото)
+MAX_BUCKET_SIZE = 1000
+# ключи корзин, в которых не больше MAX_BUCKET_SIZE объявлений; размер считается до первого превышения
+INFORMATIVE_KEYS_SQL = """
+SELECT k.key FROM unnest(%s::bigint[]) AS k(key)
+WHERE (SELECT count(*) FROM (SELECT 1 FROM ads_adsignaturebucket b WHERE b.key = k.key LIMIT %s) capped) <= %s
+"""
+
+WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text):
+    """Множество хешей символьных n-грамм нормализованного текста (нижний регистр, слова через пробел)."""
+
+    text = " ".join(WORD_RE.findall(text.lower()))
+    if not text:
+        return set()
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+
+    return {zlib.crc32(text[i : i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+@lru_cache(maxsize=None)
+def _permutations():
+    import numpy as np
+
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+
+    return a, b
+
+
+def minhash(text):
+    """MinHash-сигнатура текста: NUM_PERM значений uint32 в виде bytes, None для пустого текста.
+
+    Хеш-функции вида ((a·x + b) mod 2⁶⁴) mod p считаются векторно для всех n-грамм сразу:
+    умножение в uint64 переполняется, и это не настоящее (a·x + b) mod p, но для MinHash хватает
+    и такого семейства. Сиды фиксированы, поэтому сигнатуры из разных процессов сравнимы;
+    при смене формулы сохраненные сигнатуры нужно пересчитать (find_duplicate_ads --rebuild).
+    """
+
+    import numpy as np
+
+    values = shingles(text)
+    if not values:
+        return None
+
+    a, b = _permutations()
+    hashed = np.fromiter(values, dtype=np.uint64, count=len(values))[:, None]
+    signature = ((hashed * a + b) % MERSENNE_PRIME) & np.uint64(0xFFFFFFFF)
+
+    return signature.min(axis=0).astype("<u4").tobytes()
+
+
+def text_similarity(first, second):
+    """Оценка похожести Жаккара по двум MinHash-сигнатурам: доля совпавших значений."""
+
+    import numpy as np
+
+    return float(np.mean(np.frombuffer(bytes(first), "<u4") == np.frombuffer(bytes(second), "<u4")))
+
+
+def _signed(value):
+    # 64-битный хеш хранится в BigIntegerField, который знаковый
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def image_hashes(file):
+    """Перцептивные хеши изображения (aHash, dHash) по 64 бита или (None, None), если файл не читается.
+
+    aHash — яркость пикселей уменьшенной до 8×8 копии относительно средней, dHash — перепады
+    яркости между соседними пикселями копии 9×8. Оба устойчивы к пересжатию и смене размера.
+    """
+
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            image.draft("L", (IMAGE_SIZE * 8, IMAGE_SIZE * 8))
+            gray = image.convert("L")
+        file.seek(0)
+    except (OSError, UnidentifiedImageError, ValueError):
+        return None, None
+
+    pixels = list(gray.resize((IMAGE_SIZE, IMAGE_SIZE), Image.Resampling.BOX).getdata())
+    mean = sum(pixels) / len(pixels)
+    ahash = sum(1 << i for i, pixel in enumerate(pixels) if pixel > mean)
+
+    pixels = list(gray.resize((IMAGE_SIZE + 1, IMAGE_SIZE), Image.Resampling.BOX).getdata())
+    dhash = 0
+    for row in range(IMAGE_SIZE):
+        for column in range(IMAGE_SIZE):
+            left = pixels[row * (IMAGE_SIZE + 1) + column]
+            dhash = dhash << 1 | (left > pixels[row * (IMAGE_SIZE + 1) + column + 1])
+
+    return _signed(ahash), _signed(dhash)
+
+
+def hamming(first, second):
+    """Расстояние Хэмминга между двумя 64-битными хешами."""
+
+    return bin((first ^ second) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def compute_signature(title, description, image=None):
+    """Несохраненная AdSignature для текста объявления и файла изображения (если есть)."""
+
+    ahash, dhash = image_hashes(image) if image else (None, None)
+
+    return AdSignature(minhash=minhash(f"{title} {description}"), ahash=ahash, dhash=dhash)
+
+
+def _key(*parts):
+    return int.from_bytes(hashlib.blake2b(b"|".join(parts), digest_size=8).digest(), "big", signed=True)
+
+
+def bucket_keys(signature):
+    """Ключи LSH-корзин сигнатуры: по одному на полосу MinHash и на полосу dHash."""
+
+    keys = []
+    if signature.minhash:
+        band_size = ROWS * 4
+        minhash_bytes = bytes(signature.minhash)
+        keys += [
+            _key(b"text", bytes([band]), minhash_bytes[band * band_size : (band + 1) * band_size])
+            for band in range(BANDS)
+        ]
+    if signature.dhash is not None:
+        dhash = signature.dhash & 0xFFFFFFFFFFFFFFFF
+        keys += [
+            _key(b"image", bytes([band]), (dhash >> band * 16 & 0xFFFF).to_bytes(2, "big"))
+            for band in range(IMAGE_BANDS)
+        ]
+
+    return keys
+
+
+def duplicate_reason(first, second):
+    """Причина, по которой две сигнатуры считаются почти-дубликатами, или None.
+
+    Изображения считаются похожими, только если близки оба хеша, aHash и dHash.
+    """
+
+    if first.minhash and second.minhash:
+        similarity = text_similarity(first.minhash, second.minhash)
+        if similarity >= TEXT_SIMILARITY:
+            return f"текст совпадает на {similarity:.0%}"
+    # кандидат по изображению пришел из корзин dHash; aHash подтверждает его по другому признаку
+    # (яркость вместо перепадов), отсекая случайные совпадения dHash у однотонных и градиентных картинок
+    if (
+        None not in (first.dhash, second.dhash, first.ahash, second.ahash)
+        and hamming(first.dhash, second.dhash) <= IMAGE_DISTANCE
+        and hamming(first.ahash, second.ahash) <= IMAGE_DISTANCE
+    ):
+        return "похожее изображение"
+
+    return None
+
+
+def index_ads(ads, signatures=None):
+    """Сохраняет сигнатуры и LSH-корзины объявлений (заменяя прежние). Возвращает число объявлений.
+
+    signatures — заранее посчитанные сигнатуры по id объявления; для остальных сигнатура
+    считается по тексту и файлу изображения.
+    """
+
+    signatures = dict(signatures or {})
+    for ad in ads:
+        if ad.pk not in signatures:
+            image = ad.image_url if ad.image_url else None
+            try:
+                signatures[ad.pk] = compute_signature(ad.title, ad.description, image)
+            finally:
+                if image:
+                    image.close()
+        signatures[ad.pk].ad_id = ad.pk
+    if not signatures:
+        return 0
+
+    with transaction.atomic():
+        AdSignatureBucket.objects.filter(ad_id__in=signatures).delete()
+        AdSignature.objects.bulk_create(
+            signatures.values(),
+            update_conflicts=True,
+            unique_fields=["ad"],
+            update_fields=["minhash", "ahash", "dhash", "computed_at"],
+        )
+        AdSignatureBucket.objects.bulk_create(
+            AdSignatureBucket(ad_id=ad_id, key=key)
+            for ad_id, signature in signatures.items()
+            for key in set(bucket_keys(signature))
+        )
+
+    return len(signatures)
+
+
+def find_duplicates(signature, queryset=None, limit=5):
+    """Почти-дубликаты среди объявлений queryset: список (объявление, причина).
+
+    Сначала совпадения по тексту, затем по изображению, внутри — новые первыми.
+    Кандидаты выбираются по индексу LSH-корзин без переполненных (больше MAX_BUCKET_SIZE
+    объявлений), поэтому время не зависит от размера таблицы; точная проверка идет только для кандидатов.
+    """
+
+    keys = bucket_keys(signature)
+    if not keys:
+        return []
+    # переполненные корзины пропускаются, как и в find_duplicate_ads: иначе настоящий дубликат
+    # мог бы не попасть в выборку среди тысяч объявлений с шаблонным текстом
+    with connection.cursor() as cursor:
+        cursor.execute(INFORMATIVE_KEYS_SQL, [sorted(set(keys)), MAX_BUCKET_SIZE + 1, MAX_BUCKET_SIZE])
+        keys = [key for (key,) in cursor.fetchall()]
+    if not keys:
+        return []
+
+    queryset = Ad.objects.all() if queryset is None else queryset
+    candidates = AdSignatureBucket.objects.filter(key__in=keys).values("ad_id")
+    ads = queryset.filter(pk__in=Subquery(candidates)).select_related("signature").order_by("-pk")[:MAX_BUCKET_SIZE]
+
+    found = []
+    for ad in ads:
+        reason = duplicate_reason(signature, ad.signature)
+        if reason:
+            found.append((ad, reason))
+    found.sort(key=lambda item: (item[1] == "похожее изображение", -item[0].pk))
+
+    return found[:limit]
@@ -0,0 +1,156 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ads.models import CategoryTradeVolume, ExchangeEvent, ExchangeUserStats, ProjectionCheckpoint
+
+# поля предложения (для values_list) и соответствующие им поля события журнала
+EVENT_FIELDS = (
+    "pk",
+    "owner_id",
+    "ad_sender__user_id",
+    "ad_sender_id",
+    "ad_receiver_id",
+    "ad_sender__category",
+    "ad_receiver__category",
+)
+EVENT_COLUMNS = (
+    "proposal_id",
+    "owner_id",
+    "recipient_id",
+    "ad_sender_id",
+    "ad_receiver_id",
+    "ad_sender_category",
+    "ad_receiver_category",
+)
+CHECKPOINT = "exchange_projections"
+
+UPSERT_USER_STATS_SQL = """
+INSERT INTO ads_exchangeuserstats (user_id, proposals_made, proposals_received, accepted, refused, cancelled)
+VALUES {values}
+ON CONFLICT (user_id) DO UPDATE SET
+    proposals_made = ads_exchangeuserstats.proposals_made + EXCLUDED.proposals_made,
+    proposals_received = ads_exchangeuserstats.proposals_received + EXCLUDED.proposals_received,
+    accepted = ads_exchangeuserstats.accepted + EXCLUDED.accepted,
+    refused = ads_exchangeuserstats.refused + EXCLUDED.refused,
+    cancelled = ads_exchangeuserstats.cancelled + EXCLUDED.cancelled
+"""
+UPSERT_VOLUME_SQL = """
+INSERT INTO ads_categorytradevolume (day, category, proposals, trades)
+VALUES {values}
+ON CONFLICT (day, category) DO UPDATE SET
+    proposals = ads_categorytradevolume.proposals + EXCLUDED.proposals,
+    trades = ads_categorytradevolume.trades + EXCLUDED.trades
+"""
+USER_STATS_COLUMNS = ("proposals_made", "proposals_received", "accepted", "refused", "cancelled")
+VOLUME_COLUMNS = ("proposals", "trades")
+
+
+def log_events(kind, rows):
+    """Добавляет в журнал события kind одним INSERT; rows — кортежи значений полей EVENT_FIELDS.
+
+    Вызывается внутри транзакции, меняющей статус, поэтому событие и переход фиксируются вместе.
+    """
+
+    now = timezone.now()
+    ExchangeEvent.objects.bulk_create(
+        ExchangeEvent(kind=kind, created_at=now, **dict(zip(EVENT_COLUMNS, row))) for row in rows
+    )
+
+
+def log_proposal(kind, proposal):
+    """Добавляет в журнал событие kind по одному предложению."""
+
+    ad_sender, ad_receiver = proposal.ad_sender, proposal.ad_receiver
+    row = (proposal.pk, proposal.owner_id, ad_sender.user_id, ad_sender.pk, ad_receiver.pk)
+    log_events(kind, [(*row, ad_sender.category, ad_receiver.category)])
+
+
+def project(events):
+    """Приращения проекций по пачке событий: (статистика по пользователям, объем по дню и категории)."""
+
+    users, volume = defaultdict(Counter), defaultdict(Counter)
+    for kind, owner_id, recipient_id, sender_category, receiver_category, created_at in events:
+        day = timezone.localdate(created_at, timezone.get_default_timezone())
+        if kind == ExchangeEvent.KIND_CREATED:
+            users[owner_id]["proposals_made"] += 1
+            users[recipient_id]["proposals_received"] += 1
+            volume[day, sender_category]["proposals"] += 1
+        elif kind == ExchangeEvent.KIND_ACCEPTED:
+            users[owner_id]["accepted"] += 1
+            users[recipient_id]["accepted"] += 1
+            volume[day, sender_category]["trades"] += 1
+            volume[day, receiver_category]["trades"] += 1
+        elif kind == ExchangeEvent.KIND_REFUSED:
+            users[owner_id]["refused"] += 1
+        elif kind == ExchangeEvent.KIND_CANCELLED:
+            users[owner_id]["cancelled"] += 1
+
+    return users, volume
+
+
+def _upsert(cursor, sql, rows):
+    if rows:
+        placeholders = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        cursor.execute(
+            sql.format(values=", ".join([placeholders] * len(rows))), [value for row in rows for value in row]
+        )
+
+
+def replay(batch_size=10000, lag=60, rebuild=False):
+    """Применяет к проекциям события журнала после сохраненной позиции. Возвращает число событий.
+
+    Журнал читается пачками по возрастанию id, каждая пачка и новая позиция записываются
+    в одной транзакции, поэтому прерванный проход продолжается без пропусков и двойного счета.
+    id выдаются до коммита, и событие с меньшим id может зафиксироваться позже: события моложе
+    lag секунд и все после них откладываются до следующего прохода. rebuild очищает проекции
+    и перестраивает их с начала журнала.
+
+    Ограничение: событие из транзакции, открытой дольше lag, фиксируется уже ниже сохраненной
+    позиции и в проекции не попадает — до прохода с rebuild. lag выбирают больше самой долгой
+    транзакции, меняющей статус предложений.
+    """
+
+    if rebuild:
+        with transaction.atomic():
+            ExchangeUserStats.objects.all().delete()
+            CategoryTradeVolume.objects.all().delete()
+            ProjectionCheckpoint.objects.filter(name=CHECKPOINT).delete()
+
+    ProjectionCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    events = ExchangeEvent.objects.order_by("id")
+    # граница: последнее событие старше lag. Индекса по created_at нет, поэтому ищем с конца журнала
+    # по первичному ключу — просматриваются только события последних lag секунд
+    cutoff = timezone.now() - timedelta(seconds=lag)
+    upper = events.filter(created_at__lte=cutoff).order_by("-id").values_list("id", flat=True).first()
+    events = events.filter(id__lte=upper or 0)
+    columns = ("id", "kind", "owner_id", "recipient_id", "ad_sender_category", "ad_receiver_category", "created_at")
+
+    replayed = 0
+    while True:
+        with transaction.atomic():
+            # блокировка позиции: параллельные проходы применяют пачки по очереди, а не дважды
+            checkpoint = ProjectionCheckpoint.objects.select_for_update().get(name=CHECKPOINT)
+            batch = list(events.filter(id__gt=checkpoint.last_event_id).values_list(*columns)[:batch_size])
+            if not batch:
+                break
+
+            users, volume = project(row[1:] for row in batch)
+            with connection.cursor() as cursor:
+                _upsert(
+                    cursor,
+                    UPSERT_USER_STATS_SQL,
+                    [(user_id, *(counts[c] for c in USER_STATS_COLUMNS)) for user_id, counts in sorted(users.items())],
+                )
+                _upsert(
+                    cursor,
+                    UPSERT_VOLUME_SQL,
+                    [(*key, *(counts[c] for c in VOLUME_COLUMNS)) for key, counts in sorted(volume.items())],
+                )
+            checkpoint.last_event_id = batch[-1][0]
+            checkpoint.save(update_fields=["last_event_id", "updated_at"])
+        replayed += len(batch)
+
+    return replayed
@@ -1,19 +1,107 @@
 from django import forms
+from django.conf import settings
+from django.db import transaction
 
+from .dedup import compute_signature, find_duplicates
 from .mixins import StyleFormMixin
-from .models import Ad, ExchangeProposal
+from .models import Ad, AdSignature, ExchangeProposal, ProposalMessage
+
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleImageField(forms.ImageField):
+    """Поле для загрузки нескольких изображений сразу; cleaned_data — список файлов."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if not data:
+            return []
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+
+        return [super(MultipleImageField, self).clean(file, initial) for file in data]
 
 
 class AdForm(StyleFormMixin, forms.ModelForm):
-    """Форма для объявления."""
+    """Форма для объявления.
+
+    Загруженные фотографии добавляются в конец галереи; у нового объявления первая из них
+    становится обложкой. Если объявление почти совпадает с другим объявлением того же пользователя
+    (текст или обложка, см. ads.dedup), форма показывает похожие и просит подтвердить размещение.
+    """
+
+    images = MultipleImageField(required=False, label="Фотографии")
+    allow_duplicate = forms.BooleanField(required=False, label="Все равно разместить", widget=forms.HiddenInput)
 
     class Meta:
         model = Ad
-        fields = ["title", "description", "image_url", "category", "condition"]
+        fields = ["title", "description", "images", "category", "condition", "latitude", "longitude"]
         # widgets = {
         #     'condition': forms.Select(attrs={'class': 'form-control'}),
         # }
 
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        self.duplicates = []
+
+    def clean_images(self):
+        images = self.cleaned_data["images"]
+        count = self.instance.images.count() if self.instance.pk else 0
+        if count + len(images) > settings.AD_IMAGES_LIMIT:
+            raise forms.ValidationError(f"В галерее может быть не больше {settings.AD_IMAGES_LIMIT} фотографий.")
+
+        return images
+
+    def clean(self):
+        """Проверка на почти-дубликаты среди объявлений пользователя."""
+
+        cleaned_data = super().clean()
+        if self.user is None or self.errors:
+            return cleaned_data
+
+        images = cleaned_data.get("images")
+        cover = images[0] if images and not self.instance.image_url else None
+        signature = compute_signature(cleaned_data.get("title", ""), cleaned_data.get("description", ""), cover)
+        if self.instance.image_url:
+            # обложка не менялась: берутся ее хеши из сохраненной сигнатуры
+            stored = AdSignature.objects.filter(ad=self.instance.pk).first() if self.instance.pk else None
+            if stored:
+                signature.ahash, signature.dhash = stored.ahash, stored.dhash
+        self.instance._signature = signature
+
+        self.duplicates = find_duplicates(
+            signature, Ad.with_expired.filter(user=self.user).exclude(pk=self.instance.pk)
+        )
+        if self.duplicates and not cleaned_data.get("allow_duplicate"):
+            self.fields["allow_duplicate"].widget = forms.CheckboxInput(attrs={"class": "form-check-input"})
+            titles = ", ".join(f"«{ad.title}» ({reason})" for ad, reason in self.duplicates)
+            raise forms.ValidationError(f"Похоже, у вас уже есть такое объявление: {titles}.")
+
+        return cleaned_data
+
+    def save(self, commit=True):
+        """Сохраняет объявление и добавляет загруженные фотографии в галерею (при commit=False — только объявление)."""
+
+        if not commit:
+            return super().save(commit=False)
+
+        signature = self.instance.__dict__.get("_signature")
+        with transaction.atomic():
+            ad = super().save()
+            if self.cleaned_data.get("images"):
+                if not ad.image_url:
+                    # сигнатура из clean уже посчитана по будущей обложке, повторно ее не считаем
+                    ad._signature = signature
+                ad.add_images(self.cleaned_data["images"])
+
+        return ad
+
 
 class ExchangeProposalForm(StyleFormMixin, forms.ModelForm):
     """Форма для обмена."""
@@ -36,3 +124,12 @@ class ExchangeProposalForm(StyleFormMixin, forms.ModelForm):
         else:
             self.fields["ad_receiver"].queryset = Ad.objects.none()
         self.fields["comment"].initial = ""
+
+
+class ProposalMessageForm(StyleFormMixin, forms.ModelForm):
+    """Форма сообщения в переписке по обмену."""
+
+    class Meta:
+        model = ProposalMessage
+        fields = ["text"]
+        widgets = {"text": forms.Textarea(attrs={"rows": 3})}
@@ -0,0 +1,88 @@
+import math
+
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+MAX_RADIUS_KM = 500
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Границы (min_lat, max_lat, min_lon, max_lon) квадрата, описанного вокруг круга радиуса radius_km.
+
+    Долготы могут выходить за ±180 у антимеридиана; если круг накрывает полюс, берутся все долготы.
+    """
+
+    angular = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), -180, 180
+
+    delta_lon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(latitude))))
+
+    return min_lat, max_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def distance_km(latitude, longitude):
+    """SQL-выражение: расстояние от точки до (latitude, longitude) объявления по формуле гаверсинуса."""
+
+    lat = math.radians(latitude)
+    half_dlat = (Radians("latitude") - Value(lat)) / 2
+    half_dlon = (Radians("longitude") - Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(lat)) * Cos(Radians("latitude")) * Power(Sin(half_dlon), 2)
+
+    return ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField()) * Value(2 * EARTH_RADIUS_KM)
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """Объявления в радиусе radius_km с аннотацией distance (км).
+
+    Сначала отбор по индексу (latitude, longitude) внутри описанного квадрата,
+    затем точная проверка расстояния только для попавших в квадрат строк.
+    """
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    if min_lon < -180:
+        longitude_box = Q(longitude__gte=min_lon + 360) | Q(longitude__lte=max_lon)
+    elif max_lon > 180:
+        longitude_box = Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon - 360)
+    else:
+        longitude_box = Q(longitude__range=(min_lon, max_lon))
+
+    return (
+        queryset.filter(longitude_box, latitude__range=(min_lat, max_lat))
+        .annotate(distance=distance_km(latitude, longitude))
+        .filter(distance__lte=radius_km)
+    )
+
+
+def location_params(params, user=None):
+    """Точка и радиус поиска из параметров запроса (lat, lon, radius).
+
+    Без lat/lon берется местоположение из профиля пользователя. Возвращает None,
+    если радиус не задан, и бросает ValueError при некорректных значениях.
+    """
+
+    radius = params.get("radius")
+    if not radius:
+        return None
+
+    try:
+        radius = float(radius)
+        latitude = float(params["lat"]) if params.get("lat") else None
+        longitude = float(params["lon"]) if params.get("lon") else None
+    except ValueError as error:
+        raise ValueError("Координаты и радиус должны быть числами") from error
+
+    if latitude is None or longitude is None:
+        if user is None or not user.is_authenticated or user.latitude is None or user.longitude is None:
+            raise ValueError("Не задана точка поиска: укажите lat и lon или местоположение в профиле")
+        latitude, longitude = user.latitude, user.longitude
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Координаты вне допустимого диапазона")
+    if not 0 < radius <= MAX_RADIUS_KM:
+        raise ValueError(f"Радиус должен быть от 0 до {MAX_RADIUS_KM} км")
+
+    return latitude, longitude, radius
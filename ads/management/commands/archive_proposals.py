@@ -0,0 +1,82 @@
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ads.models import ExchangeProposal
+
+# переносит одну пачку: удаление из рабочей таблицы и вставка в архив одним запросом
+MOVE_BATCH_SQL = """
+WITH moved AS (
+    DELETE FROM ads_exchangeproposal
+    WHERE id IN (
+        SELECT id FROM ads_exchangeproposal
+        WHERE status = ANY(%s) AND created_at < %s
+        ORDER BY created_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, owner_id, ad_sender_id, ad_receiver_id, comment, status, created_at
+)
+INSERT INTO ads_archivedexchangeproposal
+    (id, owner_id, ad_sender_id, ad_receiver_id, comment, status, created_at, archived_at)
+SELECT id, owner_id, ad_sender_id, ad_receiver_id, comment, status, created_at, now() FROM moved
+"""
+
+CANDIDATE_MONTHS_SQL = """
+SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')
+FROM ads_exchangeproposal
+WHERE status = ANY(%s) AND created_at < %s
+"""
+
+
+class Command(BaseCommand):
+    """Переносит завершенные предложения обмена старше N дней в секционированный архив."""
+
+    help = "Архивирует предложения обмена в конечных статусах пачками, создавая месячные секции архива"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=90, help="Архивировать предложения старше N дней")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Размер пачки (одна транзакция)")
+        parser.add_argument("--sleep", type=float, default=0, help="Пауза между пачками в секундах")
+
+    def handle(self, *args, **options):
+        statuses = list(ExchangeProposal.TERMINAL_STATUSES)
+        cutoff = timezone.now() - timedelta(days=options["days"])
+
+        with connection.cursor() as cursor:
+            cursor.execute(CANDIDATE_MONTHS_SQL, [statuses, cutoff])
+            months = [row[0] for row in cursor.fetchall()]
+        for month in months:
+            self.ensure_partition(month)
+
+        total = 0
+        while True:
+            # короткие транзакции: блокировки держатся только на время одной пачки
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(MOVE_BATCH_SQL, [statuses, cutoff, options["batch_size"]])
+                moved = cursor.rowcount
+            total += moved
+            if moved:
+                self.stdout.write(f"Перенесено в архив: {moved}")
+            if moved < options["batch_size"]:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Всего перенесено в архив: {total}"))
+
+    @staticmethod
+    def ensure_partition(month):
+        """Создает секцию архива за месяц month, если ее еще нет."""
+
+        start = month.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        name = f"ads_archivedexchangeproposal_y{start:%Y}m{start:%m}"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF ads_archivedexchangeproposal "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d} 00:00:00+00') TO ('{end:%Y-%m-%d} 00:00:00+00')"
+            )
@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from ads import api
+from ads.api import AdListApiView
+from ads.models import Ad
+from ads.views import AdListView, AdSearchListView
+from users.models import User
+
+
+class Rollback(Exception):
+    """Откатывает тестовые данные бенчмарка."""
+
+
+class Command(BaseCommand):
+    """Бенчмарк JSON API объявлений против HTML-представлений.
+
+    Объявления создаются в транзакции, которая в конце откатывается.
+    """
+
+    help = "Сравнивает скорость и размер ответа JSON API объявлений и HTML-страниц"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ads", type=int, default=1000, help="Количество объявлений")
+        parser.add_argument("--requests", type=int, default=200, help="Количество запросов на сценарий")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(SEARCH_RATE_LIMIT=None, SEARCH_CACHE_TIMEOUT=0):
+                self.run(options["ads"], options["requests"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, ads, requests):
+        user = User.objects.create(email="bench-api@example.com", password="!")
+        Ad.objects.bulk_create(
+            (
+                Ad(
+                    title=f"Объявление {i}",
+                    description="Описание " * 20,
+                    category="хобби",
+                    condition="новый",
+                    user=user,
+                )
+                for i in range(ads)
+            ),
+            batch_size=5000,
+        )
+
+        scenarios = [
+            ("HTML: поиск, 20 на странице", AdSearchListView.as_view(), {"category": "хобби"}),
+            ("API: 20, поля по умолчанию", AdListApiView.as_view(), {"category": "хобби"}),
+            ("API: 20, fields=id,title", AdListApiView.as_view(), {"category": "хобби", "fields": "id,title"}),
+            ("API: 100, поля по умолчанию", AdListApiView.as_view(), {"category": "хобби", "limit": 100}),
+        ]
+
+        self.stdout.write(f"{'сценарий':<32} {'запросов/с':>11} {'байт':>9}")
+        # страница списка без пагинации рендерит все объявления, поэтому запросов к ней меньше
+        self.report("HTML: все объявления", AdListView.as_view(), {}, max(requests // 20, 1))
+        for title, view, params in scenarios:
+            self.report(title, view, params, requests)
+
+        if api.orjson is not None:
+            orjson, api.orjson = api.orjson, None
+            try:
+                self.report("API: 100, без orjson", AdListApiView.as_view(), {"limit": 100}, requests)
+            finally:
+                api.orjson = orjson
+
+    def report(self, title, view, params, requests):
+        factory = RequestFactory()
+        size = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            request = factory.get("/", params)
+            request.user = AnonymousUser()
+            response = view(request)
+            if hasattr(response, "render"):
+                response.render()
+            size = len(response.content)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"{title:<32} {requests / elapsed:>11.0f} {size:>9}")
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from ads.geo import distance_km, nearby
+from ads.models import Ad
+from users.models import User
+
+# случайные точки в прямоугольнике; строки создаются одним INSERT ... SELECT на стороне БД
+SEED_SQL = """
+INSERT INTO ads_ad (user_id, title, description, category, condition, created_at, updated_at, expires_at,
+                   latitude, longitude)
+SELECT %s, 'Объявление ' || n, '', 'хобби', 'новый', now(), now(), now() + interval '30 days',
+       %s + random() * (%s - %s), %s + random() * (%s - %s)
+FROM generate_series(1, %s) AS n
+"""
+
+
+class Rollback(Exception):
+    """Откатывает тестовые данные бенчмарка."""
+
+
+class Command(BaseCommand):
+    """Бенчмарк поиска объявлений рядом: полный перебор с гаверсинусом против квадрата по индексу.
+
+    Точки создаются в транзакции, которая в конце откатывается.
+    """
+
+    help = "Сравнивает поиск объявлений в радиусе с отбором по индексу и без него"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=1_000_000, help="Количество объявлений с координатами")
+        parser.add_argument("--radii", default="5,25,100", help="Радиусы поиска в км через запятую")
+        parser.add_argument("--repeat", type=int, default=5, help="Повторов запроса")
+        parser.add_argument("--lat", type=float, default=55.75, help="Широта точки поиска")
+        parser.add_argument("--lon", type=float, default=37.62, help="Долгота точки поиска")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user = User.objects.create(email="bench-geo@example.com", password="!")
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            # примерно европейская часть России и Сибирь
+            cursor.execute(SEED_SQL, [user.pk, 41, 70, 41, 27, 140, 27, options["points"]])
+            cursor.execute("ANALYZE ads_ad")
+        self.stdout.write(f"Создано {options['points']} точек за {time.perf_counter() - start:.1f} с")
+
+        latitude, longitude = options["lat"], options["lon"]
+        self.stdout.write(f"{'радиус, км':>10} {'найдено':>8} {'перебор, мс':>12} {'индекс, мс':>11}")
+        for radius in (float(radius) for radius in options["radii"].split(",")):
+            full_scan = (
+                Ad.objects.filter(latitude__isnull=False)
+                .annotate(distance=distance_km(latitude, longitude))
+                .filter(distance__lte=radius)
+            )
+            indexed = nearby(Ad.objects.all(), latitude, longitude, radius)
+
+            results = []
+            for queryset in (full_scan, indexed):
+                start = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    ids = set(queryset.values_list("id", flat=True))
+                results.append(((time.perf_counter() - start) / options["repeat"] * 1000, ids))
+
+            (scan_ms, scan_ids), (index_ms, index_ids) = results
+            if scan_ids != index_ids:
+                self.stderr.write(f"Результаты различаются для радиуса {radius} км")
+            self.stdout.write(f"{radius:>10.0f} {len(index_ids):>8} {scan_ms:>12.1f} {index_ms:>11.1f}")
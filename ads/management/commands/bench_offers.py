@@ -0,0 +1,85 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from ads.models import Ad, ExchangeProposal
+from ads.services import offers_queryset
+from users.models import User
+
+
+class Rollback(Exception):
+    """Откатывает тестовые данные бенчмарка."""
+
+
+class Command(BaseCommand):
+    """Регрессионный бенчмарк страницы «Вам предлагают обмен» при росте общего числа объявлений.
+
+    Все данные создаются в транзакции, которая в конце откатывается.
+    """
+
+    help = "Сравнивает время запроса предложений пользователю (старый подзапрос и соединение по индексу)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--steps", default="1000,10000,100000", help="Общее число чужих объявлений на каждом шаге через запятую"
+        )
+        parser.add_argument("--proposals", type=int, default=30, help="Количество предложений пользователю")
+        parser.add_argument("--repeat", type=int, default=20, help="Повторов запроса на шаге")
+
+    def handle(self, *args, **options):
+        steps = sorted(int(step) for step in options["steps"].split(","))
+        try:
+            with transaction.atomic():
+                self.run(steps, options["proposals"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, steps, proposals, repeat):
+        user, *others = User.objects.bulk_create(
+            User(email=f"bench-offers-{i}@example.com", password="!") for i in range(101)
+        )
+        my_ad = Ad.objects.create(title="Мое объявление", user=user)
+        offered = Ad.objects.bulk_create(
+            Ad(title=f"Предлагаемое {i}", user=others[i % len(others)]) for i in range(proposals)
+        )
+        ExchangeProposal.objects.bulk_create(
+            ExchangeProposal(owner=ad.user, ad_sender=my_ad, ad_receiver=ad, comment="") for ad in offered
+        )
+
+        scenarios = [
+            ("подзапрос по чужим объявлениям", lambda: self.old_queryset(user)),
+            ("соединение по индексу", lambda: offers_queryset(user)),
+        ]
+
+        self.stdout.write(f"{'объявлений':>10} " + " ".join(f"{title:>32}" for title, _ in scenarios))
+        total = len(offered)
+        for step in steps:
+            Ad.objects.bulk_create(
+                (Ad(title=f"Объявление {i}", user=others[i % len(others)]) for i in range(total, step)),
+                batch_size=5000,
+            )
+            total = max(total, step)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE ads_ad")
+                cursor.execute("ANALYZE ads_exchangeproposal")
+
+            timings = []
+            for _, queryset in scenarios:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    page = list(queryset()[:20])
+                    for proposal in page:
+                        proposal.owner, proposal.ad_sender, proposal.ad_receiver
+                timings.append((time.perf_counter() - start) / repeat * 1000)
+
+            self.stdout.write(f"{total:>10} " + " ".join(f"{ms:>29.2f} мс" for ms in timings))
+
+    @staticmethod
+    def old_queryset(user):
+        """Прежний запрос страницы: предложения, где объявление-получатель не принадлежит пользователю."""
+
+        return ExchangeProposal.objects.filter(
+            ad_receiver__in=Ad.objects.exclude(user=user), status=ExchangeProposal.STATUS_PENDING
+        )
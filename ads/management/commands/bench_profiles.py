@@ -0,0 +1,78 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command
+from django.test import Client
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    """Смоук-бенчмарк профилей окружения: запросы в секунду и память для dev, test и prod."""
+
+    help = "Сравнивает профили окружения (dev/test/prod) по скорости ответа и потреблению памяти"
+
+    pages = ("ads:home", "ads:ads-list", "ads:search-ads")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300, help="Количество запросов на профиль")
+        parser.add_argument("--profiles", default="dev,test,prod", help="Профили через запятую")
+        # внутренний режим: замер в текущем процессе с уже выбранным профилем
+        parser.add_argument("--worker", action="store_true", help="Служебный режим дочернего процесса")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.stdout.write(json.dumps(self.run_worker(options["requests"])))
+            return
+
+        self.stdout.write(f"{'профиль':<8} {'запросов/с':>11} {'мс/запрос':>10} {'память, МБ':>11} {'байт/ответ':>11}")
+        for profile in options["profiles"].split(","):
+            result = self.run_profile(profile.strip(), options["requests"])
+            self.stdout.write(
+                f"{profile:<8} {result['rps']:>11.1f} {1000 / result['rps']:>10.2f} "
+                f"{result['max_rss_mb']:>11.1f} {result['bytes_per_response']:>11.0f}"
+            )
+
+    def run_profile(self, profile, requests):
+        """Запускает замер в отдельном процессе, чтобы настройки профиля применились целиком."""
+
+        with tempfile.TemporaryDirectory() as static_root:
+            env = dict(os.environ, ENVIRONMENT=profile, STATIC_ROOT=static_root, ALLOWED_HOSTS="testserver")
+            env.setdefault("SECRET_KEY", settings.SECRET_KEY)
+            process = subprocess.run(
+                [sys.executable, sys.argv[0], "bench_profiles", "--worker", "--requests", str(requests)],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+
+        if process.returncode:
+            raise CommandError(f"Профиль {profile} завершился с ошибкой:\n{process.stderr}")
+
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def run_worker(self, requests):
+        """Прогоняет запросы через тестовый клиент в текущем процессе."""
+
+        if "Manifest" in settings.STORAGES["staticfiles"]["BACKEND"]:
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+        client = Client(HTTP_ACCEPT_ENCODING="gzip, br")
+        urls = [reverse(page) for page in self.pages]
+        transferred = 0
+
+        start = time.perf_counter()
+        for index in range(requests):
+            transferred += len(client.get(urls[index % len(urls)]).content)
+        elapsed = time.perf_counter() - start
+
+        return {
+            "rps": requests / elapsed,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "bytes_per_response": transferred / requests,
+        }
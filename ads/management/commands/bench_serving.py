@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+
+from django.core.management import BaseCommand
+from django.test.client import RequestFactory
+from django.views.static import serve as django_serve
+
+from config.serving import FileServingMiddleware, serve
+
+
+class Command(BaseCommand):
+    """Бенчмарк пропускной способности раздачи файлов: django.views.static.serve против config.serving."""
+
+    help = "Сравнивает скорость раздачи медиа стандартным представлением Django и config.serving"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Количество запросов на сценарий")
+        parser.add_argument("--size", type=int, default=256 * 1024, help="Размер файла в байтах")
+
+    def handle(self, *args, **options):
+        requests, size = options["requests"], options["size"]
+        factory = RequestFactory()
+
+        with tempfile.TemporaryDirectory() as root:
+            name = "ab/" + "ab" * 32 + ".jpg"
+            os.makedirs(os.path.join(root, "ab"))
+            with open(os.path.join(root, name), "wb") as file:
+                file.write(os.urandom(size))
+
+            def not_found(environ, start_response):
+                start_response("404 Not Found", [])
+                return [b""]
+
+            middleware = FileServingMiddleware(not_found, [("/media/", root, False)])
+            etag = serve(factory.get("/"), name, root)["ETag"]
+
+            scenarios = [
+                ("django.views.static.serve", lambda: django_serve(factory.get("/"), name, root)),
+                ("config.serving.serve", lambda: serve(factory.get("/"), name, root)),
+                ("WSGI FileServingMiddleware", lambda: self.call(middleware, factory.get("/media/" + name))),
+                (
+                    "WSGI Range 64 КБ",
+                    lambda: self.call(middleware, factory.get("/media/" + name, HTTP_RANGE="bytes=0-65535")),
+                ),
+                (
+                    "WSGI 304 по ETag",
+                    lambda: self.call(middleware, factory.get("/media/" + name, HTTP_IF_NONE_MATCH=etag)),
+                ),
+            ]
+
+            self.stdout.write(f"{'сценарий':<30} {'запросов/с':>11} {'МБ/с':>9}")
+            for title, scenario in scenarios:
+                transferred = 0
+                start = time.perf_counter()
+                for _ in range(requests):
+                    transferred += self.consume(scenario())
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{title:<30} {requests / elapsed:>11.0f} {transferred / elapsed / 2**20:>9.0f}")
+
+    @staticmethod
+    def call(middleware, request):
+        """Вызывает WSGI-обертку с окружением запроса."""
+
+        return middleware(request.environ, lambda status, headers: None)
+
+    @staticmethod
+    def consume(response):
+        """Читает тело ответа целиком и возвращает его размер."""
+
+        body = getattr(response, "streaming_content", None)
+        if body is None:
+            body = response.content if hasattr(response, "content") else response
+        size = sum(len(chunk) for chunk in body) if not isinstance(body, bytes) else len(body)
+        if hasattr(response, "close"):
+            response.close()
+
+        return size
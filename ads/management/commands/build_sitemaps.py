@@ -0,0 +1,19 @@
+import time
+
+from django.core.management import BaseCommand
+
+from ads.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    """Обновляет карту сайта с объявлениями: индекс и сжатые части по 50 000 ссылок."""
+
+    help = "Перестраивает части карты сайта для диапазонов id, где объявления менялись с прошлого прохода"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Перестроить все части заново")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rebuilt, total = build_sitemaps(full=options["full"])
+        self.stdout.write(f"Перестроено частей: {rebuilt}, всего: {total} за {time.perf_counter() - start:.1f} с")
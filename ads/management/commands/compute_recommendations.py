@@ -0,0 +1,107 @@
+import multiprocessing
+import time
+
+import numpy as np
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from ads.models import AdRecommendation
+from ads.recommendations import CATEGORIES, CandidatePool, load_affinity, top_ads
+
+# пул кандидатов передается рабочим процессам один раз, при их запуске
+_pool = None
+_top_n = None
+
+
+def _init_worker(pool, top_n):
+    global _pool, _top_n
+    _pool, _top_n = pool, top_n
+
+
+def _score_chunk(chunk):
+    user_ids, affinity = chunk
+    return user_ids, top_ads(user_ids, affinity, _pool, _top_n)
+
+
+class Command(BaseCommand):
+    """Пересчитывает рекомендации объявлений для всех пользователей с известными интересами.
+
+    Пользователи обрабатываются пачками, пачки оцениваются параллельно в нескольких процессах,
+    результат записывается в AdRecommendation upsert-ом по пачкам.
+    """
+
+    help = "Рассчитывает персональные рекомендации объявлений по интересам к категориям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=100, help="Сколько объявлений хранить на пользователя")
+        parser.add_argument("--pool", type=int, default=5000, help="Сколько новых объявлений рассматривать")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Пользователей в пачке")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Процессов для оценки")
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            help="Бенчмарк: оценить N случайных пользователей без чтения и записи БД",
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        start = time.perf_counter()
+
+        if options["synthetic"]:
+            rng = np.random.default_rng(0)
+            users = options["synthetic"]
+            user_ids = np.arange(1, users + 1, dtype=np.int64)
+            affinity = rng.random((users, len(CATEGORIES)), dtype=np.float32)
+            pool = CandidatePool(
+                np.arange(options["pool"]),
+                rng.integers(1, users + 1, options["pool"]),
+                rng.integers(0, len(CATEGORIES), options["pool"]),
+            )
+        else:
+            user_ids, affinity = load_affinity()
+            pool = CandidatePool.load(options["pool"])
+        loaded = time.perf_counter()
+
+        chunk_size = options["chunk_size"]
+        chunks = (
+            (user_ids[offset : offset + chunk_size], affinity[offset : offset + chunk_size])
+            for offset in range(0, len(user_ids), chunk_size)
+        )
+
+        written = 0
+        for chunk_user_ids, chunk_ad_ids in self.score(chunks, pool, options["top"], options["workers"]):
+            if not options["synthetic"]:
+                AdRecommendation.objects.bulk_create(
+                    [
+                        AdRecommendation(user_id=user_id, ad_ids=ad_ids, computed_at=started_at)
+                        for user_id, ad_ids in zip(chunk_user_ids.tolist(), chunk_ad_ids)
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["user"],
+                    update_fields=["ad_ids", "computed_at"],
+                )
+            written += len(chunk_user_ids)
+
+        if not options["synthetic"]:
+            # у пользователей, потерявших все сигналы, старые рекомендации удаляются
+            AdRecommendation.objects.filter(computed_at__lt=started_at).delete()
+
+        finished = time.perf_counter()
+        self.stdout.write(
+            f"Пользователей: {written}, кандидатов: {len(pool)}, "
+            f"загрузка {loaded - start:.1f} с, оценка и запись {finished - loaded:.1f} с"
+        )
+
+    @staticmethod
+    def score(chunks, pool, top_n, workers):
+        """Оценивает пачки пользователей: в текущем процессе или параллельно в workers процессах."""
+
+        if workers <= 1:
+            for user_ids, affinity in chunks:
+                yield user_ids, top_ads(user_ids, affinity, pool, top_n)
+            return
+
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers, initializer=_init_worker, initargs=(pool, top_n)) as processes:
+            yield from processes.imap_unordered(_score_chunk, chunks)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Now
+
+from ads.models import Ad, AdImage
+from ads.storage import content_addressed_storage
+
+
+class Command(BaseCommand):
+    """Переносит изображения объявлений в контентно-адресуемое хранилище и удаляет дубликаты."""
+
+    help = "Дедупликация media/ad_images: одинаковые файлы сливаются в один, ссылки объявлений обновляются"
+
+    directory = "ad_images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет сделано")
+        parser.add_argument(
+            "--delete-orphans", action="store_true", help="Удалить файлы, на которые не ссылается ни одно объявление"
+        )
+
+    def handle(self, *args, **options):
+        storage = content_addressed_storage
+        dry_run = options["dry_run"]
+        moved = duplicates = orphans = freed = 0
+
+        for name in self.legacy_files(storage):
+            digest = self.file_digest(storage.path(name))
+            target = storage.content_name(self.directory, digest, os.path.splitext(name)[1].lower())
+            size = storage.size(name)
+            referenced = Ad.all_objects.filter(image_url=name).exists() or AdImage.objects.filter(image=name).exists()
+
+            if not referenced and options["delete_orphans"]:
+                orphans += 1
+                freed += size
+                self.stdout.write(f"сирота: {name}")
+                if not dry_run:
+                    storage.delete(name)
+                continue
+
+            if storage.exists(target):
+                duplicates += 1
+                freed += size
+                self.stdout.write(f"дубликат: {name} -> {target}")
+            else:
+                moved += 1
+                self.stdout.write(f"перенос: {name} -> {target}")
+
+            if dry_run:
+                continue
+
+            if not storage.exists(target):
+                os.makedirs(os.path.dirname(storage.path(target)), exist_ok=True)
+                os.replace(storage.path(name), storage.path(target))
+            with transaction.atomic():
+                # updated_at: по нему partition_ads переносит изменения, сделанные во время копирования
+                Ad.all_objects.filter(image_url=name).update(image_url=target, updated_at=Now())
+                AdImage.objects.filter(image=name).update(image=target)
+            if storage.exists(name):
+                storage.delete(name)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Перенесено: {moved}, дубликатов: {duplicates}, сирот: {orphans}, освобождено байт: {freed}"
+            )
+        )
+
+    def legacy_files(self, storage):
+        """Файлы, лежащие не по хешу содержимого (загруженные до контентно-адресуемого хранилища)."""
+
+        if not storage.exists(self.directory):
+            return
+
+        directories, files = storage.listdir(self.directory)
+        for filename in sorted(files):
+            if not filename.startswith("."):
+                yield f"{self.directory}/{filename}"
+
+    @staticmethod
+    def file_digest(path):
+        """sha256 содержимого файла."""
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from config.metrics import metrics
+
+# снимает с публикации одну пачку истекших объявлений; кандидаты берутся по частичному индексу
+# ad_expiry_idx в порядке срока, строки, занятые другими транзакциями, пропускаются
+EXPIRE_BATCH_SQL = """
+UPDATE ads_ad SET expired_at = %s, updated_at = %s
+WHERE id IN (
+    SELECT id FROM ads_ad
+    WHERE deleted_at IS NULL AND expired_at IS NULL AND expires_at <= %s
+    ORDER BY expires_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+)
+"""
+
+
+class Command(BaseCommand):
+    """Снимает с публикации объявления с истекшим сроком (expires_at).
+
+    Каждая пачка — отдельная короткая транзакция, поэтому строки блокируются только на время
+    одной пачки, а объявления, которые в этот момент редактируют или продлевают, пропускаются
+    до следующего прохода. С --interval команда работает как планировщик и повторяет проход
+    каждые N секунд.
+    """
+
+    help = "Снимает с публикации истекшие объявления пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Размер пачки (одна транзакция)")
+        parser.add_argument("--sleep", type=float, default=0, help="Пауза между пачками в секундах")
+        parser.add_argument("--interval", type=float, default=0, help="Повторять проход каждые N секунд")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = self.sweep(options["batch_size"], options["sleep"])
+            self.stdout.write(f"Снято с публикации: {expired}")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+            close_old_connections()
+
+    @staticmethod
+    def sweep(batch_size, sleep=0):
+        """Один проход: пачки до тех пор, пока не останется истекших объявлений. Возвращает их число."""
+
+        now = timezone.now()
+        total = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(EXPIRE_BATCH_SQL, [now, now, now, batch_size])
+                expired = cursor.rowcount
+            total += expired
+            if expired < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+        metrics.increment("ads.expired", total)
+
+        return total
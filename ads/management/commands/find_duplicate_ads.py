@@ -0,0 +1,108 @@
+import time
+from itertools import islice
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from ads.dedup import MAX_BUCKET_SIZE, duplicate_reason, index_ads
+from ads.models import Ad, AdSignature
+
+# пары объявлений, попавших хотя бы в одну общую LSH-корзину; переполненные корзины пропускаются
+CANDIDATE_PAIRS_SQL = """
+SELECT DISTINCT first.ad_id, second.ad_id
+FROM ads_adsignaturebucket first
+JOIN ads_adsignaturebucket second ON second.key = first.key AND second.ad_id > first.ad_id
+JOIN ads_ad first_ad ON first_ad.id = first.ad_id AND first_ad.deleted_at IS NULL
+JOIN ads_ad second_ad ON second_ad.id = second.ad_id AND second_ad.deleted_at IS NULL {same_user}
+WHERE first.key NOT IN (
+    SELECT key FROM ads_adsignaturebucket GROUP BY key HAVING count(*) > %s
+)
+"""
+
+
+class Command(BaseCommand):
+    """Пакетный поиск почти-дубликатов по всей таблице объявлений.
+
+    Сначала досчитываются недостающие сигнатуры (или все, с --rebuild), затем пары-кандидаты
+    выбираются соединением LSH-корзин в БД, проверяются по сигнатурам и собираются в группы.
+    """
+
+    help = "Находит группы почти одинаковых объявлений (MinHash/LSH по тексту и хеши изображений)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Пересчитать сигнатуры всех объявлений")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Объявлений и пар в пачке")
+        parser.add_argument("--same-user", action="store_true", help="Искать дубликаты только у одного продавца")
+        parser.add_argument("--limit", type=int, default=50, help="Сколько групп вывести")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        indexed = self.index(options["rebuild"], options["batch_size"])
+        indexed_at = time.perf_counter()
+
+        pairs, duplicates, groups = self.find(options["same_user"], options["batch_size"])
+        groups = sorted(groups.values(), key=lambda group: (-len(group), min(group)))
+
+        titles = dict(
+            Ad.objects.filter(pk__in=[ad_id for group in groups[: options["limit"]] for ad_id in group]).values_list(
+                "id", "title"
+            )
+        )
+        for group in groups[: options["limit"]]:
+            ad_ids = sorted(group)
+            self.stdout.write(f"{len(ad_ids)}: {', '.join(map(str, ad_ids))} — {titles.get(ad_ids[0], '')}")
+
+        self.stdout.write(
+            f"Проиндексировано: {indexed} за {indexed_at - start:.1f} с; пар-кандидатов: {pairs}, "
+            f"дубликатов: {duplicates}, групп: {len(groups)} за {time.perf_counter() - indexed_at:.1f} с"
+        )
+
+    @staticmethod
+    def index(rebuild, batch_size):
+        """Считает сигнатуры объявлений без сигнатуры (при rebuild — всех) пачками."""
+
+        queryset = Ad.objects.only("id", "title", "description", "image_url").order_by("pk")
+        if not rebuild:
+            queryset = queryset.filter(signature__isnull=True)
+
+        indexed = 0
+        ads = queryset.iterator(chunk_size=batch_size)
+        while batch := list(islice(ads, batch_size)):
+            indexed += index_ads(batch)
+
+        return indexed
+
+    @staticmethod
+    def find(same_user, batch_size):
+        """Проверяет пары-кандидаты и объединяет дубликаты в группы (система непересекающихся множеств).
+
+        Возвращает (пар-кандидатов, подтвержденных пар, группы по корню).
+        """
+
+        parent = {}
+
+        def root(ad_id):
+            parent.setdefault(ad_id, ad_id)
+            while parent[ad_id] != ad_id:
+                parent[ad_id] = parent[parent[ad_id]]
+                ad_id = parent[ad_id]
+            return ad_id
+
+        pairs = duplicates = 0
+        sql = CANDIDATE_PAIRS_SQL.format(same_user="AND second_ad.user_id = first_ad.user_id" if same_user else "")
+        # серверный курсор: пары читаются пачками, а не все сразу
+        with transaction.atomic(), connection.chunked_cursor() as cursor:
+            cursor.execute(sql, [MAX_BUCKET_SIZE])
+            while batch := cursor.fetchmany(batch_size):
+                pairs += len(batch)
+                signatures = AdSignature.objects.in_bulk({ad_id for pair in batch for ad_id in pair})
+                for first, second in batch:
+                    if duplicate_reason(signatures[first], signatures[second]):
+                        duplicates += 1
+                        parent[root(first)] = root(second)
+
+        groups = {}
+        for ad_id in parent:
+            groups.setdefault(root(ad_id), set()).add(ad_id)
+
+        return pairs, duplicates, groups
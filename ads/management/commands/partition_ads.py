@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from ads import partitioning
+
+
+class Command(BaseCommand):
+    """Секционирование таблицы объявлений: перенос в секционированную таблицу, новые секции и проверка отсечения."""
+
+    help = "Секционирует ads_ad по категории или месяцу создания, досоздает секции и показывает отсечение секций"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--by",
+            choices=sorted(partitioning.STRATEGIES),
+            help="Способ секционирования, по умолчанию AD_PARTITION_BY",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000, help="Строк в пачке копирования")
+        parser.add_argument("--months-ahead", type=int, default=3, help="На сколько месяцев вперед создавать секции")
+        parser.add_argument("--keep-old", action="store_true", help="Оставить старую таблицу как ads_ad_old")
+        parser.add_argument("--explain", action="store_true", help="Показать, сколько секций читают запросы")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        current = partitioning.partition_strategy()
+        strategy = options["by"] or settings.AD_PARTITION_BY or None
+
+        if current is None:
+            if not strategy:
+                raise CommandError("Таблица не секционирована: укажите --by или AD_PARTITION_BY")
+            copied = partitioning.partition_ads(
+                strategy,
+                batch_size=options["batch_size"],
+                months_ahead=options["months_ahead"],
+                keep_old=options["keep_old"],
+                log=self.stdout.write,
+            )
+            self.stdout.write(
+                f"Таблица секционирована ({strategy}): строк {copied}, секций {len(partitioning.partitions())} "
+                f"за {time.perf_counter() - start:.1f} с"
+            )
+        elif strategy and strategy != current:
+            raise CommandError(f"Таблица уже секционирована по {current}")
+        else:
+            created = partitioning.ensure_partitions(options["months_ahead"])
+            self.stdout.write(f"Создано секций: {created}, всего: {len(partitioning.partitions())}")
+
+        if options["explain"]:
+            total = len(partitioning.partitions())
+            for label, scanned in partitioning.pruning_report():
+                self.stdout.write(f"{label}: секций {len(scanned)} из {total} ({', '.join(scanned)})")
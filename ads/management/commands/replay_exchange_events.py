@@ -0,0 +1,21 @@
+import time
+
+from django.core.management import BaseCommand
+
+from ads.exchange_log import replay
+
+
+class Command(BaseCommand):
+    """Применяет новые события журнала обменов к проекциям (статистика пользователей, объем по категориям)."""
+
+    help = "Досчитывает проекции журнала обменов с сохраненной позиции или перестраивает их заново"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Очистить проекции и пересчитать весь журнал")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Событий в пачке (одна транзакция)")
+        parser.add_argument("--lag", type=int, default=60, help="Не трогать события моложе N секунд")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        replayed = replay(batch_size=options["batch_size"], lag=options["lag"], rebuild=options["rebuild"])
+        self.stdout.write(f"Применено событий: {replayed} за {time.perf_counter() - start:.1f} с")
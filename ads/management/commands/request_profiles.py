@@ -0,0 +1,57 @@
+import io
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from config.profiling import frame_totals, list_profiles, read_collapsed, render_flamegraph
+
+
+class Command(BaseCommand):
+    """Профили медленных запросов из PROFILES_DIR: список, отчет по самым дорогим функциям и flamegraph."""
+
+    help = "Показывает сохраненные профили медленных запросов и рисует по ним flamegraph (SVG)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Имя профиля (или его начало) либо latest; без имени — список")
+        parser.add_argument("--top", type=int, default=20, help="Сколько функций показать в отчете")
+        parser.add_argument("--svg", help="Записать flamegraph в этот файл")
+
+    def handle(self, *args, **options):
+        directory = settings.PROFILES_DIR
+        names = list_profiles(directory)
+        if not options["name"]:
+            for name in names:
+                header, stacks = read_collapsed(os.path.join(directory, name))
+                self.stdout.write(f"{name}  {' | '.join(header)}  семплов: {sum(stacks.values())}")
+            self.stdout.write(f"Профилей: {len(names)} в {directory}")
+            return
+
+        matching = names[:1] if options["name"] == "latest" else [n for n in names if n.startswith(options["name"])]
+        if len(matching) != 1:
+            raise CommandError(f"Профиль {options['name']} не найден или указан неоднозначно")
+
+        path = os.path.join(directory, matching[0])
+        header, stacks = read_collapsed(path)
+        samples = sum(stacks.values()) or 1
+        self.stdout.write(f"{matching[0]}\n" + "\n".join(header) + f"\nСемплов: {sum(stacks.values())}\n")
+
+        own, total = frame_totals(stacks)
+        self.stdout.write(f"Собственное время, топ {options['top']}:")
+        for frame, count in own.most_common(options["top"]):
+            self.stdout.write(f"{count * 100 / samples:>6.1f}%  {frame}")
+        self.stdout.write(f"\nВместе с вложенными вызовами, топ {options['top']}:")
+        for frame, count in total.most_common(options["top"]):
+            self.stdout.write(f"{count * 100 / samples:>6.1f}%  {frame}")
+
+        cprofile = path[: -len(".collapsed")] + ".prof"
+        if os.path.exists(cprofile):
+            stream = io.StringIO()
+            pstats.Stats(cprofile, stream=stream).sort_stats("cumulative").print_stats(options["top"])
+            self.stdout.write(f"\ncProfile:\n{stream.getvalue()}")
+
+        if options["svg"]:
+            with open(options["svg"], "w", encoding="utf-8") as file:
+                file.write(render_flamegraph(stacks, title=" ".join(header)))
+            self.stdout.write(f"Flamegraph: {options['svg']}")
@@ -0,0 +1,42 @@
+from django.core.management import BaseCommand, CommandError
+
+from config.importtime import profile_startup
+
+
+class Command(BaseCommand):
+    """Профиль старта воркера: время импорта каждого модуля и дерево накопленного времени."""
+
+    help = "Показывает, какие модули дольше всего импортируются при старте WSGI/ASGI-воркера"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=["wsgi", "asgi"], default="wsgi", help="Точка входа воркера")
+        parser.add_argument("--environment", help="Профиль настроек (ENVIRONMENT), по умолчанию текущий")
+        parser.add_argument("--top", type=int, default=20, help="Сколько самых медленных модулей показать")
+        parser.add_argument("--depth", type=int, default=3, help="Глубина дерева импортов")
+        parser.add_argument("--min-ms", type=float, default=5.0, help="Не показывать в дереве узлы быстрее, мс")
+
+    def handle(self, *args, **options):
+        try:
+            records, roots = profile_startup(options["target"], options["environment"])
+        except RuntimeError as error:
+            raise CommandError(f"Не удалось запустить проект:\n{error}")
+
+        total = sum(record.cumulative_us for record in roots)
+        self.stdout.write(f"Модулей: {len(records)}, время импорта: {total / 1000:.1f} мс\n")
+
+        self.stdout.write(f"Самые медленные модули (собственное время), топ {options['top']}:")
+        for record in sorted(records, key=lambda record: record.self_us, reverse=True)[: options["top"]]:
+            self.stdout.write(f"{record.self_us / 1000:>9.1f} мс  {record.module}")
+
+        self.stdout.write(f"\nДерево накопленного времени (глубина {options['depth']}, от {options['min_ms']} мс):")
+        min_us = options["min_ms"] * 1000
+        for root in sorted(roots, key=lambda record: record.cumulative_us, reverse=True):
+            self.write_tree(root, 0, options["depth"], min_us)
+
+    def write_tree(self, record, level, depth, min_us):
+        if record.cumulative_us < min_us or level >= depth:
+            return
+
+        self.stdout.write(f"{record.cumulative_us / 1000:>9.1f} мс  {'  ' * level}{record.module}")
+        for child in sorted(record.children, key=lambda child: child.cumulative_us, reverse=True):
+            self.write_tree(child, level + 1, depth, min_us)
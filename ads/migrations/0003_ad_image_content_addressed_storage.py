@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+import ads.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0002_exchangeproposal_owner"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ad",
+            name="image_url",
+            field=models.ImageField(
+                blank=True,
+                db_index=True,
+                null=True,
+                storage=ads.storage.ad_image_storage,
+                upload_to="ad_images",
+                verbose_name="Изображение",
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2 on 2026-10-19 16:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# архив секционируется по месяцу created_at; первичный ключ обязан включать ключ секционирования
+CREATE_ARCHIVE_SQL = """
+CREATE TABLE ads_archivedexchangeproposal (
+    id bigint NOT NULL,
+    owner_id bigint NOT NULL,
+    ad_sender_id bigint NOT NULL,
+    ad_receiver_id bigint NOT NULL,
+    comment text NOT NULL,
+    status varchar(15) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE ads_archivedexchangeproposal_default PARTITION OF ads_archivedexchangeproposal DEFAULT;
+CREATE INDEX ads_archivedexchangeproposal_owner_idx ON ads_archivedexchangeproposal (owner_id, created_at);
+CREATE INDEX ads_archivedexchangeproposal_sender_idx ON ads_archivedexchangeproposal (ad_sender_id);
+CREATE INDEX ads_archivedexchangeproposal_receiver_idx ON ads_archivedexchangeproposal (ad_receiver_id);
+"""
+
+DROP_ARCHIVE_SQL = "DROP TABLE ads_archivedexchangeproposal;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0003_ad_image_content_addressed_storage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedExchangeProposal",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("comment", models.TextField(verbose_name="Комментарий")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Ожидает", "Ожидает"),
+                            ("Подтвержден", "Подтвержден"),
+                            ("Отклонен", "Отклонен"),
+                            ("Отменен", "Отменен"),
+                        ],
+                        max_length=15,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="Дата создания предложения")),
+                ("archived_at", models.DateTimeField(verbose_name="Дата переноса в архив")),
+            ],
+            options={
+                "verbose_name": "Архивное предложение обмена",
+                "verbose_name_plural": "Архив предложений обмена",
+                "db_table": "ads_archivedexchangeproposal",
+                "managed": False,
+            },
+        ),
+        migrations.RunSQL(CREATE_ARCHIVE_SQL, DROP_ARCHIVE_SQL),
+        migrations.AddField(
+            model_name="ad",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Дата удаления"),
+        ),
+        migrations.AlterField(
+            model_name="exchangeproposal",
+            name="ad_receiver",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="receiver_exchange_proposals",
+                to="ads.ad",
+                verbose_name="На что менять",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exchangeproposal",
+            name="ad_sender",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="sender_exchange_proposals",
+                to="ads.ad",
+                verbose_name="Что менять",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="exchangeproposal",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("Ожидает", "Ожидает"),
+                    ("Подтвержден", "Подтвержден"),
+                    ("Отклонен", "Отклонен"),
+                    ("Отменен", "Отменен"),
+                ],
+                default="Ожидает",
+                max_length=15,
+                verbose_name="Статус",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True)), fields=["-created_at"], name="ad_alive_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exchangeproposal",
+            index=models.Index(
+                condition=models.Q(("status__in", ["Подтвержден", "Отклонен", "Отменен"])),
+                fields=["created_at"],
+                name="proposal_terminal_created_idx",
+            ),
+        ),
+    ]
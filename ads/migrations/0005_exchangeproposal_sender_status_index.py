@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 16:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0004_soft_delete_and_proposal_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exchangeproposal",
+            index=models.Index(fields=["ad_sender", "status", "-created_at"], name="proposal_sender_status_idx"),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-19 16:25
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0006_ad_location"),
+        ("users", "0002_user_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdRecommendation",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                (
+                    "ad_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), size=None, verbose_name="Объявления"
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(verbose_name="Дата расчета")),
+            ],
+            options={
+                "verbose_name": "Рекомендации",
+                "verbose_name_plural": "Рекомендации",
+            },
+        ),
+    ]
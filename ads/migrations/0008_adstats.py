@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 16:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0007_adrecommendation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdStats",
+            fields=[
+                (
+                    "ad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="ads.ad",
+                        verbose_name="Объявление",
+                    ),
+                ),
+                ("views", models.PositiveBigIntegerField(default=0, verbose_name="Просмотры")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+            ],
+            options={
+                "verbose_name": "Статистика объявления",
+                "verbose_name_plural": "Статистика объявлений",
+                "indexes": [models.Index(fields=["-views"], name="adstats_views_idx")],
+            },
+        ),
+    ]
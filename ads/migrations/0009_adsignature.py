@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 16:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0008_adstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdSignature",
+            fields=[
+                (
+                    "ad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="ads.ad",
+                        verbose_name="Объявление",
+                    ),
+                ),
+                ("minhash", models.BinaryField(null=True, verbose_name="MinHash текста")),
+                ("ahash", models.BigIntegerField(null=True, verbose_name="aHash изображения")),
+                ("dhash", models.BigIntegerField(null=True, verbose_name="dHash изображения")),
+                ("computed_at", models.DateTimeField(auto_now=True, verbose_name="Дата расчета")),
+            ],
+            options={
+                "verbose_name": "Сигнатура объявления",
+                "verbose_name_plural": "Сигнатуры объявлений",
+            },
+        ),
+        migrations.CreateModel(
+            name="AdSignatureBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.BigIntegerField(verbose_name="Ключ корзины")),
+                (
+                    "ad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="ads.ad",
+                        verbose_name="Объявление",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Корзина сигнатуры",
+                "verbose_name_plural": "Корзины сигнатур",
+                "indexes": [models.Index(fields=["key", "ad"], name="adsignaturebucket_key_idx")],
+            },
+        ),
+    ]
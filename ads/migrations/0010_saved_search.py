@@ -0,0 +1,151 @@
+# Generated by Django 5.2 on 2026-10-19 16:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0009_adsignature"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavedSearch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("query", models.CharField(blank=True, max_length=250, verbose_name="Запрос")),
+                (
+                    "category",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("одежда", "Одежда"),
+                            ("обувь", "Обувь"),
+                            ("аксессуары", "Аксессуары"),
+                            ("хобби", "Хобби"),
+                            ("электроника", "Электроника"),
+                            ("для дома и дачи", "Для дома и дачи"),
+                            ("запчасти", "Запчасти"),
+                            ("товары для детей", "Товары для детей"),
+                            ("красота и здоровье", "Красота и здоровье"),
+                        ],
+                        max_length=30,
+                        verbose_name="Категория",
+                    ),
+                ),
+                (
+                    "condition",
+                    models.CharField(
+                        blank=True,
+                        choices=[("новый", "Новый"), ("б/у", "Б/у")],
+                        max_length=10,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                ("term_count", models.PositiveSmallIntegerField(default=0, verbose_name="Число лексем")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="saved_searches",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сохраненный поиск",
+                "verbose_name_plural": "Сохраненные поиски",
+            },
+        ),
+        migrations.CreateModel(
+            name="SavedSearchMatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("is_read", models.BooleanField(default=False, verbose_name="Просмотрено")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата совпадения")),
+                (
+                    "ad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="ads.ad",
+                        verbose_name="Объявление",
+                    ),
+                ),
+                (
+                    "search",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="ads.savedsearch",
+                        verbose_name="Поиск",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Совпадение сохраненного поиска",
+                "verbose_name_plural": "Совпадения сохраненных поисков",
+            },
+        ),
+        migrations.CreateModel(
+            name="SavedSearchTerm",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=250, verbose_name="Лексема")),
+                (
+                    "search",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="ads.savedsearch",
+                        verbose_name="Поиск",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Лексема сохраненного поиска",
+                "verbose_name_plural": "Лексемы сохраненных поисков",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="savedsearch",
+            index=models.Index(
+                condition=models.Q(("term_count", 0)),
+                fields=["category", "condition"],
+                name="savedsearch_no_terms_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="savedsearch",
+            constraint=models.UniqueConstraint(
+                fields=("user", "query", "category", "condition"), name="savedsearch_unique"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="savedsearchmatch",
+            index=models.Index(fields=["user", "-created_at", "-id"], name="savedsearchmatch_inbox_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="savedsearchmatch",
+            constraint=models.UniqueConstraint(fields=("user", "ad"), name="savedsearchmatch_unique"),
+        ),
+        migrations.AddIndex(
+            model_name="savedsearchterm",
+            index=models.Index(fields=["term", "search"], name="savedsearchterm_term_idx"),
+        ),
+    ]
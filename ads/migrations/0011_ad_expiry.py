@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-19 16:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+import ads.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0010_saved_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ad_alive_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ad_location_idx",
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="expired_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Дата снятия с публикации"),
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="expires_at",
+            field=models.DateTimeField(default=ads.models.ad_expires_at, verbose_name="Публикуется до"),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("expired_at__isnull", True)),
+                fields=["-created_at"],
+                name="ad_active_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(
+                    ("deleted_at__isnull", True), ("expired_at__isnull", True), ("latitude__isnull", False)
+                ),
+                fields=["latitude", "longitude"],
+                name="ad_location_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", True), ("expired_at__isnull", True)),
+                fields=["expires_at"],
+                name="ad_expiry_idx",
+            ),
+        ),
+    ]
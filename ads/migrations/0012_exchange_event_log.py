@@ -0,0 +1,108 @@
+# Generated by Django 5.2 on 2026-10-19 16:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# журнал только дополняется: UPDATE и DELETE запрещены на уровне БД (TRUNCATE остается для обслуживания)
+APPEND_ONLY_SQL = """
+CREATE FUNCTION ads_exchangeevent_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'ads_exchangeevent is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ads_exchangeevent_append_only
+BEFORE UPDATE OR DELETE ON ads_exchangeevent
+FOR EACH ROW EXECUTE FUNCTION ads_exchangeevent_append_only();
+"""
+
+DROP_APPEND_ONLY_SQL = """
+DROP TRIGGER ads_exchangeevent_append_only ON ads_exchangeevent;
+DROP FUNCTION ads_exchangeevent_append_only();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0011_ad_expiry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExchangeEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Создано"),
+                            ("accepted", "Принято"),
+                            ("refused", "Отклонено"),
+                            ("cancelled", "Отменено"),
+                        ],
+                        max_length=10,
+                        verbose_name="Событие",
+                    ),
+                ),
+                ("proposal_id", models.BigIntegerField(verbose_name="Предложение")),
+                ("owner_id", models.BigIntegerField(verbose_name="Автор предложения")),
+                ("recipient_id", models.BigIntegerField(verbose_name="Владелец объявления")),
+                ("ad_sender_id", models.BigIntegerField(verbose_name="Что менять")),
+                ("ad_receiver_id", models.BigIntegerField(verbose_name="На что менять")),
+                ("ad_sender_category", models.CharField(max_length=30, verbose_name="Категория «что менять»")),
+                ("ad_receiver_category", models.CharField(max_length=30, verbose_name="Категория «на что менять»")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата события")),
+            ],
+            options={
+                "verbose_name": "Событие обмена",
+                "verbose_name_plural": "Журнал событий обменов",
+            },
+        ),
+        migrations.CreateModel(
+            name="ExchangeUserStats",
+            fields=[
+                ("user_id", models.BigIntegerField(primary_key=True, serialize=False, verbose_name="Пользователь")),
+                ("proposals_made", models.PositiveIntegerField(default=0, verbose_name="Предложил обменов")),
+                ("proposals_received", models.PositiveIntegerField(default=0, verbose_name="Получил предложений")),
+                ("accepted", models.PositiveIntegerField(default=0, verbose_name="Состоялось обменов")),
+                ("refused", models.PositiveIntegerField(default=0, verbose_name="Отклонено его предложений")),
+                ("cancelled", models.PositiveIntegerField(default=0, verbose_name="Отменено его предложений")),
+            ],
+            options={
+                "verbose_name": "Статистика обменов пользователя",
+                "verbose_name_plural": "Статистика обменов пользователей",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProjectionCheckpoint",
+            fields=[
+                ("name", models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name="Проекция")),
+                ("last_event_id", models.BigIntegerField(default=0, verbose_name="Последнее событие")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+            ],
+            options={
+                "verbose_name": "Позиция проекции",
+                "verbose_name_plural": "Позиции проекций",
+            },
+        ),
+        migrations.CreateModel(
+            name="CategoryTradeVolume",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(verbose_name="День")),
+                ("category", models.CharField(max_length=30, verbose_name="Категория")),
+                ("proposals", models.PositiveIntegerField(default=0, verbose_name="Предложений")),
+                ("trades", models.PositiveIntegerField(default=0, verbose_name="Обменяно объявлений")),
+            ],
+            options={
+                "verbose_name": "Объем обменов по категории",
+                "verbose_name_plural": "Объем обменов по категориям",
+                "constraints": [
+                    models.UniqueConstraint(fields=("day", "category"), name="categorytradevolume_unique")
+                ],
+            },
+        ),
+        migrations.RunSQL(APPEND_ONLY_SQL, DROP_APPEND_ONLY_SQL),
+    ]
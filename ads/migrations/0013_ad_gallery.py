@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-19 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import ads.storage
+
+# существующее изображение объявления становится первой фотографией его галереи;
+# размеры неизвестны, у таких картинок width/height в разметке просто не выводятся
+BACKFILL_GALLERY_SQL = """
+INSERT INTO ads_adimage (ad_id, image, position, created_at)
+SELECT id, image_url, 0, created_at FROM ads_ad WHERE image_url IS NOT NULL AND image_url <> ''
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0012_exchange_event_log"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="image_height",
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name="Высота изображения"),
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="image_width",
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name="Ширина изображения"),
+        ),
+        migrations.CreateModel(
+            name="AdImage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "image",
+                    models.ImageField(
+                        db_index=True,
+                        storage=ads.storage.ad_image_storage,
+                        upload_to="ad_images",
+                        verbose_name="Изображение",
+                    ),
+                ),
+                ("width", models.PositiveIntegerField(blank=True, null=True, verbose_name="Ширина")),
+                ("height", models.PositiveIntegerField(blank=True, null=True, verbose_name="Высота")),
+                ("position", models.PositiveSmallIntegerField(default=0, verbose_name="Порядок")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")),
+                (
+                    "ad",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="images",
+                        to="ads.ad",
+                        verbose_name="Объявление",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Фотография объявления",
+                "verbose_name_plural": "Фотографии объявлений",
+                "ordering": ["position", "id"],
+                "indexes": [models.Index(fields=["ad", "position"], name="adimage_ad_position_idx")],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_GALLERY_SQL, migrations.RunSQL.noop),
+    ]
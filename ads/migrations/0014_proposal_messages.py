@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-19 16:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0013_ad_gallery"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exchangeproposal",
+            name="owner_unread",
+            field=models.PositiveIntegerField(default=0, verbose_name="Непрочитано автором"),
+        ),
+        migrations.AddField(
+            model_name="exchangeproposal",
+            name="recipient_unread",
+            field=models.PositiveIntegerField(default=0, verbose_name="Непрочитано владельцем объявления"),
+        ),
+        migrations.CreateModel(
+            name="ProposalMessage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("text", models.TextField(max_length=2000, verbose_name="Сообщение")),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата отправки")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name="Автор"
+                    ),
+                ),
+                (
+                    "proposal",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="messages",
+                        to="ads.exchangeproposal",
+                        verbose_name="Предложение обмена",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сообщение по обмену",
+                "verbose_name_plural": "Сообщения по обменам",
+                "indexes": [models.Index(fields=["proposal", "created_at", "id"], name="proposalmessage_thread_idx")],
+            },
+        ),
+    ]
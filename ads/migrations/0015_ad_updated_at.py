@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0014_proposal_messages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(fields=["updated_at"], name="ad_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def partition(apps, schema_editor):
+    """При AD_PARTITION_BY секционирует ads_ad, если это еще не сделала команда partition_ads.
+
+    Здесь копирование идет в транзакции миграции, что годится для новой или небольшой базы;
+    большую таблицу переводят командой partition_ads до миграции.
+    """
+
+    from ads.partitioning import partition_ads, partition_strategy
+
+    if settings.AD_PARTITION_BY and partition_strategy() is None:
+        partition_ads(settings.AD_PARTITION_BY)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0015_ad_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+# bigint[] в jsonb Postgres сам не приводит, поэтому тип меняется SQL с явным преобразованием
+TO_JSON_SQL = "ALTER TABLE ads_adrecommendation ALTER COLUMN ad_ids TYPE jsonb USING to_jsonb(ad_ids)"
+TO_ARRAY_SQL = """
+ALTER TABLE ads_adrecommendation ALTER COLUMN ad_ids TYPE bigint[]
+USING ('{' || trim(BOTH '[]' FROM ad_ids::text) || '}')::bigint[]
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ads", "0016_ad_partitioning"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(TO_JSON_SQL, TO_ARRAY_SQL)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="adrecommendation",
+                    name="ad_ids",
+                    field=models.JSONField(default=list, verbose_name="Объявления"),
+                ),
+            ],
+        ),
+    ]
@@ -1,4 +1,11 @@
+import math
+
+from django.conf import settings
 from django.forms import BooleanField
+from django.http import HttpResponse
+
+from config.metrics import metrics
+from config.ratelimit import get_rate_limiter
 
 
 class StyleFormMixin:
@@ -11,3 +18,30 @@ class StyleFormMixin:
                 fild.widget.attrs["class"] = "form-check-input"
             else:
                 fild.widget.attrs["class"] = "form-control"
+
+
+class RateLimitMixin:
+    """Ограничение частоты запросов к представлению для пользователя (или IP для анонимов).
+
+    Лимит берется из настройки с именем rate_limit_setting в формате "30/m";
+    пустое значение отключает ограничение.
+    """
+
+    rate_limit_setting = None
+
+    def dispatch(self, request, *args, **kwargs):
+        rate = getattr(settings, self.rate_limit_setting, None)
+        if rate:
+            limiter = get_rate_limiter(rate)
+            if request.user.is_authenticated:
+                client = f"user:{request.user.pk}"
+            else:
+                client = f"ip:{request.META.get('REMOTE_ADDR')}"
+
+            if not limiter.consume(f"{self.__class__.__name__}:{client}"):
+                metrics.increment(f"ratelimit.{self.__class__.__name__}.rejected")
+                response = HttpResponse("Слишком много запросов, попробуйте позже.", status=429)
+                response["Retry-After"] = str(math.ceil(limiter.retry_after()))
+                return response
+
+        return super().dispatch(request, *args, **kwargs)
@@ -1,8 +1,37 @@
-from django.db import models
+from datetime import timedelta
 
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from ads.notifications import proposal_event, publish
+from ads.storage import ad_image_storage
 from users.models import User
 
 
+class AdManager(models.Manager):
+    """Менеджер объявлений, скрывающий мягко удаленные и (кроме include_expired) истекшие объявления."""
+
+    def __init__(self, include_expired=False):
+        super().__init__()
+        self.include_expired = include_expired
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(deleted_at__isnull=True)
+        if not self.include_expired:
+            queryset = queryset.filter(expired_at__isnull=True)
+
+        return queryset
+
+
+def ad_expires_at():
+    """Срок публикации нового или продленного объявления."""
+
+    return timezone.now() + timedelta(days=settings.AD_LIFETIME_DAYS)
+
+
 class Ad(models.Model):
     """Модель объявления."""
 
@@ -27,33 +56,497 @@ class Ad(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Создатель объявления")
     title = models.CharField(max_length=250, verbose_name="Заголовок объявления")
     description = models.TextField(verbose_name="Описание товара")
-    image_url = models.ImageField(upload_to="ad_images", verbose_name="Изображение", blank=True, null=True)
+    image_url = models.ImageField(
+        upload_to="ad_images",
+        storage=ad_image_storage,
+        verbose_name="Изображение",
+        blank=True,
+        null=True,
+        db_index=True,
+    )
     category = models.CharField(max_length=30, verbose_name="Категория товара", choices=CATEGORY_CHOICES)
     condition = models.CharField(max_length=10, verbose_name="Состояние товара", choices=CONDITION_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания объявления")
+    # меняется при любом сохранении; по нему карта сайта находит измененные диапазоны id
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+    deleted_at = models.DateTimeField(verbose_name="Дата удаления", blank=True, null=True)
+    # expires_at — до какого момента объявление публикуется, expired_at — когда его снял expire_ads
+    expires_at = models.DateTimeField(default=ad_expires_at, verbose_name="Публикуется до")
+    expired_at = models.DateTimeField(verbose_name="Дата снятия с публикации", blank=True, null=True)
+    # размеры обложки, чтобы списки задавали width/height картинки без обращения к галерее
+    image_width = models.PositiveIntegerField(verbose_name="Ширина изображения", blank=True, null=True)
+    image_height = models.PositiveIntegerField(verbose_name="Высота изображения", blank=True, null=True)
+    latitude = models.FloatField(
+        verbose_name="Широта", blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        verbose_name="Долгота", blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+
+    # objects видит только опубликованные объявления, with_expired — еще и истекшие (для владельца),
+    # all_objects — все, включая удаленные
+    objects = AdManager()
+    with_expired = AdManager(include_expired=True)
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = "Объявление"
         verbose_name_plural = "Объявления"
+        indexes = [
+            # частичные индексы только по опубликованным объявлениям: их размер не растет с архивом истекших
+            models.Index(
+                fields=["-created_at"],
+                condition=Q(deleted_at__isnull=True, expired_at__isnull=True),
+                name="ad_active_created_idx",
+            ),
+            # отбор по описанному квадрату при поиске рядом (ads.geo.nearby)
+            models.Index(
+                fields=["latitude", "longitude"],
+                condition=Q(deleted_at__isnull=True, expired_at__isnull=True, latitude__isnull=False),
+                name="ad_location_idx",
+            ),
+            # очередь снятия с публикации для expire_ads
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(deleted_at__isnull=True, expired_at__isnull=True),
+                name="ad_expiry_idx",
+            ),
+            # измененные с прошлого прохода объявления для build_sitemaps
+            models.Index(fields=["updated_at"], name="ad_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # файл изображения сохраняется под lock_content, блокировка должна дожить до коммита строки
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @property
+    def is_expired(self):
+        return self.expired_at is not None
+
+    def renew(self):
+        """Продлевает публикацию на AD_LIFETIME_DAYS от текущего момента и возвращает истекшее объявление в списки."""
+
+        self.expires_at = ad_expires_at()
+        self.expired_at = None
+        self.save(update_fields=["expires_at", "expired_at", "updated_at"])
+
+    def soft_delete(self):
+        """Мягкое удаление: объявление скрывается из всех списков, а история обменов по нему сохраняется.
+
+        Ожидающие предложения обмена с этим объявлением отменяются (с записью в журнал обменов),
+        изображение освобождается.
+        """
+
+        # exchange_log сам импортирует модели
+        from ads.exchange_log import EVENT_FIELDS, log_events
+
+        with transaction.atomic():
+            self.deleted_at = timezone.now()
+            self.image_url = self.image_width = self.image_height = None
+            self.save(update_fields=["deleted_at", "image_url", "image_width", "image_height", "updated_at"])
+            # файлы галереи освобождают сигналы удаления фотографий
+            self.images.all().delete()
+            pending = ExchangeProposal.objects.filter(
+                Q(ad_sender=self) | Q(ad_receiver=self), status=ExchangeProposal.STATUS_PENDING
+            )
+            # уведомляется вторая сторона каждого обмена
+            rows = list(pending.values_list(*EVENT_FIELDS))
+            pending.update(status=ExchangeProposal.STATUS_CANCELLED)
+            log_events("cancelled", rows)
+            publish(
+                proposal_event("cancelled", proposal_id, user_id, ExchangeProposal.STATUS_CANCELLED)
+                for proposal_id, owner_id, recipient_id, *_ in rows
+                for user_id in {owner_id, recipient_id} - {self.user_id}
+            )
+
+    def add_images(self, files):
+        """Добавляет загруженные фотографии в конец галереи. Если обложки не было, ею становится первая."""
+
+        last = self.images.aggregate(last=Max("position"))["last"]
+        start = 0 if last is None else last + 1
+        with transaction.atomic():
+            for position, file in enumerate(files, start):
+                width, height = uploaded_image_size(file)
+                AdImage.objects.create(ad=self, image=file, width=width, height=height, position=position)
+            if not self.image_url:
+                self.update_cover()
+
+    def set_cover(self, image):
+        """Делает фотографию обложкой: она переносится в начало галереи, остальные сохраняют порядок."""
+
+        images = [image] + [other for other in self.images.all() if other.pk != image.pk]
+        for position, item in enumerate(images):
+            item.position = position
+        with transaction.atomic():
+            AdImage.objects.bulk_update(images, ["position"])
+            self.update_cover()
+
+    def update_cover(self):
+        """Копирует первую фотографию галереи в image_url и размеры обложки (денормализация для списков)."""
+
+        cover = self.images.order_by("position", "id").first()
+        if cover:
+            self.image_url, self.image_width, self.image_height = cover.image.name, cover.width, cover.height
+        else:
+            self.image_url = self.image_width = self.image_height = None
+        self.save(update_fields=["image_url", "image_width", "image_height", "updated_at"])
+
+
+def uploaded_image_size(file):
+    """Размеры загруженного изображения (forms.ImageField оставляет в файле открытое им изображение)."""
+
+    image = getattr(file, "image", None)
+    return image.size if image else (None, None)
+
+
+class AdImage(models.Model):
+    """Фотография из галереи объявления.
+
+    Первая по position фотография — обложка; она копируется в Ad.image_url, поэтому списки
+    объявлений читают только таблицу объявлений, а галерею загружает лишь страница объявления.
+    """
+
+    ad = models.ForeignKey(
+        Ad, on_delete=models.CASCADE, related_name="images", verbose_name="Объявление", db_index=False
+    )
+    image = models.ImageField(
+        upload_to="ad_images", storage=ad_image_storage, verbose_name="Изображение", db_index=True
+    )
+    width = models.PositiveIntegerField(verbose_name="Ширина", blank=True, null=True)
+    height = models.PositiveIntegerField(verbose_name="Высота", blank=True, null=True)
+    position = models.PositiveSmallIntegerField(default=0, verbose_name="Порядок")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")
+
+    class Meta:
+        verbose_name = "Фотография объявления"
+        verbose_name_plural = "Фотографии объявлений"
+        ordering = ["position", "id"]
+        indexes = [
+            # галерея объявления по порядку; заменяет обычный индекс по ad_id
+            models.Index(fields=["ad", "position"], name="adimage_ad_position_idx"),
+        ]
+
+    def __str__(self):
+        return self.image.name
+
+    def save(self, *args, **kwargs):
+        # файл изображения сохраняется под lock_content, блокировка должна дожить до коммита строки
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class ExchangeProposal(models.Model):
     """Модель для предложений обмена."""
 
+    STATUS_PENDING = "Ожидает"
+    STATUS_ACCEPTED = "Подтвержден"
+    STATUS_REFUSED = "Отклонен"
+    STATUS_CANCELLED = "Отменен"
+    # выбор статуса
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Ожидает"),
+        (STATUS_ACCEPTED, "Подтвержден"),
+        (STATUS_REFUSED, "Отклонен"),
+        (STATUS_CANCELLED, "Отменен"),
+    )
+    # конечные статусы: такие предложения больше не меняются и со временем уходят в архив
+    TERMINAL_STATUSES = (STATUS_ACCEPTED, STATUS_REFUSED, STATUS_CANCELLED)
+
     owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, verbose_name="Создатель предложения обмена")
     ad_sender = models.ForeignKey(
-        Ad, on_delete=models.DO_NOTHING, verbose_name="Что менять", related_name="sender_exchange_proposals"
+        Ad, on_delete=models.PROTECT, verbose_name="Что менять", related_name="sender_exchange_proposals"
     )
     ad_receiver = models.ForeignKey(
-        Ad, on_delete=models.DO_NOTHING, verbose_name="На что менять", related_name="receiver_exchange_proposals"
+        Ad, on_delete=models.PROTECT, verbose_name="На что менять", related_name="receiver_exchange_proposals"
     )
     comment = models.TextField(verbose_name="Комментарий")
-    status = models.CharField(max_length=15, verbose_name="Статус", default="Ожидает")
+    status = models.CharField(max_length=15, verbose_name="Статус", choices=STATUS_CHOICES, default=STATUS_PENDING)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания объявления")
+    # непрочитанные сообщения переписки у автора предложения и у владельца объявления,
+    # чтобы списки обменов показывали их без подсчета по таблице сообщений
+    owner_unread = models.PositiveIntegerField(default=0, verbose_name="Непрочитано автором")
+    recipient_unread = models.PositiveIntegerField(default=0, verbose_name="Непрочитано владельцем объявления")
 
     class Meta:
         verbose_name = "Предложение обмена"
         verbose_name_plural = "Предложения обмена"
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(status__in=["Подтвержден", "Отклонен", "Отменен"]),
+                name="proposal_terminal_created_idx",
+            ),
+            models.Index(fields=["ad_sender", "status", "-created_at"], name="proposal_sender_status_idx"),
+        ]
+
+
+class ProposalMessage(models.Model):
+    """Сообщение в переписке по предложению обмена.
+
+    Переписка читается по ключу (proposal, created_at, id) без OFFSET. Внешний ключ без
+    ограничения в БД: archive_proposals удаляет предложения из рабочей таблицы SQL-запросом,
+    а сообщения остаются при том же id уже архивного предложения.
+    """
+
+    proposal = models.ForeignKey(
+        ExchangeProposal,
+        on_delete=models.CASCADE,
+        related_name="messages",
+        verbose_name="Предложение обмена",
+        db_constraint=False,
+        db_index=False,
+    )
+    author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
+    text = models.TextField(max_length=2000, verbose_name="Сообщение")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Дата отправки")
+
+    class Meta:
+        verbose_name = "Сообщение по обмену"
+        verbose_name_plural = "Сообщения по обменам"
+        indexes = [
+            models.Index(fields=["proposal", "created_at", "id"], name="proposalmessage_thread_idx"),
+        ]
+
+    def __str__(self):
+        return self.text[:50]
+
+
+class ArchivedExchangeProposal(models.Model):
+    """Архив предложений обмена в конечных статусах.
+
+    Таблица секционирована по месяцу created_at (PARTITION BY RANGE) и создается миграцией
+    вручную, поэтому managed = False. Строки переносит команда archive_proposals.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", verbose_name="Создатель"
+    )
+    ad_sender = models.ForeignKey(
+        Ad, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", verbose_name="Что менять"
+    )
+    ad_receiver = models.ForeignKey(
+        Ad, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", verbose_name="На что менять"
+    )
+    comment = models.TextField(verbose_name="Комментарий")
+    status = models.CharField(max_length=15, verbose_name="Статус", choices=ExchangeProposal.STATUS_CHOICES)
+    created_at = models.DateTimeField(verbose_name="Дата создания предложения")
+    archived_at = models.DateTimeField(verbose_name="Дата переноса в архив")
+
+    class Meta:
+        managed = False
+        db_table = "ads_archivedexchangeproposal"
+        verbose_name = "Архивное предложение обмена"
+        verbose_name_plural = "Архив предложений обмена"
+
+
+class AdRecommendation(models.Model):
+    """Рекомендованные пользователю объявления: id лучших по оценке, лучшие первыми.
+
+    Одна строка на пользователя, заполняется командой compute_recommendations.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="+", verbose_name="Пользователь"
+    )
+    # JSON, а не ArrayField: поле из django.contrib.postgres загрузило бы при старте и его поиск
+    ad_ids = models.JSONField(default=list, verbose_name="Объявления")
+    computed_at = models.DateTimeField(verbose_name="Дата расчета")
+
+    class Meta:
+        verbose_name = "Рекомендации"
+        verbose_name_plural = "Рекомендации"
+
+
+class AdStats(models.Model):
+    """Статистика объявления. Отдельная таблица, чтобы частые обновления счетчиков не трогали ads_ad.
+
+    Просмотры пишутся пачками из буфера ads.counters.ad_views.
+    """
+
+    ad = models.OneToOneField(
+        Ad, on_delete=models.CASCADE, primary_key=True, related_name="stats", verbose_name="Объявление"
+    )
+    views = models.PositiveBigIntegerField(default=0, verbose_name="Просмотры")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Статистика объявления"
+        verbose_name_plural = "Статистика объявлений"
+        indexes = [models.Index(fields=["-views"], name="adstats_views_idx")]
+
+
+class AdSignature(models.Model):
+    """Сигнатуры объявления для поиска почти-дубликатов (ads.dedup).
+
+    minhash — MinHash текста (заголовок и описание), ahash и dhash — перцептивные хеши изображения.
+    """
+
+    ad = models.OneToOneField(
+        Ad, on_delete=models.CASCADE, primary_key=True, related_name="signature", verbose_name="Объявление"
+    )
+    minhash = models.BinaryField(null=True, verbose_name="MinHash текста")
+    ahash = models.BigIntegerField(null=True, verbose_name="aHash изображения")
+    dhash = models.BigIntegerField(null=True, verbose_name="dHash изображения")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Дата расчета")
+
+    class Meta:
+        verbose_name = "Сигнатура объявления"
+        verbose_name_plural = "Сигнатуры объявлений"
+
+
+class AdSignatureBucket(models.Model):
+    """LSH-корзина: объявления с одинаковым ключом полосы сигнатуры — кандидаты в дубликаты."""
+
+    ad = models.ForeignKey(Ad, on_delete=models.CASCADE, related_name="+", verbose_name="Объявление")
+    key = models.BigIntegerField(verbose_name="Ключ корзины")
+
+    class Meta:
+        verbose_name = "Корзина сигнатуры"
+        verbose_name_plural = "Корзины сигнатур"
+        indexes = [models.Index(fields=["key", "ad"], name="adsignaturebucket_key_idx")]
+
+
+class SavedSearch(models.Model):
+    """Сохраненный поиск пользователя: те же параметры, что у страницы поиска.
+
+    Новые объявления проверяются по сохраненным поискам при создании (ads.search.percolate_ad),
+    совпадения складываются во входящие пользователя (SavedSearchMatch).
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="saved_searches", verbose_name="Пользователь"
+    )
+    query = models.CharField(max_length=250, blank=True, verbose_name="Запрос")
+    category = models.CharField(max_length=30, blank=True, choices=Ad.CATEGORY_CHOICES, verbose_name="Категория")
+    condition = models.CharField(max_length=10, blank=True, choices=Ad.CONDITION_CHOICES, verbose_name="Состояние")
+    # число различных лексем запроса: поиск совпал, если в объявлении нашлись все
+    term_count = models.PositiveSmallIntegerField(default=0, verbose_name="Число лексем")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Сохраненный поиск"
+        verbose_name_plural = "Сохраненные поиски"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "query", "category", "condition"], name="savedsearch_unique")
+        ]
+        # поиски без лексем проверяются по категории и состоянию
+        indexes = [
+            models.Index(fields=["category", "condition"], condition=Q(term_count=0), name="savedsearch_no_terms_idx")
+        ]
+
+    def __str__(self):
+        return self.query or "Все объявления"
+
+
+class SavedSearchTerm(models.Model):
+    """Обратный индекс сохраненных поисков: лексема запроса → поиск."""
+
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="terms", verbose_name="Поиск")
+    term = models.CharField(max_length=250, verbose_name="Лексема")
+
+    class Meta:
+        verbose_name = "Лексема сохраненного поиска"
+        verbose_name_plural = "Лексемы сохраненных поисков"
+        indexes = [models.Index(fields=["term", "search"], name="savedsearchterm_term_idx")]
+
+
+class SavedSearchMatch(models.Model):
+    """Входящие: объявление, подошедшее под сохраненный поиск пользователя."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", verbose_name="Пользователь")
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="matches", verbose_name="Поиск")
+    ad = models.ForeignKey(Ad, on_delete=models.CASCADE, related_name="+", verbose_name="Объявление")
+    is_read = models.BooleanField(default=False, verbose_name="Просмотрено")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата совпадения")
+
+    class Meta:
+        verbose_name = "Совпадение сохраненного поиска"
+        verbose_name_plural = "Совпадения сохраненных поисков"
+        constraints = [models.UniqueConstraint(fields=["user", "ad"], name="savedsearchmatch_unique")]
+        indexes = [models.Index(fields=["user", "-created_at", "-id"], name="savedsearchmatch_inbox_idx")]
+
+
+class ExchangeEvent(models.Model):
+    """Журнал событий по предложениям обмена: строки только добавляются (изменение и удаление
+    запрещены триггером в БД).
+
+    Пишется в той же транзакции, что и переход статуса (ads.exchange_log). Связей с предложением
+    и объявлениями нет, нужные для отчетов поля скопированы: предложения уходят в архив
+    и удаляются, а журнал остается полным. Отчеты строятся по журналу командой replay_exchange_events.
+    """
+
+    KIND_CREATED = "created"
+    KIND_ACCEPTED = "accepted"
+    KIND_REFUSED = "refused"
+    KIND_CANCELLED = "cancelled"
+    KIND_CHOICES = (
+        (KIND_CREATED, "Создано"),
+        (KIND_ACCEPTED, "Принято"),
+        (KIND_REFUSED, "Отклонено"),
+        (KIND_CANCELLED, "Отменено"),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Событие")
+    proposal_id = models.BigIntegerField(verbose_name="Предложение")
+    # автор предложения и владелец объявления, которое он хочет получить
+    owner_id = models.BigIntegerField(verbose_name="Автор предложения")
+    recipient_id = models.BigIntegerField(verbose_name="Владелец объявления")
+    ad_sender_id = models.BigIntegerField(verbose_name="Что менять")
+    ad_receiver_id = models.BigIntegerField(verbose_name="На что менять")
+    ad_sender_category = models.CharField(max_length=30, verbose_name="Категория «что менять»")
+    ad_receiver_category = models.CharField(max_length=30, verbose_name="Категория «на что менять»")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Дата события")
+
+    class Meta:
+        verbose_name = "Событие обмена"
+        verbose_name_plural = "Журнал событий обменов"
+
+
+class ExchangeUserStats(models.Model):
+    """Проекция журнала: статистика обменов пользователя."""
+
+    user_id = models.BigIntegerField(primary_key=True, verbose_name="Пользователь")
+    proposals_made = models.PositiveIntegerField(default=0, verbose_name="Предложил обменов")
+    proposals_received = models.PositiveIntegerField(default=0, verbose_name="Получил предложений")
+    accepted = models.PositiveIntegerField(default=0, verbose_name="Состоялось обменов")
+    refused = models.PositiveIntegerField(default=0, verbose_name="Отклонено его предложений")
+    cancelled = models.PositiveIntegerField(default=0, verbose_name="Отменено его предложений")
+
+    class Meta:
+        verbose_name = "Статистика обменов пользователя"
+        verbose_name_plural = "Статистика обменов пользователей"
+
+
+class CategoryTradeVolume(models.Model):
+    """Проекция журнала: предложения и состоявшиеся обмены по категориям за день.
+
+    proposals считается по категории объявления, которое хотят получить, trades — по категориям
+    обоих объявлений состоявшегося обмена.
+    """
+
+    day = models.DateField(verbose_name="День")
+    category = models.CharField(max_length=30, verbose_name="Категория")
+    proposals = models.PositiveIntegerField(default=0, verbose_name="Предложений")
+    trades = models.PositiveIntegerField(default=0, verbose_name="Обменяно объявлений")
+
+    class Meta:
+        verbose_name = "Объем обменов по категории"
+        verbose_name_plural = "Объем обменов по категориям"
+        constraints = [models.UniqueConstraint(fields=["day", "category"], name="categorytradevolume_unique")]
+
+
+class ProjectionCheckpoint(models.Model):
+    """До какого события журнала (id) применены проекции."""
+
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Проекция")
+    last_event_id = models.BigIntegerField(default=0, verbose_name="Последнее событие")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Позиция проекции"
+        verbose_name_plural = "Позиции проекций"
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "exchange_events"
+
+
+class ExchangeEventHub:
+    """Pub/sub в памяти процесса: у каждого подключенного клиента своя asyncio-очередь.
+
+    publish_local можно вызывать из любого потока: событие передается в цикл событий
+    подписчика через call_soon_threadsafe. Медленный клиент с переполненной очередью
+    теряет события, а не тормозит остальных.
+    """
+
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        """Подписывает текущий цикл событий на события пользователя user_id."""
+
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        """Отменяет подписку."""
+
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscribers.pop(user_id, None)
+
+    def publish_local(self, event):
+        """Доставляет событие подписчикам получателя в этом процессе."""
+
+        with self._lock:
+            subscriptions = list(self._subscribers.get(event["user"], ()))
+        for loop, queue in subscriptions:
+            loop.call_soon_threadsafe(_put_nowait, queue, event)
+
+
+def _put_nowait(queue, event):
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+hub = ExchangeEventHub()
+
+
+def proposal_event(kind, proposal_id, user_id, status):
+    """Событие по предложению обмена для пользователя user_id."""
+
+    return {"event": kind, "proposal": proposal_id, "status": status, "user": user_id}
+
+
+def publish(events):
+    """Публикует события после коммита текущей транзакции.
+
+    При EXCHANGE_EVENTS_BACKEND = "postgres" события рассылаются через NOTIFY и доходят
+    до всех процессов, в которых запущен listen_forever; иначе — только в текущий процесс.
+    """
+
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: _deliver(events))
+
+
+def _deliver(events):
+    if settings.EXCHANGE_EVENTS_BACKEND == "postgres":
+        with connection.cursor() as cursor:
+            for event in events:
+                cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, json.dumps(event)])
+    else:
+        for event in events:
+            hub.publish_local(event)
+
+
+def listen_forever():
+    """Слушает канал Postgres LISTEN/NOTIFY и передает события в локальный hub (в отдельном потоке)."""
+
+    import psycopg2
+
+    while True:
+        try:
+            listener = psycopg2.connect(**connection.get_connection_params())
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while True:
+                if select.select([listener], [], [], 30) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    hub.publish_local(json.loads(listener.notifies.pop(0).payload))
+        except Exception:
+            logger.exception("Соединение LISTEN %s потеряно, переподключение", CHANNEL)
+            time.sleep(5)
+
+
+def start_listener():
+    """Запускает поток listen_forever, если выбран бэкенд postgres."""
+
+    if settings.EXCHANGE_EVENTS_BACKEND == "postgres":
+        threading.Thread(target=listen_forever, name="exchange-events-listener", daemon=True).start()
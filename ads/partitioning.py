@@ -0,0 +1,297 @@
+import hashlib
+import json
+import re
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLE = "ads_ad"
+SHADOW = "ads_ad_partitioned"
+DEFAULT_PARTITION = "ads_ad_default"
+# способ секционирования -> ключ (он же входит в первичный ключ) и вид секционирования
+STRATEGIES = {
+    "category": ("category", "LIST"),
+    "month": ("created_at", "RANGE"),
+}
+# запас по времени: объявление, сохраненное до начала копирования, могло закоммититься уже после него
+OVERLAP = timedelta(minutes=5)
+
+COPY_BATCH_SQL = f"""
+WITH copied AS (
+    INSERT INTO {SHADOW} SELECT * FROM {TABLE} WHERE id > %s ORDER BY id LIMIT %s RETURNING id
+)
+SELECT count(*), max(id) FROM copied
+"""
+# догоняющее копирование под блокировкой: измененные с начала копирования, новые и удаленные строки
+CATCH_UP_SQL = f"""
+DELETE FROM {SHADOW} WHERE id IN (SELECT id FROM {TABLE} WHERE updated_at >= %(since)s);
+INSERT INTO {SHADOW} SELECT * FROM {TABLE} WHERE updated_at >= %(since)s OR id > %(last_id)s;
+DELETE FROM {SHADOW} shadow WHERE NOT EXISTS (SELECT 1 FROM {TABLE} ad WHERE ad.id = shadow.id);
+"""
+
+
+def partition_strategy():
+    """Текущее секционирование ads_ad: "category", "month" или None для обычной таблицы."""
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", [TABLE])
+        definition = cursor.fetchone()[0]
+    for strategy, (column, kind) in STRATEGIES.items():
+        if definition == f"{kind} ({column})":
+            return strategy
+
+    return None
+
+
+def partitions():
+    """Имена секций ads_ad."""
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass ORDER BY 1", [TABLE]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _month_start(moment):
+    return moment.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def category_partition(value):
+    """Имя секции категории: по хешу значения, а не по месту в Ad.CATEGORY_CHOICES,
+    чтобы новая категория в середине списка или перестановка не меняли имена существующих секций."""
+
+    return f"{TABLE}_category_{hashlib.md5(value.encode()).hexdigest()[:8]}"
+
+
+def partition_specs(strategy, since=None, months_ahead=3):
+    """Секции для способа strategy: (имя, границы FOR VALUES, условие строк секции).
+
+    По категории — секция на каждую категорию из Ad.CATEGORY_CHOICES; по месяцу — секции
+    с месяца since до months_ahead месяцев вперед. Остальные строки попадают в секцию по умолчанию.
+    """
+
+    if strategy == "category":
+        from ads.models import Ad
+
+        return [
+            (category_partition(value), f"IN ({_quote(value)})", f"category = {_quote(value)}")
+            for value, _ in Ad.CATEGORY_CHOICES
+        ]
+
+    now = timezone.now()
+    month = _month_start(min(since or now, now))
+    last = _month_start(now)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    specs = []
+    while month <= last:
+        start, end = _quote(f"{month:%Y-%m-%d} 00:00:00+00"), _quote(f"{_next_month(month):%Y-%m-%d} 00:00:00+00")
+        specs.append(
+            (
+                f"{TABLE}_y{month:%Y}m{month:%m}",
+                f"FROM ({start}) TO ({end})",
+                f"created_at >= {start} AND created_at < {end}",
+            )
+        )
+        month = _next_month(month)
+
+    return specs
+
+
+def add_partition(parent, name, bound, condition):
+    """Создает секцию name, если ее нет. Подходящие строки из секции по умолчанию переносятся в нее.
+
+    Секцию нельзя создать, пока такие строки лежат в секции по умолчанию, поэтому она
+    на время переноса отсоединяется (все в одной транзакции). Возвращает True, если секция создана.
+    """
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0]:
+            return False
+
+        cursor.execute(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {condition} LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bound}")
+            return True
+
+        cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {DEFAULT_PARTITION}")
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bound}")
+        cursor.execute(f"INSERT INTO {parent} SELECT * FROM {DEFAULT_PARTITION} WHERE {condition}")
+        cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE {condition}")
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+    return True
+
+
+def ensure_partitions(months_ahead=3):
+    """Досоздает недостающие секции уже секционированной ads_ad: месяцы вперед или новые категории.
+
+    Запускается периодически (как expire_ads) при секционировании по месяцу. Возвращает число созданных секций.
+    """
+
+    strategy = partition_strategy()
+    since = None
+    if strategy == "month":
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT min(created_at) FROM {DEFAULT_PARTITION}")
+            since = cursor.fetchone()[0]
+
+    return sum(add_partition(TABLE, *spec) for spec in partition_specs(strategy, since, months_ahead))
+
+
+def partition_ads(strategy, batch_size=10000, months_ahead=3, keep_old=False, log=None):
+    """Переводит ads_ad в секционированную таблицу (PARTITION BY LIST по категории или RANGE по месяцу).
+
+    Строки копируются пачками по id в теневую таблицу без блокировки ads_ad; затем под
+    ACCESS EXCLUSIVE дописываются строки, измененные (updated_at) или добавленные за время
+    копирования, и таблицы меняются местами. Поэтому массовые QuerySet.update() объявлений
+    должны сами ставить updated_at (auto_now при update() не срабатывает). Ограничения Postgres:
+    - первичный ключ секционированной таблицы включает ключ секционирования: (id, category)
+      или (id, created_at), уникальность одного id обеспечивает общая последовательность;
+    - внешние ключи на ads_ad из других таблиц невозможны и удаляются, каскадное удаление
+      по-прежнему выполняет Django; миграции, заново создающие такой ключ, упадут.
+    Старая таблица удаляется, с keep_old остается как ads_ad_old. Возвращает число скопированных строк.
+    """
+
+    column, kind = STRATEGIES[strategy]
+    log = log or (lambda message: None)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT now(), min(created_at) FROM {TABLE}")
+        started_at, since = cursor.fetchone()
+        cursor.execute(f"DROP TABLE IF EXISTS {SHADOW}")
+        cursor.execute(
+            f"CREATE TABLE {SHADOW} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY {kind} ({column})"
+        )
+        cursor.execute(f"ALTER TABLE {SHADOW} ADD CONSTRAINT {SHADOW}_pkey PRIMARY KEY (id, {column})")
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {SHADOW} DEFAULT")
+    for spec in partition_specs(strategy, since, months_ahead):
+        add_partition(SHADOW, *spec)
+
+    copied = last_id = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(COPY_BATCH_SQL, [last_id, batch_size])
+            count, max_id = cursor.fetchone()
+        if not count:
+            break
+        copied, last_id = copied + count, max_id
+        log(f"Скопировано: {copied}")
+
+    with connection.cursor() as cursor:
+        # индексы строятся после копирования и получают прежние имена при замене таблиц
+        cursor.execute(
+            "SELECT indexrelid::regclass::text, indisunique, pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = %s::regclass AND NOT indisprimary",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        for name, unique, definition in indexes:
+            if unique:
+                raise ValueError(f"Уникальный индекс {name} без ключа секционирования невозможен")
+            cursor.execute(re.sub(r" INDEX \S+ ON \S+ ", f" INDEX {name}_p ON {SHADOW} ", definition, count=1))
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        outgoing = cursor.fetchall()
+        for name, definition in outgoing:
+            cursor.execute(f"ALTER TABLE {SHADOW} ADD CONSTRAINT {name} {definition}")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # отложенные проверки внешних ключей этой транзакции мешают ALTER TABLE
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(CATCH_UP_SQL, {"since": started_at - OVERLAP, "last_id": last_id})
+
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        for table, name in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT last_value FROM {sequence}")
+        last_value = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER id DROP IDENTITY IF EXISTS")
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old")
+        cursor.execute(f"ALTER TABLE {TABLE}_old RENAME CONSTRAINT {TABLE}_pkey TO {TABLE}_old_pkey")
+        for name, definition in outgoing:
+            cursor.execute(f"ALTER TABLE {TABLE}_old DROP CONSTRAINT {name}")
+        for name, _, _ in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {name}_old")
+            cursor.execute(f"ALTER INDEX {name}_p RENAME TO {name}")
+        cursor.execute(f"ALTER TABLE {SHADOW} RENAME TO {TABLE}")
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {SHADOW}_pkey TO {TABLE}_pkey")
+
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s)", [last_value])
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER id SET DEFAULT nextval('{TABLE}_id_seq')")
+        if not keep_old:
+            cursor.execute(f"DROP TABLE {TABLE}_old")
+
+    return copied
+
+
+def scanned_partitions(queryset):
+    """Секции ads_ad, которые читает план запроса: проверка отсечения секций (partition pruning)."""
+
+    plan = json.loads(queryset.explain(format="json"))
+    names = set(partitions())
+    scanned = set()
+
+    def walk(node):
+        if node.get("Relation Name") in names:
+            scanned.add(node["Relation Name"])
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+
+    return sorted(scanned)
+
+
+def pruning_report(category=None):
+    """Сколько секций читают запросы представлений ads/views.py: [(описание, прочитанные секции)]."""
+
+    from ads.models import Ad
+    from ads.search import filter_ads, sort_ads
+
+    category = category or Ad.CATEGORY_CHOICES[0][0]
+    month_ago = timezone.now() - timedelta(days=30)
+    queries = [
+        # AdSearchListView: search_ad_ids с фильтром по категории
+        (
+            f"Поиск по категории «{category}»",
+            sort_ads(filter_ads(Ad.objects.all(), category=category), "new").values_list("id", flat=True)[
+                : settings.SEARCH_MAX_RESULTS
+            ],
+        ),
+        # AdListView и RecommendedAdListView: новые объявления
+        ("Новые объявления", Ad.objects.order_by("-created_at", "-id").values_list("id", flat=True)[:20]),
+        ("Объявления за 30 дней", Ad.objects.filter(created_at__gte=month_ago).values_list("id", flat=True)),
+        # AdDetailView и AdIdList: чтение по id
+        ("Объявление по id", Ad.with_expired.filter(pk=1)),
+    ]
+
+    return [(label, scanned_partitions(queryset)) for label, queryset in queries]
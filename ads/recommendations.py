@@ -0,0 +1,97 @@
+import numpy as np
+from django.db.models import Count
+
+from ads.models import Ad, ExchangeProposal
+
+CATEGORIES = [value for value, _ in Ad.CATEGORY_CHOICES]
+# вклад в интерес к категории: свои объявления и объявления, на которые пользователь предлагал обмен
+OWN_AD_WEIGHT = 1.0
+PROPOSAL_WEIGHT = 3.0
+# вес новизны объявления относительно интереса к категории
+FRESHNESS_WEIGHT = 0.1
+
+
+def affinity_matrix(rows):
+    """Матрица интересов пользователей к категориям из строк (user_id, категория, вес).
+
+    Возвращает отсортированные id пользователей и матрицу float32 (пользователи × категории),
+    нормированную по строкам.
+    """
+
+    index = {category: position for position, category in enumerate(CATEGORIES)}
+    rows = [(user_id, index[category], weight) for user_id, category, weight in rows if category in index]
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(CATEGORIES)), dtype=np.float32)
+
+    user_column, category_column, weight_column = (np.array(column) for column in zip(*rows))
+    user_ids, user_positions = np.unique(user_column.astype(np.int64), return_inverse=True)
+    matrix = np.zeros((len(user_ids), len(CATEGORIES)), dtype=np.float32)
+    np.add.at(matrix, (user_positions, category_column), weight_column.astype(np.float32))
+    matrix /= matrix.sum(axis=1, keepdims=True)
+
+    return user_ids, matrix
+
+
+def load_affinity():
+    """Интересы пользователей по их объявлениям и истории предложений обмена (агрегация в БД)."""
+
+    own_ads = Ad.objects.values_list("user_id", "category").annotate(count=Count("id")).order_by()
+    proposals = (
+        ExchangeProposal.objects.values_list("owner_id", "ad_sender__category").annotate(count=Count("id")).order_by()
+    )
+    rows = [(user_id, category, count * OWN_AD_WEIGHT) for user_id, category, count in own_ads]
+    rows += [(user_id, category, count * PROPOSAL_WEIGHT) for user_id, category, count in proposals]
+
+    return affinity_matrix(rows)
+
+
+class CandidatePool:
+    """Кандидаты в рекомендации: самые новые объявления в виде массивов NumPy."""
+
+    def __init__(self, ad_ids, owner_ids, categories):
+        self.ad_ids = np.asarray(ad_ids, dtype=np.int64)
+        self.owner_ids = np.asarray(owner_ids, dtype=np.int64)
+        self.categories = np.asarray(categories, dtype=np.intp)
+        # новизна от 1 (самое новое) до 0 (самое старое в пуле)
+        self.freshness = np.linspace(1, 0, len(self.ad_ids), dtype=np.float32) * FRESHNESS_WEIGHT
+
+    @classmethod
+    def load(cls, size):
+        index = {category: position for position, category in enumerate(CATEGORIES)}
+        rows = [
+            (ad_id, owner_id, index[category])
+            for ad_id, owner_id, category in Ad.objects.order_by("-created_at", "-id").values_list(
+                "id", "user_id", "category"
+            )[:size]
+            if category in index
+        ]
+
+        return cls(*zip(*rows)) if rows else cls([], [], [])
+
+    def __len__(self):
+        return len(self.ad_ids)
+
+
+def top_ads(user_ids, affinity, pool, top_n):
+    """Лучшие top_n объявлений пула для каждого пользователя пачки.
+
+    Оценка — интерес пользователя к категории объявления плюс новизна; свои объявления
+    исключаются. Считается векторно для всей пачки: матрица пользователи × кандидаты.
+    Возвращает списки id объявлений (лучшие первыми) в порядке user_ids.
+    """
+
+    if not len(pool) or not len(user_ids):
+        return [[] for _ in user_ids]
+
+    scores = affinity[:, pool.categories] + pool.freshness
+    scores[pool.owner_ids[None, :] == np.asarray(user_ids)[:, None]] = -np.inf
+
+    count = min(top_n, len(pool))
+    top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    valid = np.isfinite(np.take_along_axis(top_scores, order, axis=1))
+
+    ad_ids = pool.ad_ids[top]
+    return [row[mask].tolist() for row, mask in zip(ad_ids, valid)]
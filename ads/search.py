@@ -0,0 +1,222 @@
+import hashlib
+import threading
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+from ads.models import Ad, SavedSearch, SavedSearchMatch, SavedSearchTerm
+from config.metrics import metrics
+
+
+def normalize_search_params(query="", category="", condition=""):
+    """Приводит параметры поиска к каноничному виду: регистр и лишние пробелы не влияют на результат."""
+
+    return " ".join(query.lower().split()), category.strip(), condition.strip()
+
+
+# варианты сортировки списков объявлений (?sort=)
+SORT_ORDERINGS = {
+    "new": ("-created_at", "-id"),
+    "popular": (F("stats__views").desc(nulls_last=True), "-created_at", "-id"),
+}
+
+
+def sort_ads(queryset, sort):
+    """Упорядочивает объявления по варианту sort; неизвестный вариант — новые первыми."""
+
+    return queryset.order_by(*SORT_ORDERINGS.get(sort, SORT_ORDERINGS["new"]))
+
+
+def filter_ads(queryset, query="", category="", condition=""):
+    """Полнотекстовый поиск по названию и описанию, фильтрация по категории и состоянию товара."""
+
+    if query:
+        # импорт при первом поиске, а не при старте процесса
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        queryset = queryset.annotate(search=SearchVector("title", "description")).filter(search=SearchQuery(query))
+
+    if category:
+        queryset = queryset.filter(category=category)
+
+    if condition:
+        queryset = queryset.filter(condition=condition)
+
+    return queryset
+
+
+class _Call:
+    """Выполняющийся вызов, результат которого ждут остальные участники."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одинаковым ключом: функция выполняется один раз,
+    остальные потоки ждут и получают тот же результат (или то же исключение)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Выполняет func для key или дожидается уже идущего выполнения."""
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.increment("search.coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+search_flight = SingleFlight()
+
+
+def search_ad_ids(user, query="", category="", condition="", sort="new"):
+    """Возвращает id найденных объявлений в порядке sort (по умолчанию новые первыми).
+
+    Результат кратко кешируется по нормализованным параметрам, а одинаковые
+    одновременные поиски выполняются одним запросом к БД.
+    """
+
+    query, category, condition = normalize_search_params(query, category, condition)
+    sort = sort if sort in SORT_ORDERINGS else "new"
+    user_id = user.pk if user.is_authenticated else None
+    digest = hashlib.md5(f"{user_id}|{query}|{category}|{condition}|{sort}".encode()).hexdigest()
+    key = f"ads:search:{digest}"
+    timeout = settings.SEARCH_CACHE_TIMEOUT
+
+    if timeout:
+        ids = cache.get(key)
+        if ids is not None:
+            metrics.increment("search.cache_hit")
+            return ids
+
+    def run_search():
+        queryset = Ad.objects.exclude(user_id=user_id) if user_id else Ad.objects.all()
+        queryset = sort_ads(filter_ads(queryset, query, category, condition), sort)
+        ids = list(queryset.values_list("id", flat=True)[: settings.SEARCH_MAX_RESULTS])
+        metrics.increment("search.db_query")
+        if timeout:
+            cache.set(key, ids, timeout)
+        return ids
+
+    return search_flight.do(key, run_search)
+
+
+class AdIdList(Sequence):
+    """Список объявлений по заранее найденным id: из БД загружается только запрошенный срез (страница)."""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            ids = self.ids[index]
+            ads = Ad.objects.select_related("user").in_bulk(ids)
+            return [ads[pk] for pk in ids if pk in ads]
+
+        return self[index : index + 1 or None][0]
+
+
+def lexemes(text):
+    """Лексемы текста в том виде, в каком их сравнивает полнотекстовый поиск filter_ads."""
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tsvector_to_array(to_tsvector(%s))", [text])
+        return cursor.fetchone()[0]
+
+
+def save_search(user, query="", category="", condition=""):
+    """Сохраняет поиск пользователя вместе с лексемами запроса для обратного индекса.
+
+    Возвращает (поиск, создан ли); если такой поиск уже есть, в том числе сохраненный параллельным
+    запросом, возвращается он. Бросает ValueError, если поисков слишком много или в запросе нет
+    лексем (только стоп-слова: такой поиск ничего не находит).
+    """
+
+    query, category, condition = normalize_search_params(query, category, condition)
+    if not (query or category or condition):
+        raise ValueError("Укажите запрос, категорию или состояние")
+    terms = lexemes(query) if query else []
+    if query and not terms:
+        raise ValueError("В запросе нет слов для поиска")
+
+    with transaction.atomic():
+        search = SavedSearch.objects.filter(user=user, query=query, category=category, condition=condition).first()
+        if search:
+            return search, False
+        if SavedSearch.objects.filter(user=user).count() >= settings.SAVED_SEARCHES_LIMIT:
+            raise ValueError(f"Можно сохранить не больше {settings.SAVED_SEARCHES_LIMIT} поисков")
+
+        try:
+            with transaction.atomic():
+                search = SavedSearch.objects.create(
+                    user=user, query=query, category=category, condition=condition, term_count=len(terms)
+                )
+        except IntegrityError:
+            # повторная отправка формы успела сохранить такой же поиск между проверкой и вставкой
+            return SavedSearch.objects.get(user=user, query=query, category=category, condition=condition), False
+        SavedSearchTerm.objects.bulk_create(SavedSearchTerm(search=search, term=term) for term in terms)
+
+    return search, True
+
+
+def percolate_ad(ad):
+    """Обратный поиск: находит сохраненные поиски, под которые подходит новое объявление.
+
+    Кандидаты берутся по обратному индексу лексем объявления и корзинам категории и состояния,
+    поэтому проверяются только поиски, у которых есть хотя бы одна общая с объявлением лексема.
+    Поиск подходит, если в объявлении есть все его лексемы (как в plainto_tsquery). Совпадения
+    записываются во входящие владельцев поисков. Возвращает число новых совпадений.
+    """
+
+    searches = SavedSearch.objects.filter(category__in=["", ad.category], condition__in=["", ad.condition]).exclude(
+        user_id=ad.user_id
+    )
+    terms = lexemes(f"{ad.title} {ad.description}")
+    matched = list(
+        searches.filter(terms__term__in=terms)
+        .annotate(matched_terms=Count("terms"))
+        .filter(matched_terms=F("term_count"))
+        .values_list("id", "user_id")
+    )
+    matched += searches.filter(term_count=0).values_list("id", "user_id")
+
+    # одно совпадение на пользователя, даже если объявление подошло под несколько его поисков
+    by_user = {user_id: search_id for search_id, user_id in sorted(matched, reverse=True)}
+    created = SavedSearchMatch.objects.bulk_create(
+        [SavedSearchMatch(user_id=user_id, search_id=search_id, ad=ad) for user_id, search_id in by_user.items()],
+        ignore_conflicts=True,
+    )
+    metrics.increment("saved_search.matches", len(created))
+
+    return len(created)
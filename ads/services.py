@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from ads.exchange_log import EVENT_FIELDS, log_events
+from ads.models import Ad, ArchivedExchangeProposal, ExchangeProposal, ProposalMessage
+from ads.notifications import proposal_event, publish
+from ads.search import sort_ads
+
+# событие для автора предложения по решению владельца объявления
+DECISION_EVENTS = {
+    ExchangeProposal.STATUS_ACCEPTED: "accepted",
+    ExchangeProposal.STATUS_REFUSED: "refused",
+}
+# created_at сообщения берется при вставке, а видимым оно становится при коммите: сообщение
+# с более ранним временем может появиться после того, как клиент уже прочитал дальше него
+MESSAGE_CURSOR_OVERLAP = timedelta(seconds=60)
+
+
+def exchange_history(user, status):
+    """Обмены пользователя с данным статусом из рабочей таблицы и архива (новые первыми)."""
+
+    condition = Q(ad_sender__user=user) | Q(ad_receiver__user=user)
+    proposals = ExchangeProposal.objects.filter(condition, status=status).select_related("ad_sender", "ad_receiver")
+    archived = ArchivedExchangeProposal.objects.filter(condition, status=status).select_related(
+        "ad_sender", "ad_receiver"
+    )
+
+    return sorted([*proposals, *archived], key=lambda proposal: proposal.created_at, reverse=True)
+
+
+def offers_queryset(user):
+    """Ожидающие предложения обмена на объявления пользователя (новые первыми).
+
+    Фильтр по владельцу объявления — прямое соединение по индексу ads_ad.user_id
+    и (ad_sender, status, created_at), поэтому время не зависит от общего числа объявлений.
+    """
+
+    return (
+        ExchangeProposal.objects.filter(ad_sender__user=user, status=ExchangeProposal.STATUS_PENDING)
+        .select_related("owner", "ad_sender", "ad_receiver")
+        .order_by("-created_at", "-id")
+    )
+
+
+def decide_proposals(user, ids, status):
+    """Принимает или отклоняет ожидающие предложения обмена на объявления пользователя.
+
+    Принадлежность проверяется одним запросом с блокировкой строк, статус меняется одним
+    UPDATE, а события пачки пишутся в журнал одним INSERT в той же транзакции; чужие, уже
+    решенные и несуществующие id пропускаются. Возвращает список id, к которым применено решение.
+    """
+
+    with transaction.atomic():
+        rows = list(
+            ExchangeProposal.objects.select_for_update(of=("self",))
+            .filter(pk__in=ids, ad_sender__user=user, status=ExchangeProposal.STATUS_PENDING)
+            .order_by("pk")
+            .values_list(*EVENT_FIELDS)
+        )
+        ExchangeProposal.objects.filter(pk__in=[pk for pk, *_ in rows]).update(status=status)
+        log_events(DECISION_EVENTS[status], rows)
+        publish(proposal_event(DECISION_EVENTS[status], pk, owner_id, status) for pk, owner_id, *_ in rows)
+
+    return [pk for pk, *_ in rows]
+
+
+def participant_proposals(user):
+    """Предложения обмена, в которых пользователь — автор или владелец объявления, которое хотят получить."""
+
+    return ExchangeProposal.objects.filter(Q(owner=user) | Q(ad_sender__user=user)).select_related(
+        "ad_sender", "ad_receiver"
+    )
+
+
+def unread_field(proposal, user):
+    """Имя счетчика непрочитанных сообщений пользователя в предложении."""
+
+    return "owner_unread" if user.pk == proposal.owner_id else "recipient_unread"
+
+
+def post_message(proposal, user, text):
+    """Добавляет сообщение в переписку по предложению.
+
+    Счетчик непрочитанных второй стороны увеличивается атомарным UPDATE в той же транзакции,
+    после коммита ей уходит событие "message".
+    """
+
+    other_id = proposal.ad_sender.user_id if user.pk == proposal.owner_id else proposal.owner_id
+    counter = "recipient_unread" if user.pk == proposal.owner_id else "owner_unread"
+    with transaction.atomic():
+        message = ProposalMessage.objects.create(proposal=proposal, author=user, text=text)
+        ExchangeProposal.objects.filter(pk=proposal.pk).update(**{counter: F(counter) + 1})
+        publish([proposal_event("message", proposal.pk, other_id, proposal.status)])
+
+    return message
+
+
+def thread_messages(proposal, after=None, before=None, limit=50):
+    """Страница переписки в хронологическом порядке, выбранная по ключу (created_at, id).
+
+    after — курсор (created_at, id): первые limit сообщений после него (дозагрузка новых) и,
+    перед ними, все сообщения за MESSAGE_CURSOR_OVERLAP до курсора — их клиент отбрасывает по id,
+    зато сообщение, закоммиченное позже уже прочитанного курсора, до него дойдет. Транзакции
+    длиннее окна по-прежнему могут потеряться. Без after — последние limit сообщений,
+    при before — до этого курсора (листание назад).
+    """
+
+    messages = ProposalMessage.objects.filter(proposal=proposal).select_related("author")
+    if after:
+        created_at, pk = after
+        newer = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        recent = messages.filter(created_at__gt=created_at - MESSAGE_CURSOR_OVERLAP).exclude(newer)
+        return list(recent.order_by("created_at", "id")) + list(
+            messages.filter(newer).order_by("created_at", "id")[:limit]
+        )
+
+    if before:
+        created_at, pk = before
+        messages = messages.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return list(messages.order_by("-created_at", "-id")[:limit])[::-1]
+
+
+def mark_thread_read(proposal, user):
+    """Обнуляет счетчик непрочитанных сообщений пользователя (UPDATE, только если он не нулевой)."""
+
+    counter = unread_field(proposal, user)
+    if getattr(proposal, counter):
+        ExchangeProposal.objects.filter(pk=proposal.pk).update(**{counter: 0})
+        setattr(proposal, counter, 0)
+
+
+def seller_stats(user, top=5):
+    """Статистика продавца: число объявлений (включая истекшие), сумма их просмотров и самые просматриваемые."""
+
+    ads = Ad.with_expired.filter(user=user)
+    stats = ads.aggregate(ads=Count("pk"), views=Coalesce(Sum("stats__views"), 0))
+    stats["popular"] = list(sort_ads(ads.select_related("stats"), "popular")[:top])
+
+    return stats
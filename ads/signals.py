@@ -0,0 +1,149 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from ads.dedup import index_ads
+from ads.exchange_log import log_proposal
+from ads.models import Ad, AdImage, ExchangeProposal
+from ads.notifications import proposal_event, publish
+from ads.search import percolate_ad
+from ads.storage import content_addressed_storage, lock_content
+
+logger = logging.getLogger(__name__)
+
+
+def image_name(value):
+    """Имя файла из значения поля изображения (строка или FieldFile)."""
+
+    return getattr(value, "name", value) or ""
+
+
+def release_image(name):
+    """Удаляет файл изображения, если на него больше не ссылается ни одно объявление и ни одна фотография галереи.
+
+    Количество ссылок — это число объявлений с таким image_url и фотографий с таким image
+    (оба поля индексированы), поэтому счетчик не может разойтись с данными. Проверка и удаление
+    идут под блокировкой имени (lock_content), которую берет и загрузка того же содержимого:
+    иначе файл, только что переиспользованный новой загрузкой, мог бы быть удален.
+    """
+
+    if not name:
+        return
+
+    with transaction.atomic():
+        lock_content(name)
+        if not (Ad.all_objects.filter(image_url=name).exists() or AdImage.objects.filter(image=name).exists()):
+            content_addressed_storage.delete(name)
+
+
+@receiver(post_init, sender=Ad)
+def remember_image(sender, instance, **kwargs):
+    """Запоминает исходное изображение, чтобы при замене освободить старый файл."""
+
+    instance._original_image = image_name(instance.__dict__.get("image_url"))
+
+
+@receiver(post_save, sender=Ad)
+def release_replaced_image(sender, instance, **kwargs):
+    """После коммита освобождает изображение, замененное при редактировании объявления."""
+
+    original, current = instance._original_image, image_name(instance.image_url)
+    if original and original != current:
+        transaction.on_commit(lambda: release_image(original))
+    instance._original_image = current
+
+
+@receiver(post_delete, sender=Ad)
+def release_deleted_image(sender, instance, **kwargs):
+    """После коммита освобождает изображение удаленного объявления."""
+
+    name = image_name(instance.image_url)
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_delete, sender=AdImage)
+def release_gallery_image(sender, instance, **kwargs):
+    """После коммита освобождает файл удаленной фотографии галереи."""
+
+    name = image_name(instance.image)
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+@receiver(post_save, sender=Ad)
+def index_ad_signature(sender, instance, update_fields=None, **kwargs):
+    """Пересчитывает сигнатуры для поиска дубликатов, когда меняется текст или изображение объявления.
+
+    Сигнатуру, уже посчитанную формой при проверке на дубликаты, форма оставляет в instance._signature.
+    """
+
+    if instance.deleted_at is not None:
+        return
+    if update_fields is not None and not {"title", "description", "image_url"} & set(update_fields):
+        return
+
+    signature = instance.__dict__.pop("_signature", None)
+    index_ads([instance], {instance.pk: signature} if signature else None)
+
+
+@receiver(post_save, sender=Ad)
+def percolate_created_ad(sender, instance, created, **kwargs):
+    """После коммита проверяет новое объявление по сохраненным поискам пользователей."""
+
+    if not created:
+        return
+
+    def percolate():
+        try:
+            percolate_ad(instance)
+        except Exception:
+            # объявление уже сохранено: сбой рассылки не должен превращаться в ошибку его создания
+            logger.exception("Не удалось проверить объявление %s по сохраненным поискам", instance.pk)
+
+    transaction.on_commit(percolate)
+
+
+@receiver(post_init, sender=ExchangeProposal)
+def remember_status(sender, instance, **kwargs):
+    """Запоминает исходный статус предложения, чтобы при сохранении заметить его изменение."""
+
+    instance._original_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=ExchangeProposal)
+def publish_proposal_event(sender, instance, created, **kwargs):
+    """Записывает новое предложение или смену его статуса в журнал обменов и после коммита
+    уведомляет участников.
+
+    О новом и отмененном предложении узнает владелец объявления, которое хотят получить,
+    о принятии и отказе — автор предложения.
+    """
+
+    if created:
+        event, user_id = "created", instance.ad_sender.user_id
+    elif instance.status == instance._original_status:
+        return
+    elif instance.status == ExchangeProposal.STATUS_CANCELLED:
+        event, user_id = "cancelled", instance.ad_sender.user_id
+    elif instance.status == ExchangeProposal.STATUS_ACCEPTED:
+        event, user_id = "accepted", instance.owner_id
+    elif instance.status == ExchangeProposal.STATUS_REFUSED:
+        event, user_id = "refused", instance.owner_id
+    else:
+        event = None
+
+    instance._original_status = instance.status
+    if event:
+        log_proposal(event, instance)
+        publish([proposal_event(event, instance.pk, user_id, instance.status)])
+
+
+@receiver(pre_delete, sender=ExchangeProposal)
+def log_deleted_proposal(sender, instance, **kwargs):
+    """Удаление ожидающего предложения записывается в журнал обменов как отмена."""
+
+    if instance.status == ExchangeProposal.STATUS_PENDING:
+        log_proposal("cancelled", instance)
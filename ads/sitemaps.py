@@ -0,0 +1,154 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad
+
+INDEX_NAME = "sitemap.xml"
+MANIFEST_NAME = "manifest.json"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+# запас по времени: объявление, сохраненное до начала прошлого прохода, могло закоммититься уже после него
+OVERLAP = timedelta(minutes=5)
+
+
+def chunk_name(index):
+    """Имя сжатой части карты сайта с объявлениями из диапазона id номер index."""
+
+    return f"sitemap-ads-{index}.xml.gz"
+
+
+def read_manifest(root):
+    """Состояние прошлого прохода или None, если карта еще не строилась."""
+
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _atomic_write(path, write):
+    """Пишет файл через временный и os.replace, чтобы раздача никогда не видела его недописанным."""
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".sitemap-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def changed_chunks(since, size):
+    """Номера диапазонов id, в которых есть объявления, измененные после since (по индексу updated_at).
+
+    Учитываются и удаленные и истекшие объявления: их надо убрать из карты.
+    """
+
+    return set(
+        Ad.all_objects.filter(updated_at__gt=since)
+        .annotate(chunk=F("id") / size)
+        .values_list("chunk", flat=True)
+        .distinct()
+    )
+
+
+def write_chunk(root, index, size, base_url):
+    """Записывает часть с опубликованными объявлениями с id из [index * size, (index + 1) * size).
+
+    Строки читаются по диапазону первичного ключа потоком и сразу пишутся в gzip, поэтому память
+    не зависит от размера части. Возвращает (число ссылок, последнее изменение); пустая часть удаляется.
+    """
+
+    # шаблон адреса объявления без reverse на каждую строку
+    prefix, suffix = reverse("ads:ad-detail", kwargs={"pk": 0}).split("/0/")
+    template = f"<url><loc>{escape(base_url + prefix)}/{{}}/{escape(suffix)}</loc><lastmod>{{}}</lastmod></url>\n"
+    rows = (
+        Ad.objects.filter(id__gte=index * size, id__lt=(index + 1) * size)
+        .order_by("id")
+        .values_list("id", "updated_at")
+        .iterator(chunk_size=5000)
+    )
+    count, lastmod = 0, None
+
+    def write(file):
+        nonlocal count, lastmod
+        with gzip.GzipFile(fileobj=file, mode="wb", mtime=0) as archive:
+            archive.write(f"{XML_HEADER}<urlset {XMLNS}>\n".encode())
+            for pk, updated_at in rows:
+                archive.write(template.format(pk, updated_at.date().isoformat()).encode())
+                count += 1
+                lastmod = updated_at if lastmod is None else max(lastmod, updated_at)
+            archive.write(b"</urlset>\n")
+
+    path = os.path.join(root, chunk_name(index))
+    _atomic_write(path, write)
+    if not count:
+        os.remove(path)
+
+    return count, lastmod
+
+
+def write_index(root, chunks, base_url):
+    """Записывает индекс карты сайта со ссылками на все непустые части."""
+
+    def write(file):
+        file.write(f"{XML_HEADER}<sitemapindex {XMLNS}>\n".encode())
+        for index, chunk in sorted(chunks.items(), key=lambda item: int(item[0])):
+            location = base_url + reverse("ads:sitemap-chunk", kwargs={"name": chunk_name(index)})
+            file.write(
+                f"<sitemap><loc>{escape(location)}</loc><lastmod>{chunk['lastmod']}</lastmod></sitemap>\n".encode()
+            )
+        file.write(b"</sitemapindex>\n")
+
+    _atomic_write(os.path.join(root, INDEX_NAME), write)
+
+
+def build_sitemaps(full=False, root=None, size=None, base_url=None):
+    """Обновляет карту сайта и возвращает (перестроено частей, всего частей).
+
+    Без full перестраиваются только диапазоны id, где с прошлого прохода менялся updated_at;
+    удаление объявления из БД (не мягкое) так не заметно, его подхватывает полный проход.
+    """
+
+    root = root or settings.SITEMAP_ROOT
+    size = size or settings.SITEMAP_CHUNK_SIZE
+    base_url = base_url if base_url is not None else settings.SITEMAP_BASE_URL
+    os.makedirs(root, exist_ok=True)
+
+    started = timezone.now()
+    manifest = read_manifest(root)
+    if full or not manifest or manifest["chunk_size"] != size:
+        for name in os.listdir(root):
+            if name.startswith("sitemap-ads-"):
+                os.remove(os.path.join(root, name))
+        last_id = Ad.all_objects.aggregate(last=Max("id"))["last"]
+        manifest = {"chunk_size": size, "chunks": {}}
+        indexes = set(range(last_id // size + 1)) if last_id is not None else set()
+    else:
+        indexes = changed_chunks(datetime.fromisoformat(manifest["generated_at"]) - OVERLAP, size)
+
+    chunks = manifest["chunks"]
+    for index in sorted(indexes):
+        count, lastmod = write_chunk(root, index, size, base_url)
+        if count:
+            chunks[str(index)] = {"count": count, "lastmod": lastmod.isoformat()}
+        else:
+            chunks.pop(str(index), None)
+
+    manifest["generated_at"] = started.isoformat()
+    write_index(root, chunks, base_url)
+    _atomic_write(os.path.join(root, MANIFEST_NAME), lambda file: file.write(json.dumps(manifest).encode()))
+
+    return len(indexes), len(chunks)
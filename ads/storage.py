@@ -0,0 +1,85 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.db.transaction import TransactionManagementError
+
+
+def lock_content(name):
+    """Блокирует имя файла до конца текущей транзакции (advisory-блокировка Postgres).
+
+    Загрузка, переиспользующая существующий файл, и освобождение файла без ссылок берут одну
+    блокировку, поэтому файл не удаляется между проверкой «ссылок нет» и вставкой новой ссылки.
+    Вне транзакции блокировка снялась бы сразу и ничего не защищала, поэтому там бросается
+    TransactionManagementError. Ad.save и AdImage.save сами открывают транзакцию, и блокировка
+    держится до коммита строки со ссылкой на файл.
+    """
+
+    if not connection.in_atomic_block:
+        raise TransactionManagementError("Файл хранилища сохраняется и удаляется только в transaction.atomic()")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [name])
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, которое сохраняет файл под sha256 его содержимого.
+
+    Файл "ad_images/photo.jpg" ляжет как "ad_images/ab/abcdef….jpg", поэтому повторная
+    загрузка того же изображения не создает копию, а несколько объявлений ссылаются
+    на один файл. Удалением ненужных файлов занимается ads.signals.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # имя определяется содержимым, поэтому совпадение имен означает совпадение файлов
+        return name
+
+    def _save(self, name, content):
+        directory, extension = posixpath.dirname(name), os.path.splitext(name)[1].lower()
+        upload_dir = self.path(directory)
+        os.makedirs(upload_dir, exist_ok=True)
+
+        # хеш считается во время записи во временный файл, чтобы читать загрузку один раз
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=upload_dir, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+
+            name = self.content_name(directory, digest.hexdigest(), extension)
+            # до коммита ссылки на файл release_image не удалит его, а начатое удаление мы дождемся
+            lock_content(name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                # os.replace атомарен: при одновременной загрузке одинаковых файлов победит любой из них
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return name
+
+    @staticmethod
+    def content_name(directory, hexdigest, extension):
+        """Имя файла по хешу содержимого."""
+
+        return posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def ad_image_storage():
+    """Хранилище изображений объявлений (callable, чтобы миграции не зависели от MEDIA_ROOT)."""
+
+    return content_addressed_storage
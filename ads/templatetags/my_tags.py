@@ -1,4 +1,5 @@
 from django import template
+from django.utils.html import format_html
 
 register = template.Library()
 
@@ -8,3 +9,17 @@ def media_filter(path):
     if path:
         return f"/media/{path}"
     return "#"
+
+
+@register.filter()
+def size_attrs(item):
+    """Атрибуты width и height для обложки объявления (Ad) или фотографии галереи (AdImage).
+
+    С ними браузер резервирует место под картинку до ее загрузки, и страница не прыгает.
+    """
+
+    width = getattr(item, "image_width", None) or getattr(item, "width", None)
+    height = getattr(item, "image_height", None) or getattr(item, "height", None)
+    if width and height:
+        return format_html('width="{}" height="{}"', width, height)
+    return ""
@@ -1,10 +1,14 @@
-from django.urls import path
+from django.urls import path, re_path
 
+from ads.api import AdListApiView, ExchangeProposalListApiView, ProposalMessageListApiView
 from ads.apps import AdsConfig
-from ads.views import (AcceptExchangeProposalView, AdCreateView, AdDeleteView, AdDetailView, AdListView, AdMyListView,
-                       AdSearchListView, AdUpdateView, ExchangeProposalCreate, ExchangeProposalDeleteView,
-                       ExchangeProposalListView, HomeTemplateView, MyExchangeProposalListView,
-                       OffersExchangeProposalListView, RefuseExchangeProposalView)
+from ads.views import (AcceptExchangeProposalView, AdCreateView, AdDeleteView, AdDetailView, AdImageCoverView,
+                       AdImageDeleteView, AdListView, AdMyListView, AdRenewView, AdSearchListView, AdUpdateView,
+                       BulkExchangeProposalDecisionView, ExchangeEventStreamView, ExchangeProposalCreate,
+                       ExchangeProposalDeleteView, ExchangeProposalListView, HomeTemplateView,
+                       MyExchangeProposalListView, OffersExchangeProposalListView, ProposalThreadView,
+                       RecommendedAdListView, RefuseExchangeProposalView, SavedSearchCreateView, SavedSearchDeleteView,
+                       SavedSearchInboxView, SavedSearchListView, SitemapView)
 
 app_name = AdsConfig.name
 
@@ -12,16 +16,34 @@ urlpatterns = [
     path("", HomeTemplateView.as_view(), name="home"),
     path("ad-create/", AdCreateView.as_view(), name="ad-create"),
     path("ads/", AdListView.as_view(), name="ads-list"),
+    path("recommended/", RecommendedAdListView.as_view(), name="ads-recommended"),
     path("my_ads/", AdMyListView.as_view(), name="ads-mylist"),
     path("<int:pk>/ad/", AdDetailView.as_view(), name="ad-detail"),
     path("<int:pk>/update/", AdUpdateView.as_view(), name="ad-update"),
     path("<int:pk>/delete/", AdDeleteView.as_view(), name="ad-delete"),
+    path("<int:pk>/renew/", AdRenewView.as_view(), name="ad-renew"),
+    path("<int:pk>/images/<int:image_pk>/cover/", AdImageCoverView.as_view(), name="ad-image-cover"),
+    path("<int:pk>/images/<int:image_pk>/delete/", AdImageDeleteView.as_view(), name="ad-image-delete"),
     path("exchange-create/<int:pk>/", ExchangeProposalCreate.as_view(), name="exchange-create"),
     path("exchanges/", ExchangeProposalListView.as_view(), name="exchanges-list"),
     path("my_exchanges/", MyExchangeProposalListView.as_view(), name="my-exchanges-list"),
     path("offers_exchanges/", OffersExchangeProposalListView.as_view(), name="offers-exchanges"),
     path("accept-exchange-proposal/<int:pk>/", AcceptExchangeProposalView.as_view(), name="accept-exchange-proposal"),
     path("refuse-exchange-proposal/<int:pk>/", RefuseExchangeProposalView.as_view(), name="refuse-exchange-proposal"),
+    path("exchange-proposals/decide/", BulkExchangeProposalDecisionView.as_view(), name="decide-exchange-proposals"),
     path("delete-exchange-proposal/<int:pk>/", ExchangeProposalDeleteView.as_view(), name="delete-exchange-proposal"),
+    path("exchanges/events/", ExchangeEventStreamView.as_view(), name="exchange-events"),
+    path("exchange-proposals/<int:pk>/messages/", ProposalThreadView.as_view(), name="proposal-thread"),
     path("search/", AdSearchListView.as_view(), name="search-ads"),
+    path("sitemap.xml", SitemapView.as_view(), name="sitemap"),
+    re_path(r"^sitemaps/(?P<name>sitemap-ads-\d+\.xml\.gz)$", SitemapView.as_view(), name="sitemap-chunk"),
+    path("saved-searches/", SavedSearchListView.as_view(), name="saved-searches"),
+    path("saved-searches/create/", SavedSearchCreateView.as_view(), name="saved-search-create"),
+    path("saved-searches/<int:pk>/delete/", SavedSearchDeleteView.as_view(), name="saved-search-delete"),
+    path("saved-searches/inbox/", SavedSearchInboxView.as_view(), name="saved-search-inbox"),
+    path("api/ads/", AdListApiView.as_view(), name="api-ads"),
+    path("api/exchange-proposals/", ExchangeProposalListApiView.as_view(), name="api-exchange-proposals"),
+    path(
+        "api/exchange-proposals/<int:pk>/messages/", ProposalMessageListApiView.as_view(), name="api-proposal-messages"
+    ),
 ]
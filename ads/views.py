@@ -1,14 +1,31 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.postgres.search import SearchQuery, SearchVector
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
 from django.views.generic.detail import SingleObjectMixin
 
-from ads.forms import AdForm, ExchangeProposalForm
-from ads.models import Ad, ExchangeProposal
+from ads.api import decode_cursor, encode_cursor
+from ads.counters import ad_views
+from ads.forms import AdForm, ExchangeProposalForm, ProposalMessageForm
+from ads.geo import location_params, nearby
+from ads.mixins import RateLimitMixin
+from ads.models import Ad, AdRecommendation, ExchangeProposal, SavedSearch, SavedSearchMatch
+from ads.notifications import hub
+from ads.search import AdIdList, save_search, search_ad_ids, sort_ads
+from ads.services import (decide_proposals, exchange_history, mark_thread_read, offers_queryset, participant_proposals,
+                          post_message, thread_messages)
+from ads.sitemaps import INDEX_NAME
+from config.serving import serve
 
 
 class HomeTemplateView(TemplateView):
@@ -32,6 +49,14 @@ class AdCreateView(LoginRequiredMixin, CreateView):
     form_class = AdForm
     template_name = "ad_form.html"
 
+    def get_form_kwargs(self):
+        """Передача пользователя в форму для проверки на дубликаты."""
+
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+
+        return kwargs
+
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы в шаблон."""
 
@@ -45,6 +70,8 @@ class AdCreateView(LoginRequiredMixin, CreateView):
 
         ad = form.save(commit=False)
         ad.user = self.request.user
+        if ad.latitude is None or ad.longitude is None:
+            ad.latitude, ad.longitude = ad.user.latitude, ad.user.longitude
         ad.save()
 
         return super().form_valid(form)
@@ -67,20 +94,67 @@ class AdListView(ListView):
 
         context = super().get_context_data(**kwargs)
         context["current_page"] = "Объявления"
+        context["location_error"] = self.location_error
+        context["radius"] = self.request.GET.get("radius", "")
 
         return context
 
     def get_queryset(self):
-        """Возвращает объявления других пользователей."""
+        """Возвращает объявления других пользователей, с параметром radius — ближайшие в радиусе,
+        с параметром sort — в заданном порядке (popular — по просмотрам)."""
 
         queryset = super().get_queryset()
         user = self.request.user
         if user.is_authenticated:
             queryset = queryset.exclude(user=user)
 
+        self.location_error = None
+        try:
+            location = location_params(self.request.GET, user)
+        except ValueError as error:
+            self.location_error = str(error)
+            location = None
+        sort = self.request.GET.get("sort")
+        if location:
+            queryset = nearby(queryset, *location)
+            queryset = sort_ads(queryset, sort) if sort else queryset.order_by("distance")
+        elif sort:
+            queryset = sort_ads(queryset, sort)
+
         return queryset
 
 
+class RecommendedAdListView(LoginRequiredMixin, ListView):
+    """Рекомендованные пользователю объявления (рассчитываются командой compute_recommendations)."""
+
+    model = Ad
+    template_name = "ads.html"
+    context_object_name = "ads"
+    paginate_by = 20
+
+    def get_context_data(self, **kwargs):
+        """Передача названия текущей страницы в шаблон."""
+
+        context = super().get_context_data(**kwargs)
+        context["current_page"] = "Рекомендуем вам"
+
+        return context
+
+    def get_queryset(self):
+        """Рекомендации одним чтением по первичному ключу; пока их нет — новые объявления других пользователей."""
+
+        user = self.request.user
+        ad_ids = AdRecommendation.objects.filter(user=user).values_list("ad_ids", flat=True).first()
+        if ad_ids is None:
+            ad_ids = list(
+                Ad.objects.exclude(user=user)
+                .order_by("-created_at", "-id")
+                .values_list("id", flat=True)[: settings.SEARCH_MAX_RESULTS]
+            )
+
+        return AdIdList(ad_ids)
+
+
 class AdMyListView(LoginRequiredMixin, ListView):
     """Список моих объявлений."""
 
@@ -93,34 +167,55 @@ class AdMyListView(LoginRequiredMixin, ListView):
 
         context = super().get_context_data(**kwargs)
         context["current_page"] = "Мои объявления"
+        context["ad_lifetime_days"] = settings.AD_LIFETIME_DAYS
 
         return context
 
     def get_queryset(self):
-        """Возвращает объявления текущего пользователя."""
+        """Возвращает объявления текущего пользователя (включая истекшие) со статистикой,
+        с параметром sort — в заданном порядке."""
 
-        queryset = super().get_queryset()
         user = self.request.user
         if user.is_authenticated:
-            queryset = queryset.filter(user=user)
+            queryset = Ad.with_expired.filter(user=user).select_related("stats")
         else:
             queryset = Ad.objects.none()
+        sort = self.request.GET.get("sort")
+        if sort:
+            queryset = sort_ads(queryset, sort)
 
         return queryset
 
 
 class AdDetailView(DetailView):
-    """Информация об объявлении."""
+    """Информация об объявлении с галереей фотографий. Истекшее объявление видит только владелец."""
 
     model = Ad
     template_name = "ad.html"
     context_object_name = "ad"
 
+    def get_queryset(self):
+        # галерея загружается одним дополнительным запросом
+        queryset = Ad.with_expired.prefetch_related("images")
+        if self.request.user.is_authenticated:
+            return queryset.filter(Q(expired_at__isnull=True) | Q(user=self.request.user))
+
+        return queryset.filter(expired_at__isnull=True)
+
+    def get_object(self, queryset=None):
+        """Учитывает просмотр объявления (кроме просмотров владельцем)."""
+
+        ad = super().get_object(queryset)
+        if ad.user_id != self.request.user.pk:
+            ad_views.increment(ad.pk)
+
+        return ad
+
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы в шаблон."""
 
         context = super().get_context_data(**kwargs)
-        if Ad.objects.get(id=self.object.id).user == self.request.user:
+        if self.object.user_id == self.request.user.pk:
             my = 'Мое объявление'
         else:
             my = ''
@@ -134,10 +229,19 @@ class AdUpdateView(LoginRequiredMixin, UpdateView):
     """Редактирование объявления."""
 
     model = Ad
+    queryset = Ad.with_expired.all()
     form_class = AdForm
     template_name = "ad_form.html"
     success_url = reverse_lazy("ads:ads-mylist")
 
+    def get_form_kwargs(self):
+        """Передача пользователя в форму для проверки на дубликаты."""
+
+        kwargs = super().get_form_kwargs()
+        kwargs["user"] = self.request.user
+
+        return kwargs
+
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы в шаблон."""
 
@@ -151,6 +255,7 @@ class AdDeleteView(LoginRequiredMixin, DeleteView):
     """Удаление объявления."""
 
     model = Ad
+    queryset = Ad.with_expired.all()
     template_name = "confirm-delete.html"
     success_url = reverse_lazy("ads:ads-mylist")
 
@@ -162,6 +267,51 @@ class AdDeleteView(LoginRequiredMixin, DeleteView):
 
         return context
 
+    def form_valid(self, form):
+        """Мягкое удаление: объявление скрывается, история обменов по нему сохраняется."""
+
+        self.object.soft_delete()
+
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class AdRenewView(LoginRequiredMixin, View):
+    """Продление публикации своего объявления, в том числе уже истекшего."""
+
+    http_method_names = ["post"]
+
+    def post(self, request, pk, *args, **kwargs):
+        get_object_or_404(Ad.with_expired, pk=pk, user=request.user).renew()
+
+        return HttpResponseRedirect(reverse("ads:ads-mylist"))
+
+
+class AdImageCoverView(LoginRequiredMixin, View):
+    """Выбор обложки своего объявления из фотографий галереи."""
+
+    http_method_names = ["post"]
+
+    def post(self, request, pk, image_pk, *args, **kwargs):
+        ad = get_object_or_404(Ad.with_expired, pk=pk, user=request.user)
+        ad.set_cover(get_object_or_404(ad.images, pk=image_pk))
+
+        return HttpResponseRedirect(reverse("ads:ad-detail", kwargs={"pk": ad.pk}))
+
+
+class AdImageDeleteView(LoginRequiredMixin, View):
+    """Удаление фотографии из галереи своего объявления; при удалении обложки ею становится следующая."""
+
+    http_method_names = ["post"]
+
+    def post(self, request, pk, image_pk, *args, **kwargs):
+        ad = get_object_or_404(Ad.with_expired, pk=pk, user=request.user)
+        image = get_object_or_404(ad.images, pk=image_pk)
+        with transaction.atomic():
+            image.delete()
+            ad.update_cover()
+
+        return HttpResponseRedirect(reverse("ads:ad-detail", kwargs={"pk": ad.pk}))
+
 
 class ExchangeProposalCreate(LoginRequiredMixin, CreateView):
     """Создание обмена."""
@@ -188,7 +338,9 @@ class ExchangeProposalCreate(LoginRequiredMixin, CreateView):
         form.instance.ad_sender = sender_ad
         form.instance.owner = user
 
-        return super().form_valid(form)
+        # предложение и событие в журнале обменов сохраняются вместе
+        with transaction.atomic():
+            return super().form_valid(form)
 
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы в шаблон."""
@@ -213,16 +365,11 @@ class ExchangeProposalListView(LoginRequiredMixin, ListView):
 
         context = super().get_context_data(**kwargs)
         user = self.request.user
-        users_ads = Ad.objects.filter(user=user)
         context["current_page"] = "Обмены"
-        # принятые обмены
-        context["exchanges_ok"] = ExchangeProposal.objects.filter(
-            Q(ad_sender__in=users_ads) | Q(ad_receiver__in=users_ads), status="Подтвержден"
-        )
-        # отклоненные обмены
-        context["exchanges"] = ExchangeProposal.objects.filter(
-            Q(ad_sender__in=users_ads) | Q(ad_receiver__in=users_ads), status="Отклонен"
-        )
+        # принятые обмены (вместе с архивными)
+        context["exchanges_ok"] = exchange_history(user, ExchangeProposal.STATUS_ACCEPTED)
+        # отклоненные обмены (вместе с архивными)
+        context["exchanges"] = exchange_history(user, ExchangeProposal.STATUS_REFUSED)
 
         return context
 
@@ -240,7 +387,7 @@ class MyExchangeProposalListView(LoginRequiredMixin, ListView):
         queryset = super().get_queryset()
         user = self.request.user
         if user.is_authenticated:
-            queryset = queryset.filter(owner=user, status="Ожидает")
+            queryset = queryset.filter(owner=user, status=ExchangeProposal.STATUS_PENDING)
         else:
             queryset = Ad.objects.none()
 
@@ -261,16 +408,12 @@ class OffersExchangeProposalListView(LoginRequiredMixin, ListView):
     model = ExchangeProposal
     template_name = "exchange_proposals1.html"
     context_object_name = "exchanges"
+    paginate_by = 20
 
     def get_queryset(self):
-        """Возвращает предложения обмена от других пользователей."""
+        """Возвращает ожидающие предложения обмена на объявления текущего пользователя."""
 
-        queryset = super().get_queryset()
-        user = self.request.user
-        users_ads = Ad.objects.exclude(user=user)
-        queryset = ExchangeProposal.objects.filter(ad_receiver__in=users_ads, status="Ожидает")
-
-        return queryset
+        return offers_queryset(self.request.user)
 
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы в шаблон."""
@@ -287,9 +430,7 @@ class AcceptExchangeProposalView(LoginRequiredMixin, SingleObjectMixin, View):
     model = ExchangeProposal
 
     def post(self, request, *args, **kwargs):
-        proposal = self.get_object()
-        proposal.status = "Подтвержден"
-        proposal.save()
+        decide_proposals(request.user, [self.kwargs["pk"]], ExchangeProposal.STATUS_ACCEPTED)
 
         return HttpResponseRedirect(reverse("ads:offers-exchanges"))
 
@@ -300,13 +441,145 @@ class RefuseExchangeProposalView(LoginRequiredMixin, SingleObjectMixin, View):
     model = ExchangeProposal
 
     def post(self, request, *args, **kwargs):
-        proposal = self.get_object()
-        proposal.status = "Отклонен"
-        proposal.save()
+        decide_proposals(request.user, [self.kwargs["pk"]], ExchangeProposal.STATUS_REFUSED)
 
         return HttpResponseRedirect(reverse("ads:offers-exchanges"))
 
 
+class BulkExchangeProposalDecisionView(LoginRequiredMixin, View):
+    """Принимает или отклоняет несколько предложений обмена одним запросом.
+
+    Тело запроса — JSON {"action": "accept" | "refuse", "ids": [...]} или те же поля формой;
+    ответ — JSON со списками примененных и пропущенных id.
+    """
+
+    raise_exception = True
+    http_method_names = ["post"]
+    max_ids = 500
+    actions = {"accept": ExchangeProposal.STATUS_ACCEPTED, "refuse": ExchangeProposal.STATUS_REFUSED}
+
+    def post(self, request, *args, **kwargs):
+        if request.content_type == "application/json":
+            try:
+                data = json.loads(request.body)
+                action, ids = data.get("action"), data.get("ids")
+            except (ValueError, AttributeError):
+                return JsonResponse({"error": "Некорректный JSON"}, status=400)
+        else:
+            action, ids = request.POST.get("action"), request.POST.getlist("ids")
+
+        if action not in self.actions:
+            return JsonResponse({"error": "action должен быть accept или refuse"}, status=400)
+        try:
+            if not isinstance(ids, list):
+                raise TypeError
+            ids = sorted({int(pk) for pk in ids})
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "ids должен быть списком целых чисел"}, status=400)
+        if not ids or len(ids) > self.max_ids:
+            return JsonResponse({"error": f"Передайте от 1 до {self.max_ids} id"}, status=400)
+
+        updated = decide_proposals(request.user, ids, self.actions[action])
+        skipped = sorted(set(ids) - set(updated))
+
+        return JsonResponse({"action": action, "updated": updated, "skipped": skipped})
+
+
+class ExchangeEventStreamView(View):
+    """Поток событий по обменам текущего пользователя (Server-Sent Events).
+
+    Асинхронное представление: открытое соединение не занимает поток воркера,
+    поэтому работает только под ASGI-сервером.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            # под WSGI бесконечный поток занял бы поток сервера; 204 велит EventSource не переподключаться
+            return HttpResponse(status=204)
+
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+
+        response = StreamingHttpResponse(self.stream(user.pk), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+
+        return response
+
+    async def stream(self, user_id):
+        """Отдает события пользователя по мере поступления и комментарий-пинг при простое."""
+
+        subscription = hub.subscribe(user_id)
+        queue = subscription[1]
+        try:
+            yield f"retry: {settings.EXCHANGE_EVENTS_RETRY * 1000}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.EXCHANGE_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(user_id, subscription)
+
+
+class ProposalThreadView(LoginRequiredMixin, View):
+    """Переписка по предложению обмена: последние сообщения (?before= — более ранние) и отправка нового.
+
+    Открытие переписки обнуляет счетчик непрочитанных; новые сообщения страница дозагружает
+    через api-proposal-messages с курсором ?after=.
+    """
+
+    template_name = "proposal_thread.html"
+    page_size = 50
+
+    def get_proposal(self):
+        return get_object_or_404(participant_proposals(self.request.user), pk=self.kwargs["pk"])
+
+    def get(self, request, *args, **kwargs):
+        proposal = self.get_proposal()
+        before = request.GET.get("before")
+        try:
+            before = decode_cursor(before) if before else None
+        except ValueError:
+            before = None
+
+        return self.render_thread(proposal, ProposalMessageForm(), before)
+
+    def post(self, request, *args, **kwargs):
+        proposal = self.get_proposal()
+        form = ProposalMessageForm(request.POST)
+        if not form.is_valid():
+            return self.render_thread(proposal, form)
+
+        post_message(proposal, request.user, form.cleaned_data["text"])
+
+        return HttpResponseRedirect(reverse("ads:proposal-thread", kwargs={"pk": proposal.pk}))
+
+    def render_thread(self, proposal, form, before=None):
+        # на одно сообщение больше страницы: есть ли что листать назад
+        messages_page = thread_messages(proposal, before=before, limit=self.page_size + 1)
+        older = messages_page[0] if len(messages_page) > self.page_size else None
+        messages_page = messages_page[-self.page_size :]
+        if not before:
+            mark_thread_read(proposal, self.request.user)
+
+        context = {
+            "current_page": "Переписка по обмену",
+            "proposal": proposal,
+            "thread": messages_page,
+            "form": form,
+            "older_cursor": encode_cursor(messages_page[0].created_at, messages_page[0].pk) if older else None,
+            "last_cursor": encode_cursor(messages_page[-1].created_at, messages_page[-1].pk) if messages_page else "",
+        }
+
+        return render(self.request, self.template_name, context)
+
+
 class ExchangeProposalDeleteView(LoginRequiredMixin, DeleteView):
     """Удаление предложения об обмене."""
 
@@ -314,36 +587,36 @@ class ExchangeProposalDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("ads:my-exchanges-list")
 
 
-class AdSearchListView(ListView):
+class SitemapView(View):
+    """Отдает индекс карты сайта и ее сжатые части, заранее записанные командой build_sitemaps."""
+
+    http_method_names = ["get", "head"]
+
+    def get(self, request, name=INDEX_NAME, *args, **kwargs):
+        return serve(request, name, settings.SITEMAP_ROOT)
+
+
+class AdSearchListView(RateLimitMixin, ListView):
     """Поиск по объявлениям с пагинацией(ищет в названии и описании)."""
 
     model = Ad
     template_name = "ads_search.html"
     context_object_name = "ads"
     paginate_by = 20
+    rate_limit_setting = "SEARCH_RATE_LIMIT"
 
     def get_queryset(self):
         """Полнотекстовый поиск, фильтрация по категории и состоянию товара."""
 
-        query = self.request.GET.get("query", "")
-        category = self.request.GET.get("category", "")
-        condition = self.request.GET.get("condition", "")
-
-        if self.request.user.is_authenticated:
-            queryset = Ad.objects.exclude(user=self.request.user)
-        else:
-            queryset = Ad.objects.all()
-
-        if query:
-            queryset = queryset.annotate(search=SearchVector("title", "description")).filter(search=SearchQuery(query))
-
-        if category:
-            queryset = queryset.filter(category=category)
-
-        if condition:
-            queryset = queryset.filter(condition=condition)
+        ids = search_ad_ids(
+            self.request.user,
+            query=self.request.GET.get("query", ""),
+            category=self.request.GET.get("category", ""),
+            condition=self.request.GET.get("condition", ""),
+            sort=self.request.GET.get("sort", ""),
+        )
 
-        return queryset
+        return AdIdList(ids)
 
     def get_context_data(self, **kwargs):
         """Передача названия текущей страницы, категорий и состояния товара в шаблон."""
@@ -354,3 +627,90 @@ class AdSearchListView(ListView):
         context["conditions"] = Ad.CONDITION_CHOICES
 
         return context
+
+
+class SavedSearchListView(LoginRequiredMixin, ListView):
+    """Сохраненные поиски пользователя с числом непросмотренных совпадений."""
+
+    model = SavedSearch
+    template_name = "saved_searches.html"
+    context_object_name = "searches"
+
+    def get_queryset(self):
+        """Поиски текущего пользователя, новые первыми."""
+
+        return (
+            SavedSearch.objects.filter(user=self.request.user)
+            .annotate(unread=Count("matches", filter=Q(matches__is_read=False, matches__ad__in=Ad.objects.all())))
+            .order_by("-created_at", "-id")
+        )
+
+    def get_context_data(self, **kwargs):
+        """Передача названия текущей страницы в шаблон."""
+
+        context = super().get_context_data(**kwargs)
+        context["current_page"] = "Сохраненные поиски"
+
+        return context
+
+
+class SavedSearchCreateView(LoginRequiredMixin, View):
+    """Сохранение текущего поиска (запрос, категория, состояние)."""
+
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            save_search(
+                request.user,
+                query=request.POST.get("query", ""),
+                category=request.POST.get("category", ""),
+                condition=request.POST.get("condition", ""),
+            )
+        except ValueError as error:
+            messages.error(request, str(error))
+
+        return HttpResponseRedirect(reverse("ads:saved-searches"))
+
+
+class SavedSearchDeleteView(LoginRequiredMixin, View):
+    """Удаление сохраненного поиска вместе с его совпадениями."""
+
+    http_method_names = ["post"]
+
+    def post(self, request, pk, *args, **kwargs):
+        get_object_or_404(SavedSearch, pk=pk, user=request.user).delete()
+
+        return HttpResponseRedirect(reverse("ads:saved-searches"))
+
+
+class SavedSearchInboxView(LoginRequiredMixin, ListView):
+    """Входящие: новые объявления по сохраненным поискам (параметр search — по одному поиску).
+
+    Показанные на странице совпадения отмечаются просмотренными.
+    """
+
+    model = SavedSearchMatch
+    template_name = "saved_search_inbox.html"
+    context_object_name = "matches"
+    paginate_by = 20
+
+    def get_queryset(self):
+        """Совпадения пользователя по опубликованным объявлениям, новые первыми."""
+
+        queryset = SavedSearchMatch.objects.filter(user=self.request.user, ad__in=Ad.objects.all())
+        if self.request.GET.get("search", "").isdigit():
+            queryset = queryset.filter(search_id=self.request.GET["search"])
+
+        return queryset.select_related("ad", "search").order_by("-created_at", "-id")
+
+    def get_context_data(self, **kwargs):
+        """Передача названия текущей страницы в шаблон и отметка показанных совпадений."""
+
+        context = super().get_context_data(**kwargs)
+        context["current_page"] = "Новые по сохраненным поискам"
+        unread = [match.pk for match in context["matches"] if not match.is_read]
+        if unread:
+            SavedSearchMatch.objects.filter(pk__in=unread).update(is_read=True)
+
+        return context
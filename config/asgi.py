@@ -5,3 +5,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+# события по обменам из других процессов (EXCHANGE_EVENTS_BACKEND = "postgres")
+from ads.notifications import start_listener  # noqa: E402
+
+start_listener()
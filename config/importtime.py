@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# что выполняет воркер при старте: настройка Django, WSGI-приложение и загрузка URLconf
+STARTUP_CODE = """
+import os
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+import config.{target}
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+
+class ImportRecord:
+    """Строка отчета python -X importtime: модуль, собственное и накопленное время (мкс), вложенность."""
+
+    def __init__(self, module, self_us, cumulative_us, depth):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+        self.children = []
+
+
+def parse_importtime(output):
+    """Разбирает вывод -X importtime в список записей и дерево импортов.
+
+    Python печатает модуль после всех его вложенных импортов, поэтому дерево собирается
+    стеком: записи глубже текущей становятся детьми следующей записи меньшей глубины.
+    Возвращает (записи, корни дерева).
+    """
+
+    records, pending = [], {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        record = ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth)
+        record.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(record)
+        records.append(record)
+
+    return records, pending.get(0, [])
+
+
+def profile_startup(target="wsgi", environment=None):
+    """Запускает старт проекта в отдельном интерпретаторе с -X importtime и возвращает (записи, корни).
+
+    environment — профиль настроек (ENVIRONMENT) для запуска, по умолчанию текущий.
+    """
+
+    env = dict(os.environ)
+    if environment:
+        env["ENVIRONMENT"] = environment
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE.format(target=target)],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_DIR,
+        env=env,
+    )
+    if result.returncode:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors) or "Ошибка запуска")
+
+    return parse_importtime(result.stderr)
@@ -0,0 +1,52 @@
+import threading
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр метрик процесса: счетчики и тайминги."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def increment(self, name, value=1):
+        """Увеличивает счетчик name на value."""
+
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Добавляет замер длительности в секундах к таймингу name."""
+
+        with self._lock:
+            timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def snapshot(self):
+        """Возвращает копию всех метрик в виде словаря (время в миллисекундах)."""
+
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {
+                    "count": count,
+                    "total_ms": round(total * 1000, 3),
+                    "avg_ms": round(total * 1000 / count, 3),
+                    "max_ms": round(maximum * 1000, 3),
+                }
+                for name, (count, total, maximum) in self._timings.items()
+            }
+
+        return {"counters": counters, "timings": timings}
+
+    def reset(self):
+        """Очищает все метрики."""
+
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,14 @@
+from django.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
+
+
+class GZipMiddleware(BaseGZipMiddleware):
+    """GZipMiddleware, который не трогает потоки Server-Sent Events.
+
+    Сжатие потокового ответа буферизует его, и короткие события доходили бы до клиента пачками.
+    """
+
+    def process_response(self, request, response):
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+
+        return super().process_response(request, response)
@@ -0,0 +1,365 @@
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from html import escape
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.base import Template
+
+from config.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# тайминги шаблонов текущего запроса: имя шаблона -> [количество, общее время, собственное время]
+_template_timings = contextvars.ContextVar("template_timings", default=None)
+# стек рендеринга текущего запроса: время, потраченное на вложенные шаблоны
+_template_stack = contextvars.ContextVar("template_stack", default=None)
+
+_original_render = None
+
+
+def _profiled_render(self, context):
+    """Замеряет время рендеринга шаблона, если запрос профилируется."""
+
+    timings = _template_timings.get()
+    if timings is None:
+        return _original_render(self, context)
+
+    stack = _template_stack.get()
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        name = self.origin.template_name or self.name or "<string>"
+        timing = timings.setdefault(name, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] += elapsed - children
+
+
+def install_template_profiler():
+    """Подменяет Template._render профилирующей оберткой (один раз на процесс)."""
+
+    global _original_render
+    if _original_render is None:
+        _original_render = Template._render
+        Template._render = _profiled_render
+
+
+class TemplateProfilingMiddleware:
+    """Собирает время рендеринга каждого шаблона и каждого {% include %} за запрос.
+
+    Общее время включает вложенные шаблоны, собственное — нет, поэтому медленный блок
+    виден по собственному времени. Результат пишется в метрики процесса,
+    а при DEBUG — в заголовок Server-Timing и в лог.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_profiler()
+
+    def __call__(self, request):
+        timings_token = _template_timings.set({})
+        stack_token = _template_stack.set([])
+        try:
+            response = self.get_response(request)
+            timings = _template_timings.get()
+        finally:
+            _template_timings.reset(timings_token)
+            _template_stack.reset(stack_token)
+
+        for name, (count, total, own) in timings.items():
+            metrics.observe(f"template.{name}", total)
+            metrics.observe(f"template.{name}.self", own)
+
+        if settings.DEBUG and timings:
+            response["Server-Timing"] = ", ".join(
+                f'tpl{index};desc="{name}";dur={total * 1000:.2f}'
+                for index, (name, (count, total, own)) in enumerate(timings.items())
+            )
+            for name, (count, total, own) in timings.items():
+                logger.debug(
+                    "Шаблон %s: %d раз, всего %.2f мс, собственное %.2f мс", name, count, total * 1000, own * 1000
+                )
+
+        return response
+
+
+class StackSampler:
+    """Семплирующий профилировщик: один фоновый поток раз в PROFILE_SAMPLE_INTERVAL снимает стеки
+    зарегистрированных потоков запросов через sys._current_frames().
+
+    Код запроса не инструментируется, поэтому замер почти не замедляет его; поток спит,
+    пока нет зарегистрированных запросов. Стек записывается в свернутом виде ("a;b;c")
+    от кадра root (вызов middleware) до текущего кадра.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # после fork поток семплирования родителя не наш
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="stack-sampler", daemon=True).start()
+
+    def start(self, root):
+        """Начинает семплировать текущий поток от кадра root. Возвращает Counter стеков, который будет заполняться."""
+
+        samples = Counter()
+        with self._lock:
+            self._ensure_thread()
+            self._active[threading.get_ident()] = (root, samples)
+            self._wakeup.set()
+
+        return samples
+
+    def stop(self):
+        """Прекращает семплировать текущий поток."""
+
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                self._wakeup.clear()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(settings.PROFILE_SAMPLE_INTERVAL)
+            with self._lock:
+                active = list(self._active.items())
+            frames = sys._current_frames()
+            for thread_id, (root, samples) in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[collapse_stack(frame, root)] += 1
+
+
+@functools.cache
+def _path_prefixes():
+    """Каталоги, относительно которых показываются файлы: BASE_DIR и sys.path (длинные первыми)."""
+
+    return (str(settings.BASE_DIR), *sorted((path for path in sys.path if path), key=len, reverse=True))
+
+
+# подпись считается один раз на объект кода: семплирование вызывает ее для каждого кадра раз в 5 мс
+@functools.lru_cache(maxsize=8192)
+def frame_label(code):
+    """Подпись кадра: функция и файл относительно BASE_DIR или site-packages."""
+
+    filename = code.co_filename
+    for prefix in _path_prefixes():
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1 :]
+            break
+
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse_stack(frame, root=None):
+    """Стек от root (или от начала потока) до frame в свернутом формате: кадры через ";"."""
+
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        if frame is root:
+            break
+        frame = frame.f_back
+
+    return ";".join(reversed(labels))
+
+
+sampler = StackSampler()
+
+
+class SlowRequestProfilingMiddleware:
+    """Сохраняет профиль медленных запросов и запросов, которые персонал попросил профилировать.
+
+    При SLOW_REQUEST_PROFILING каждый запрос семплируется (StackSampler), и если он шел дольше
+    SLOW_REQUEST_THRESHOLD секунд, стеки сохраняются в PROFILES_DIR в свернутом формате
+    (flamegraph.pl, speedscope, команда profiles). Персонал может включить профиль для одного
+    запроса параметром ?_profile=1 или заголовком X-Profile: 1, а со значением cprofile — еще
+    и профиль cProfile (.prof) всех вызовов. Хранится не больше PROFILES_KEEP последних профилей.
+    Стоит после AuthenticationMiddleware: для флага нужен request.user. Асинхронные запросы (ASGI)
+    пропускаются без профиля: семплер снимает стеки потоков, а корутины делят поток цикла событий.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        flag = request.GET.get("_profile") or request.headers.get("X-Profile")
+        forced = flag if flag and request.user.is_staff else None
+        if not (forced or settings.SLOW_REQUEST_PROFILING):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile() if forced == "cprofile" else None
+        samples = sampler.start(sys._getframe())
+        start = time.perf_counter()
+        try:
+            if profiler:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+
+        if forced or elapsed >= settings.SLOW_REQUEST_THRESHOLD:
+            name = save_profile(request, elapsed, samples, profiler)
+            metrics.increment("profiles.saved")
+            logger.info("Профиль запроса %s %s (%.0f мс): %s", request.method, request.path, elapsed * 1000, name)
+
+        return response
+
+
+def save_profile(request, elapsed, samples, profiler=None):
+    """Записывает профиль запроса в PROFILES_DIR и удаляет старые сверх PROFILES_KEEP. Возвращает имя файла."""
+
+    directory = settings.PROFILES_DIR
+    os.makedirs(directory, exist_ok=True)
+    match = getattr(request, "resolver_match", None)
+    view = re.sub(r"[^\w.-]+", "_", match.view_name if match else request.path.strip("/") or "root")
+    stem = f"{datetime.now():%Y%m%dT%H%M%S%f}-{view}-{elapsed * 1000:.0f}ms-{os.getpid()}"
+
+    path = os.path.join(directory, stem + ".collapsed")
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        # строки "# " — описание запроса; программы для flamegraph их пропускают
+        file.write(f"# {request.method} {request.get_full_path()}\n# {elapsed * 1000:.1f} ms\n")
+        for stack, count in samples.most_common():
+            file.write(f"{stack} {count}\n")
+    os.replace(path + ".tmp", path)
+    if profiler:
+        profiler.dump_stats(os.path.join(directory, stem + ".prof"))
+
+    prune_profiles(directory, settings.PROFILES_KEEP)
+
+    return stem + ".collapsed"
+
+
+def list_profiles(directory):
+    """Профили в каталоге, новые первыми: имена .collapsed-файлов."""
+
+    if not os.path.isdir(directory):
+        return []
+
+    return sorted((name for name in os.listdir(directory) if name.endswith(".collapsed")), reverse=True)
+
+
+def prune_profiles(directory, keep):
+    """Оставляет keep последних профилей (вместе с их .prof)."""
+
+    for name in list_profiles(directory)[keep:]:
+        stem = name[: -len(".collapsed")]
+        for extension in (".collapsed", ".prof"):
+            try:
+                os.remove(os.path.join(directory, stem + extension))
+            except FileNotFoundError:
+                pass
+
+
+def read_collapsed(path):
+    """Читает свернутые стеки: (строки описания, Counter стеков)."""
+
+    header, stacks = [], Counter()
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if line.startswith("# "):
+                header.append(line[2:])
+            elif line:
+                stack, _, count = line.rpartition(" ")
+                stacks[stack] += int(count)
+
+    return header, stacks
+
+
+def frame_totals(stacks):
+    """Для каждого кадра: (собственные семплы, семплы с этим кадром в стеке)."""
+
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+
+    return own, total
+
+
+def render_flamegraph(stacks, title="", width=1200, row_height=16):
+    """SVG flamegraph из свернутых стеков: ширина прямоугольника — доля семплов, снизу вверх — вложенность."""
+
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for frame in stack.split(";"):
+            entry = node.setdefault(frame, [0, {}])
+            entry[0] += count
+            node = entry[1]
+
+    total = sum(stacks.values()) or 1
+    rects = []
+
+    def layout(node, x, depth):
+        for frame, (count, children) in sorted(node.items()):
+            rects.append((frame, count, x, depth))
+            layout(children, x, depth + 1)
+            x += count
+
+    layout(tree, 0, 0)
+    depth = max((rect[3] for rect in rects), default=0) + 1
+    height = (depth + 2) * row_height
+    scale = width / total
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" '
+        f'font-size="{row_height - 5}">',
+        f'<text x="4" y="{row_height - 4}">{escape(title)}</text>',
+    ]
+    for frame, count, x, level in rects:
+        rect_width = count * scale
+        if rect_width < 0.5:
+            continue
+        y = height - (level + 1) * row_height
+        # цвет зависит от имени кадра, чтобы одна функция была одного цвета на всем графике
+        hue = zlib.crc32(frame.encode()) % 60
+        label = escape(f"{frame} — {count} ({count * 100 / total:.1f}%)")
+        parts.append(
+            f'<g><title>{label}</title><rect x="{x * scale:.1f}" y="{y}" width="{rect_width:.1f}" '
+            f'height="{row_height - 1}" fill="hsl({hue}, 85%, 60%)"/>'
+        )
+        characters = int(rect_width // (row_height * 0.6))
+        if characters > 3:
+            text = frame if len(frame) <= characters else frame[: characters - 2] + ".."
+            parts.append(f'<text x="{x * scale + 2:.1f}" y="{y + row_height - 5}">{escape(text)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+
+    return "\n".join(parts)
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_rate(rate):
+    """Разбирает строку вида "30/m" в (емкость корзины, секунд на полное восполнение)."""
+
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+class LocMemRateLimiter:
+    """Token bucket на ключ (IP или пользователь), хранящийся в памяти процесса.
+
+    Корзина вмещает capacity токенов и восполняется равномерно за period секунд,
+    поэтому допускает всплеск до capacity запросов, а в среднем — capacity за period.
+    Число корзин ограничено max_keys: давно неиспользуемые вытесняются.
+    """
+
+    def __init__(self, capacity, period, max_keys=10000):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, tokens=1):
+        """Забирает токены из корзины key. Возвращает False, если лимит исчерпан."""
+
+        now = time.monotonic()
+        with self._lock:
+            available, updated_at = self._buckets.pop(key, (self.capacity, now))
+            available = min(self.capacity, available + (now - updated_at) * self.refill_rate)
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            self._buckets[key] = (available, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed
+
+    def retry_after(self, tokens=1):
+        """Через сколько секунд в пустой корзине накопится tokens токенов."""
+
+        return tokens / self.refill_rate
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(rate):
+    """Возвращает общий для процесса ограничитель для строки лимита rate."""
+
+    with _limiters_lock:
+        if rate not in _limiters:
+            _limiters[rate] = LocMemRateLimiter(*parse_rate(rate))
+        return _limiters[rate]
@@ -0,0 +1,251 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.wsgi import get_path_info
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+
+BLOCK_SIZE = 64 * 1024
+
+# имена с хешем содержимого: manifest-статика (style.0123456789ab.css) и изображения объявлений (ab/<sha256>.jpg)
+HASHED_NAME = re.compile(r"(\.[0-9a-f]{12}\.[^/.]+$|(^|/)[0-9a-f]{64}\.[^/.]+$)")
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "public, max-age=0, must-revalidate"
+
+# заранее сжатые копии (config.storage) в порядке предпочтения
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+COMPRESSED_TYPES = {"gzip": "application/gzip", "br": "application/x-brotli", "bzip2": "application/x-bzip2"}
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileResult:
+    """Результат разбора запроса к файлу: статус, заголовки и какую часть какого файла отдать."""
+
+    def __init__(self, status, headers, path=None, start=0, length=0):
+        self.status = status
+        self.headers = headers
+        self.path = path
+        self.start = start
+        self.length = length
+
+
+def prepare_file(root, name, environ, precompressed=False):
+    """Разбирает запрос к файлу name в каталоге root по WSGI-окружению (или request.META).
+
+    Поддерживает If-None-Match/If-Modified-Since (304), один диапазон Range (206/416),
+    заранее сжатые .br/.gz копии и вечное кеширование имен с хешем. Возвращает None,
+    если файла нет.
+    """
+
+    try:
+        path = safe_join(root, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    content_type, encoding = mimetypes.guess_type(path)
+    if encoding:
+        # сжатый файл (например, sitemap-….xml.gz) отдается как архив, а не как его содержимое
+        content_type = COMPRESSED_TYPES.get(encoding, "application/octet-stream")
+    headers = {
+        "Content-Type": content_type or "application/octet-stream",
+        "Cache-Control": CACHE_IMMUTABLE if HASHED_NAME.search(name) else CACHE_REVALIDATE,
+        "X-Content-Type-Options": "nosniff",
+        "Accept-Ranges": "bytes",
+    }
+
+    range_header = environ.get("HTTP_RANGE")
+    suffix = ""
+    if precompressed:
+        headers["Vary"] = "Accept-Encoding"
+        if not range_header:
+            accepted = environ.get("HTTP_ACCEPT_ENCODING", "")
+            for content_encoding, extension in ENCODINGS:
+                if content_encoding in accepted and os.path.isfile(path + extension):
+                    path, suffix = path + extension, extension
+                    headers["Content-Encoding"] = content_encoding
+                    break
+
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{suffix}"'
+    headers["ETag"] = etag
+    headers["Last-Modified"] = formatdate(stat.st_mtime, usegmt=True)
+
+    if not_modified(environ, etag, stat.st_mtime):
+        return FileResult(HTTPStatus.NOT_MODIFIED, headers)
+
+    size = stat.st_size
+    if range_header and environ.get("HTTP_IF_RANGE", etag) == etag:
+        byte_range = parse_range(range_header, size)
+        if byte_range is False:
+            headers["Content-Range"] = f"bytes */{size}"
+            headers["Content-Length"] = "0"
+            return FileResult(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return FileResult(HTTPStatus.PARTIAL_CONTENT, headers, path, start, end - start + 1)
+
+    headers["Content-Length"] = str(size)
+    return FileResult(HTTPStatus.OK, headers, path, 0, size)
+
+
+def not_modified(environ, etag, mtime):
+    """Проверяет условные заголовки запроса: клиент уже имеет актуальную версию файла."""
+
+    if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+    if_modified_since = environ.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает (начало, конец) включительно, False для невыполнимого диапазона
+    и None, если заголовок не поддерживается (тогда отдается весь файл).
+    """
+
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # суффиксный диапазон: последние N байт
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+
+    return start, end
+
+
+class RangeFile:
+    """Файлоподобный объект, читающий length байт файла начиная с start."""
+
+    def __init__(self, path, start, length):
+        self.file = open(path, "rb")
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class FileServingMiddleware:
+    """WSGI-обертка, которая отдает медиа и статику до Django, минуя весь стек middleware.
+
+    Полные файлы отдаются через wsgi.file_wrapper (sendfile в gunicorn/uwsgi),
+    диапазоны — чтением нужной части. Если файла нет, запрос передается приложению.
+    """
+
+    def __init__(self, application, mounts):
+        self.application = application
+        self.mounts = mounts
+
+    def __call__(self, environ, start_response):
+        method = environ.get("REQUEST_METHOD")
+        if method in ("GET", "HEAD"):
+            path_info = get_path_info(environ)
+            for prefix, root, precompressed in self.mounts:
+                if path_info.startswith(prefix):
+                    result = prepare_file(root, path_info[len(prefix) :], environ, precompressed)
+                    if result is not None:
+                        return self.respond(result, environ, start_response, method)
+
+        return self.application(environ, start_response)
+
+    @staticmethod
+    def respond(result, environ, start_response, method):
+        status = HTTPStatus(result.status)
+        start_response(f"{status.value} {status.phrase}", list(result.headers.items()))
+        if method == "HEAD" or result.path is None:
+            return []
+
+        if result.status == HTTPStatus.OK:
+            file = open(result.path, "rb")
+            if "wsgi.file_wrapper" in environ:
+                return environ["wsgi.file_wrapper"](file, BLOCK_SIZE)
+        else:
+            file = RangeFile(result.path, result.start, result.length)
+
+        return _iter_file(file)
+
+
+def _iter_file(file):
+    """Читает файл блоками и закрывает его по окончании."""
+
+    try:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b""):
+            yield block
+    finally:
+        file.close()
+
+
+def file_mounts():
+    """Каталоги, которые раздаются напрямую: медиа всегда, статика — если включено SERVE_STATIC."""
+
+    mounts = [(settings.MEDIA_URL, settings.MEDIA_ROOT, False)]
+    if settings.SERVE_STATIC:
+        mounts.append((settings.STATIC_URL, settings.STATIC_ROOT, True))
+
+    return mounts
+
+
+def serve(request, path, document_root, precompressed=False):
+    """Django-представление поверх той же логики — для ASGI и тестового клиента."""
+
+    result = prepare_file(document_root, path, request.META, precompressed)
+    if result is None:
+        raise Http404("Файл не найден")
+
+    if result.path is None or request.method == "HEAD":
+        response = HttpResponse(status=result.status)
+    elif result.status == HTTPStatus.OK:
+        response = FileResponse(open(result.path, "rb"), status=result.status)
+    else:
+        response = FileResponse(RangeFile(result.path, result.start, result.length), status=result.status)
+
+    for header, value in result.headers.items():
+        response[header] = value
+
+    return response
+
+
+def serve_media(request, path):
+    """Отдает файл из MEDIA_ROOT."""
+
+    return serve(request, path, settings.MEDIA_ROOT)
+
+
+def serve_static(request, path):
+    """Отдает собранную статику из STATIC_ROOT с заранее сжатыми копиями."""
+
+    return serve(request, path, settings.STATIC_ROOT, precompressed=True)
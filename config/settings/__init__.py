@@ -0,0 +1,18 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# профиль окружения: dev, test или prod; при запуске тестов без явного значения выбирается test
+ENVIRONMENT = os.getenv("ENVIRONMENT") or ("test" if sys.argv[1:2] == ["test"] else "dev")
+
+if ENVIRONMENT == "prod":
+    from config.settings.prod import *  # noqa: F401,F403
+elif ENVIRONMENT == "test":
+    from config.settings.test import *  # noqa: F401,F403
+elif ENVIRONMENT == "dev":
+    from config.settings.dev import *  # noqa: F401,F403
+else:
+    raise ValueError(f"Неизвестное окружение ENVIRONMENT={ENVIRONMENT!r}, ожидается dev, test или prod")
@@ -0,0 +1,208 @@
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env_bool(name, default=False):
+    """Читает логическое значение из переменной окружения."""
+
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+SECRET_KEY = os.getenv("SECRET_KEY") or "django-insecure-iox&4ei5$a)z_=n09ruc$==#=mgrb6_cjdkxt)ss%r76_h(^hw"
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["*"]
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "crispy_forms",
+    "ads",
+    "users",
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.profiling.SlowRequestProfilingMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+# профилирование рендеринга шаблонов, значение по умолчанию задает профиль окружения
+TEMPLATE_PROFILING = False
+
+# профили медленных запросов (config.profiling.SlowRequestProfilingMiddleware): семплировать все запросы
+# и сохранять стеки тех, что дольше порога (с); персонал может запросить профиль флагом ?_profile=1
+SLOW_REQUEST_PROFILING = env_bool("SLOW_REQUEST_PROFILING", False)
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD") or 1.0)
+# интервал семплирования стеков (с), каталог профилей и сколько последних хранить
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILES_DIR = os.getenv("PROFILES_DIR") or os.path.join(BASE_DIR, "profiles")
+PROFILES_KEEP = 200
+
+ROOT_URLCONF = "config.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "config.wsgi.application"
+
+CRISPY_TEMPLATE_PACK = "bootstrap4"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "NAME": os.getenv("NAME"),
+        "USER": os.getenv("USER"),
+        "PASSWORD": os.getenv("PASSWORD"),
+        "HOST": os.getenv("HOST"),
+        "PORT": os.getenv("PORT"),
+        # время жизни соединения в секундах (0 - новое соединение на каждый запрос)
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE") or 0),
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+# хешер новых паролей: pbkdf2, scrypt или argon2 (нужен пакет argon2-cffi). Остальные остаются
+# в списке, чтобы старые хеши проверялись и при входе перехешировались выбранным хешером
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER") or "pbkdf2"
+PASSWORD_HASHER_PATHS = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+}
+if PASSWORD_HASHER not in PASSWORD_HASHER_PATHS:
+    raise ImproperlyConfigured(f"PASSWORD_HASHER должен быть одним из: {', '.join(PASSWORD_HASHER_PATHS)}")
+if PASSWORD_HASHER == "argon2" and find_spec("argon2") is None:
+    raise ImproperlyConfigured("Для PASSWORD_HASHER=argon2 установите пакет argon2-cffi")
+PASSWORD_HASHERS = (
+    [PASSWORD_HASHER_PATHS[PASSWORD_HASHER]]
+    + [path for name, path in PASSWORD_HASHER_PATHS.items() if name != PASSWORD_HASHER]
+    + ["django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher"]
+)
+
+# проверка паролей при входе идет в пуле потоков: число потоков и сколько входов может
+# ждать очереди сверх них (остальные сразу получают 503); лимит попыток входа на аккаунт
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1)
+PASSWORD_HASH_MAX_PENDING = 64
+LOGIN_RATE_LIMIT = "10/m"
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+# перенаправление после входа
+LOGIN_REDIRECT_URL = "ads:home"
+# перенаправление после выхода
+LOGOUT_REDIRECT_URL = "users:login"
+
+# перенаправление на страницу авторизации при ограничении доступа только для авторизованных пользователей
+LOGIN_URL = "users:login"
+
+STATIC_URL = "/static/"
+STATICFILES_DIRS = (BASE_DIR / "static",)
+STATIC_ROOT = os.getenv("STATIC_ROOT") or os.path.join(BASE_DIR, "staticfiles")
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# карта сайта: каталог сжатых частей (их пишет build_sitemaps), адрес сайта для абсолютных ссылок
+# и число ссылок в части (не больше 50 000 по протоколу sitemaps)
+SITEMAP_ROOT = os.getenv("SITEMAP_ROOT") or os.path.join(BASE_DIR, "sitemaps")
+SITEMAP_BASE_URL = os.getenv("SITEMAP_BASE_URL", "http://localhost:8000").rstrip("/")
+SITEMAP_CHUNK_SIZE = 50000
+
+# раздача медиа (и статики при SERVE_STATIC) самим приложением, см. config/serving.py
+SERVE_FILES = env_bool("SERVE_FILES", True)
+SERVE_STATIC = False
+
+AUTH_USER_MODEL = "users.User"
+
+# request.user загружается из кеша, запись сбрасывается при сохранении пользователя
+AUTHENTICATION_BACKENDS = ["users.backends.CachedModelBackend"]
+USER_CACHE_TIMEOUT = 300
+
+# поиск объявлений: время кеширования результатов (с), максимум результатов и лимит запросов на клиента
+SEARCH_CACHE_TIMEOUT = 30
+SEARCH_MAX_RESULTS = 1000
+SEARCH_RATE_LIMIT = "30/m"
+# сколько поисков может сохранить пользователь
+SAVED_SEARCHES_LIMIT = 20
+
+# срок публикации объявления (дни); истекшие снимает команда expire_ads, владелец может продлить
+AD_LIFETIME_DAYS = 30
+# сколько фотографий можно загрузить в галерею объявления
+AD_IMAGES_LIMIT = 10
+# секционирование таблицы объявлений: "category" (LIST по категории), "month" (RANGE по месяцу created_at)
+# или пусто; большую таблицу переводит команда partition_ads, см. ads/partitioning.py
+AD_PARTITION_BY = os.getenv("AD_PARTITION_BY", "")
+
+# просмотры объявлений копятся в памяти процесса и записываются раз в интервал (с)
+# или раньше, когда в буфере накопилось столько объявлений
+AD_VIEWS_FLUSH_INTERVAL = 10
+AD_VIEWS_MAX_PENDING = 10000
+# столько неудачных сбросов подряд просмотры ждут в буфере, затем отбрасываются: пока БД недоступна,
+# буфер не растет без предела
+AD_VIEWS_FLUSH_RETRIES = 5
+
+# события по обменам (SSE): "local" — в пределах процесса, "postgres" — между процессами через LISTEN/NOTIFY;
+# интервал пинга открытого потока и задержка переподключения клиента (с)
+EXCHANGE_EVENTS_BACKEND = os.getenv("EXCHANGE_EVENTS_BACKEND") or "local"
+EXCHANGE_EVENTS_HEARTBEAT = 15
+EXCHANGE_EVENTS_RETRY = 3
+
+# сессии читаются из кеша, запись идет и в кеш, и в БД
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
@@ -0,0 +1,9 @@
+from config.settings.base import *  # noqa: F401,F403
+from config.settings.base import MIDDLEWARE, env_bool
+
+DEBUG = True
+
+TEMPLATE_PROFILING = env_bool("TEMPLATE_PROFILING", True)
+
+if TEMPLATE_PROFILING:
+    MIDDLEWARE = ["config.profiling.TemplateProfilingMiddleware", *MIDDLEWARE]
@@ -0,0 +1,67 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from config.settings.base import *  # noqa: F401,F403
+from config.settings.base import BASE_DIR, DATABASES, MIDDLEWARE, TEMPLATES, env_bool
+
+DEBUG = False
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    raise ImproperlyConfigured("В профиле prod переменная SECRET_KEY обязательна")
+
+ALLOWED_HOSTS = [host.strip() for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host.strip()]
+
+TEMPLATE_PROFILING = env_bool("TEMPLATE_PROFILING", False)
+
+# сжатие ответов; стоит первым, чтобы сжимать результат всех остальных middleware
+MIDDLEWARE = ["config.middleware.GZipMiddleware", *MIDDLEWARE]
+
+if TEMPLATE_PROFILING:
+    MIDDLEWARE = ["config.profiling.TemplateProfilingMiddleware", *MIDDLEWARE]
+
+# шаблоны читаются с диска и компилируются один раз на процесс
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    ),
+]
+
+# постоянные соединения с БД вместо нового соединения на каждый запрос
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("CONN_MAX_AGE") or 600)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# общий для всех процессов кеш: Redis, если задан REDIS_URL, иначе файловый
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, ".cache"),
+        }
+    }
+
+# статика отдается приложением из STATIC_ROOT, внешний веб-сервер не обязателен
+SERVE_STATIC = env_bool("SERVE_STATIC", True)
+
+# статика с хешами в именах и заранее сжатыми .gz/.br копиями (нужен collectstatic)
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "config.storage.CompressedManifestStaticFilesStorage",
+    },
+}
@@ -0,0 +1,16 @@
+from config.settings.base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# быстрый хешер: в тестах стойкость паролей не важна, а PBKDF2 замедляет каждый create_user и login
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+# кеш и лимит поиска включаются в тестах явно через override_settings
+SEARCH_CACHE_TIMEOUT = 0
+SEARCH_RATE_LIMIT = None
+LOGIN_RATE_LIMIT = None
+
+# без фонового потока: тесты сбрасывают буфер просмотров сами
+AD_VIEWS_FLUSH_INTERVAL = None
@@ -0,0 +1,52 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest-хранилище статики, которое рядом с каждым файлом сохраняет сжатые .gz и .br копии.
+
+    Копии создаются один раз при collectstatic, поэтому при раздаче статики не нужно
+    сжимать ответы на лету. Brotli используется, только если установлен пакет brotli.
+    """
+
+    compressible_extensions = (".css", ".js", ".svg", ".html", ".txt", ".json", ".xml", ".map")
+    # файлы меньше этого размера не сжимаются: выигрыш меньше накладных расходов
+    min_size = 256
+    # копия сохраняется, только если она меньше оригинала хотя бы на 5%
+    max_ratio = 0.95
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in self.compressible_extensions:
+                self.compress(name)
+
+    def compress(self, name):
+        """Создает сжатые копии файла name."""
+
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < self.min_size:
+            return
+
+        compressors = [(".gz", lambda content: gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            compressors.append((".br", lambda content: brotli.compress(content, quality=11)))
+
+        for suffix, compressor in compressors:
+            compressed = compressor(data)
+            if len(compressed) <= len(data) * self.max_ratio:
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
@@ -1,10 +1,20 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from config.serving import serve_media, serve_static
+from config.views import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view, name="metrics"),
     path("", include("ads.urls", namespace="ads")),
     path("", include("users.urls", namespace="users")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+# под WSGI файлы отдает FileServingMiddleware (config/wsgi.py), эти маршруты нужны для ASGI и runserver
+if settings.SERVE_FILES:
+    urlpatterns.append(re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"))
+
+if settings.SERVE_FILES and settings.SERVE_STATIC:
+    urlpatterns.append(re_path(rf"^{settings.STATIC_URL.lstrip('/')}(?P<path>.+)$", serve_static, name="static"))
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+
+from config.metrics import metrics
+
+
+def metrics_view(request):
+    """Метрики процесса в JSON (доступны персоналу или при DEBUG)."""
+
+    if not (settings.DEBUG or request.user.is_staff):
+        raise PermissionDenied
+
+    return JsonResponse(metrics.snapshot())
@@ -5,3 +5,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from config.serving import FileServingMiddleware, file_mounts  # noqa: E402
+
+if settings.SERVE_FILES:
+    # медиа и статика отдаются до Django, без прохода через middleware
+    application = FileServingMiddleware(application, file_mounts())
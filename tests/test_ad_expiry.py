@@ -0,0 +1,77 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad
+from ads.search import search_ad_ids
+from users.models import User
+
+
+class AdExpiryTest(TestCase):
+    """Тест срока публикации объявлений и команды expire_ads."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@mail.ru", password="testpass")
+        self.viewer = User.objects.create_user(email="viewer@mail.ru", password="testpass")
+        past = timezone.now() - timedelta(minutes=1)
+        self.due = Ad.objects.bulk_create(
+            Ad(title=f"Старый велосипед {i}", description="", user=self.owner, expires_at=past) for i in range(5)
+        )
+        self.active = Ad.objects.create(title="Новый велосипед", description="", user=self.owner)
+
+    def expire(self, batch_size=1000):
+        out = io.StringIO()
+        call_command("expire_ads", batch_size=batch_size, stdout=out)
+        return out.getvalue()
+
+    def test_new_ad_gets_lifetime(self):
+        """Тест проверяет, что новое объявление публикуется AD_LIFETIME_DAYS дней."""
+
+        self.assertAlmostEqual(self.active.expires_at, timezone.now() + timedelta(days=30), delta=timedelta(minutes=1))
+
+    def test_expire_ads_hides_due_ads_in_batches(self):
+        """Тест проверяет, что команда пачками снимает истекшие объявления из списков и поиска."""
+
+        output = self.expire(batch_size=2)
+
+        self.assertIn("Снято с публикации: 5", output)
+        self.assertEqual(list(Ad.objects.all()), [self.active])
+        self.assertEqual(Ad.with_expired.filter(expired_at__isnull=False).count(), 5)
+        self.assertEqual(search_ad_ids(self.viewer, "велосипед"), [self.active.pk])
+
+        self.client.force_login(self.viewer)
+        response = self.client.get(reverse("ads:ads-list"))
+        self.assertEqual(list(response.context["ads"]), [self.active])
+        response = self.client.get(reverse("ads:ad-detail", kwargs={"pk": self.due[0].pk}))
+        self.assertEqual(response.status_code, 404)
+
+        self.assertIn("Снято с публикации: 0", self.expire())
+
+    def test_owner_sees_and_renews_expired_ads(self):
+        """Тест проверяет, что владелец видит истекшие объявления в «Моих объявлениях» и может их продлить."""
+
+        self.expire()
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse("ads:ads-mylist"))
+        self.assertEqual(len(response.context["ads"]), 6)
+        self.assertContains(response, "Снято с публикации", count=5)
+
+        response = self.client.post(reverse("ads:ad-renew", kwargs={"pk": self.due[0].pk}))
+        self.assertRedirects(response, reverse("ads:ads-mylist"), fetch_redirect_response=False)
+
+        renewed = Ad.objects.get(pk=self.due[0].pk)
+        self.assertIsNone(renewed.expired_at)
+        self.assertGreater(renewed.expires_at, timezone.now() + timedelta(days=29))
+
+    def test_only_owner_can_renew(self):
+        """Тест проверяет, что продлить чужое объявление нельзя."""
+
+        self.client.force_login(self.viewer)
+        response = self.client.post(reverse("ads:ad-renew", kwargs={"pk": self.active.pk}))
+
+        self.assertEqual(response.status_code, 404)
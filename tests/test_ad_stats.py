@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ads.counters import BufferedViewCounter, ad_views
+from ads.models import Ad, AdStats
+from users.models import User
+
+
+class AdViewCounterTest(TestCase):
+    """Тест буферизованного счетчика просмотров объявлений."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        self.ad = Ad.objects.create(title="Тест", user=self.user)
+        self.other_ad = Ad.objects.create(title="Чужое", user=self.other_user)
+        ad_views.flush()
+
+    def test_flush_batches_increments(self):
+        """Тест проверяет, что просмотры копятся в памяти и записываются одним запросом с прибавлением."""
+
+        counter = BufferedViewCounter()
+        for _ in range(3):
+            counter.increment(self.ad.pk)
+        counter.increment(self.other_ad.pk)
+        counter.increment(10**9)  # объявления уже нет в БД
+
+        self.assertFalse(AdStats.objects.exists())
+        with self.assertNumQueries(3):  # SAVEPOINT, INSERT ... ON CONFLICT, RELEASE SAVEPOINT
+            self.assertEqual(counter.flush(), 3)
+        counter.increment(self.ad.pk, 2)
+        counter.flush()
+
+        self.assertEqual(dict(AdStats.objects.values_list("ad_id", "views")), {self.ad.pk: 5, self.other_ad.pk: 1})
+        self.assertEqual(counter.flush(), 0)
+
+    @override_settings(AD_VIEWS_FLUSH_RETRIES=2)
+    def test_failed_flushes_keep_then_drop_views(self):
+        """Тест проверяет, что при недоступной БД просмотры ждут в буфере ограниченное число сбросов."""
+
+        counter = BufferedViewCounter()
+        counter.increment(self.ad.pk)
+
+        with mock.patch("ads.counters.connection.cursor", side_effect=OperationalError), self.assertLogs(
+            "ads.counters"
+        ):
+            for _ in range(3):
+                with self.assertRaises(OperationalError):
+                    counter.flush()
+                counter.increment(self.ad.pk)
+
+        # просмотры первых трех сбросов отброшены, остался только последний
+        self.assertEqual(counter.flush(), 1)
+        self.assertEqual(AdStats.objects.get(ad=self.ad).views, 1)
+
+    def test_detail_view_counts_and_popular_sort(self):
+        """Тест проверяет учет просмотров на странице объявления, сортировку по популярности и статистику продавца."""
+
+        newer_ad = Ad.objects.create(title="Новое", user=self.user)
+        self.client.login(email="other@mail.ru", password="otherpass")
+        self.client.get(reverse("ads:ad-detail", kwargs={"pk": self.ad.pk}))
+        self.client.get(reverse("ads:ad-detail", kwargs={"pk": self.ad.pk}))
+        # просмотры владельцем не считаются
+        self.client.get(reverse("ads:ad-detail", kwargs={"pk": self.other_ad.pk}))
+        ad_views.flush()
+
+        self.assertEqual(AdStats.objects.get(ad=self.ad).views, 2)
+        self.assertFalse(AdStats.objects.filter(ad=self.other_ad).exists())
+
+        response = self.client.get(reverse("ads:ads-list"), {"sort": "popular"})
+        self.assertEqual(list(response.context["ads"]), [self.ad, newer_ad])
+
+        response = self.client.get(reverse("ads:search-ads"), {"sort": "popular"})
+        self.assertEqual(list(response.context["ads"]), [self.ad, newer_ad])
+
+        response = self.client.get(reverse("users:personal-account", kwargs={"pk": self.user.pk}))
+        self.assertEqual(response.context["stats"]["ads"], 2)
+        self.assertEqual(response.context["stats"]["views"], 2)
+        self.assertEqual(response.context["stats"]["popular"][0], self.ad)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad, ExchangeProposal
+from users.models import User
+
+
+class AdListApiViewTest(TestCase):
+    """Тест JSON API объявлений."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        now = timezone.now()
+        self.ads = []
+        for i in range(5):
+            ad = Ad.objects.create(title=f"Книга {i}", user=self.user, category="книги", condition="новый")
+            self.ads.append(ad)
+        Ad.objects.create(title="Куртка", user=self.user, category="одежда", condition="б/у")
+        # одинаковое время создания у части объявлений: курсор должен различать их по id
+        Ad.objects.filter(pk__in=[ad.pk for ad in self.ads[:3]]).update(created_at=now - timedelta(days=1))
+        self.url = reverse("ads:api-ads")
+
+    def test_cursor_pagination_with_sparse_fields(self):
+        """Тест проверяет, что курсор проходит всю выдачу без пропусков и повторов, а поля выбираются по запросу."""
+
+        seen, cursor = [], None
+        while True:
+            params = {"fields": "id,title", "limit": 2, "category": "книги"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(self.url, params).json()
+            self.assertTrue(all(set(row) == {"id", "title"} for row in data["results"]))
+            seen += [row["id"] for row in data["results"]]
+            cursor = data["next"]
+            if not cursor:
+                break
+
+        expected = list(
+            Ad.objects.filter(category="книги").order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_filters_and_errors(self):
+        """Тест проверяет фильтры поиска и ответы на некорректные параметры."""
+
+        data = self.client.get(self.url, {"query": "куртка"}).json()
+        self.assertEqual([row["title"] for row in data["results"]], ["Куртка"])
+        self.assertIsNone(data["results"][0]["image_url"])
+
+        self.assertEqual(self.client.get(self.url, {"fields": "id,password"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"cursor": "мусор"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": "x"}).status_code, 400)
+
+    def test_own_ads_are_excluded_for_authenticated_user(self):
+        """Тест проверяет, что, как и страница поиска, API не показывает пользователю его же объявления."""
+
+        other = User.objects.create_user(email="other@mail.ru", password="testpass")
+        jacket = Ad.objects.create(title="Куртка", user=other, category="одежда", condition="новый")
+
+        self.client.force_login(other)
+        data = self.client.get(self.url, {"query": "куртка", "fields": "id"}).json()
+
+        self.assertNotIn(jacket.pk, [row["id"] for row in data["results"]])
+        self.assertEqual(len(data["results"]), 1)
+
+
+class ExchangeProposalListApiViewTest(TestCase):
+    """Тест JSON API предложений обмена."""
+
+    def test_lists_only_users_proposals(self):
+        """Тест проверяет, что пользователь видит только обмены со своими объявлениями."""
+
+        user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        other = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        third = User.objects.create_user(email="third@mail.ru", password="thirdpass")
+        ad, other_ad, third_ad = (Ad.objects.create(title="Тест", user=owner) for owner in (user, other, third))
+        mine = ExchangeProposal.objects.create(owner=other, ad_sender=ad, ad_receiver=other_ad)
+        ExchangeProposal.objects.create(owner=third, ad_sender=other_ad, ad_receiver=third_ad)
+        url = reverse("ads:api-exchange-proposals")
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+        data = self.client.get(url, {"status": ExchangeProposal.STATUS_PENDING}).json()
+
+        self.assertEqual([row["id"] for row in data["results"]], [mine.pk])
+        self.assertEqual(data["results"][0]["ad_sender_id"], ad.pk)
+        self.assertIsNone(data["next"])
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad, ArchivedExchangeProposal, ExchangeProposal
+from users.models import User
+
+
+class AdSoftDeleteTest(TestCase):
+    """Тест мягкого удаления объявлений."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        self.client.login(email="testuser@mail.ru", password="testpass")
+
+        self.ad = Ad.objects.create(title="Тест", user=self.user)
+        self.other_ad = Ad.objects.create(title="Чужое", user=self.other_user)
+        self.proposal = ExchangeProposal.objects.create(
+            owner=self.other_user, ad_sender=self.ad, ad_receiver=self.other_ad
+        )
+
+    def test_ad_delete_view_keeps_row_and_cancels_pending_proposals(self):
+        """Тест проверяет, что удаление скрывает объявление, но сохраняет его и отменяет ожидающие обмены."""
+
+        self.client.post(reverse("ads:ad-delete", kwargs={"pk": self.ad.pk}))
+        self.proposal.refresh_from_db()
+
+        self.assertFalse(Ad.objects.filter(pk=self.ad.pk).exists())
+        self.assertIsNotNone(Ad.all_objects.get(pk=self.ad.pk).deleted_at)
+        self.assertEqual(self.proposal.status, ExchangeProposal.STATUS_CANCELLED)
+        self.assertEqual(self.proposal.ad_sender, self.ad)
+
+
+class ArchiveProposalsCommandTest(TestCase):
+    """Тест переноса завершенных предложений обмена в архив."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        self.ad = Ad.objects.create(title="Тест", user=self.user)
+        self.other_ad = Ad.objects.create(title="Чужое", user=self.other_user)
+
+    def create_proposal(self, status, days_ago):
+        proposal = ExchangeProposal.objects.create(
+            owner=self.other_user, ad_sender=self.ad, ad_receiver=self.other_ad, status=status
+        )
+        ExchangeProposal.objects.filter(pk=proposal.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return proposal
+
+    def test_archive_moves_only_old_terminal_proposals(self):
+        """Тест проверяет, что в архив уходят только старые завершенные предложения, а история остается доступной."""
+
+        old_accepted = [self.create_proposal(ExchangeProposal.STATUS_ACCEPTED, 100 + i * 40) for i in range(3)]
+        old_pending = self.create_proposal(ExchangeProposal.STATUS_PENDING, 100)
+        fresh_refused = self.create_proposal(ExchangeProposal.STATUS_REFUSED, 1)
+
+        call_command("archive_proposals", days=90, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            set(ArchivedExchangeProposal.objects.values_list("id", flat=True)), {p.pk for p in old_accepted}
+        )
+        self.assertEqual(
+            set(ExchangeProposal.objects.values_list("id", flat=True)), {old_pending.pk, fresh_refused.pk}
+        )
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+        response = self.client.get(reverse("ads:exchanges-list"))
+
+        self.assertEqual({p.pk for p in response.context["exchanges_ok"]}, {p.pk for p in old_accepted})
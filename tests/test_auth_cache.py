@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users.backends import CachedModelBackend, user_cache_key
+from users.models import User
+
+
+class CachedUserLookupTest(TestCase):
+    """Тест кеширования сессии и request.user."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.client.login(email="testuser@mail.ru", password="testpass")
+
+    def test_authenticated_request_does_not_query_session_and_user(self):
+        """Тест проверяет, что после первого запроса сессия и пользователь берутся из кеша."""
+
+        self.client.get(reverse("ads:home"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("ads:home"))
+
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_user_update_view_invalidates_cached_user(self):
+        """Тест проверяет, что сохранение в UserUpdateView сбрасывает закешированного пользователя."""
+
+        self.client.get(reverse("ads:home"))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+        self.client.post(
+            reverse("users:user-update", kwargs={"pk": self.user.pk}),
+            data={
+                "email": "testuser@mail.ru",
+                "phone": "+79990000000",
+                "password1": "N3w-secret-pass",
+                "password2": "N3w-secret-pass",
+            },
+        )
+
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(User.objects.get(pk=self.user.pk).phone, "+79990000000")
+
+    def test_cached_user_has_no_password_hash(self):
+        """Тест проверяет, что в кеш не попадает хеш пароля, а пароль при обращении читается из БД."""
+
+        self.client.get(reverse("ads:home"))
+        data = cache.get(user_cache_key(self.user.pk))
+
+        self.assertNotIn("password", data["fields"])
+        self.assertNotIn(self.user.password, str(data))
+
+        user = CachedModelBackend().get_user(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("testpass"))
+
+    def test_password_change_drops_cached_session_hash(self):
+        """Тест проверяет, что после set_password у пользователя из кеша хеш сессии считается по новому паролю."""
+
+        self.client.get(reverse("ads:home"))
+        user = CachedModelBackend().get_user(self.user.pk)
+        old_hash = user.get_session_auth_hash()
+
+        user.set_password("newpass")
+
+        self.assertNotEqual(user.get_session_auth_hash(), old_hash)
+        self.assertEqual(user.get_session_auth_hash(), super(User, user).get_session_auth_hash())
@@ -0,0 +1,29 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchCommandsTest(TestCase):
+    """Дымовой тест бенчмарков, которые сами наполняют таблицы: изменения схемы не должны их ломать."""
+
+    def run_command(self, name, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command(name, stdout=out, stderr=err, **options)
+        self.assertEqual(err.getvalue(), "")
+        return out.getvalue()
+
+    def test_bench_geo(self):
+        """Тест проверяет бенчмарк поиска рядом на нескольких точках."""
+
+        self.assertIn("Создано 50 точек", self.run_command("bench_geo", points=50, radii="100", repeat=1))
+
+    def test_bench_api(self):
+        """Тест проверяет бенчмарк JSON API на маленьком наборе объявлений."""
+
+        self.assertTrue(self.run_command("bench_api", ads=20, requests=2))
+
+    def test_bench_offers(self):
+        """Тест проверяет бенчмарк предложений пользователю на маленьком шаге."""
+
+        self.assertTrue(self.run_command("bench_offers", steps="20", proposals=3, repeat=1))
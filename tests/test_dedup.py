@@ -0,0 +1,148 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from PIL import Image, ImageDraw
+
+from ads.dedup import compute_signature, find_duplicates, hamming, image_hashes, index_ads, minhash, text_similarity
+from ads.models import Ad, AdSignature
+from users.models import User
+
+TEXT = "Продаю детский велосипед Stels, колеса 16 дюймов, синий, почти не катались, есть звонок и корзина"
+
+
+def picture(size=(200, 150), mirrored=False, quality=90):
+    """JPEG с простым рисунком: градиент и фигуры."""
+
+    image = Image.new("RGB", size)
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for x in range(width):
+        draw.line([(x, 0), (x, height)], fill=(x * 255 // width, 80, 160))
+    draw.ellipse([width // 4, height // 4, width // 2, height * 3 // 4], fill=(250, 250, 20))
+    draw.rectangle([width * 3 // 5, height // 5, width * 4 // 5, height // 2], fill=(10, 10, 10))
+    if mirrored:
+        image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    return buffer
+
+
+class SignatureTest(TestCase):
+    """Тест сигнатур для поиска почти-дубликатов."""
+
+    def test_minhash_estimates_text_similarity(self):
+        """Тест проверяет, что почти одинаковые тексты похожи, а разные — нет."""
+
+        edited = TEXT.replace("синий", "синего цвета") + "!"
+        other = "Отдам диван-книжку в хорошем состоянии, самовывоз с пятого этажа без лифта"
+
+        self.assertGreater(text_similarity(minhash(TEXT), minhash(edited)), 0.8)
+        self.assertLess(text_similarity(minhash(TEXT), minhash(other)), 0.2)
+        self.assertIsNone(minhash("  ,. "))
+
+    def test_image_hashes_survive_resize_and_recompression(self):
+        """Тест проверяет, что пересжатая уменьшенная копия близка по dHash, а другое изображение — далеко."""
+
+        _, original = image_hashes(picture())
+        _, copy = image_hashes(picture(size=(100, 75), quality=40))
+        _, other = image_hashes(picture(mirrored=True))
+
+        self.assertLessEqual(hamming(original, copy), 3)
+        self.assertGreater(hamming(original, other), 10)
+        self.assertEqual(image_hashes(io.BytesIO(b"not an image")), (None, None))
+
+
+class DuplicateDetectionTest(TestCase):
+    """Тест поиска дубликатов при размещении объявления и пакетного поиска."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="seller@mail.ru", password="testpass")
+        self.other = User.objects.create_user(email="other@mail.ru", password="testpass")
+        self.ad = Ad.objects.create(
+            title="Велосипед детский", description=TEXT, user=self.user, category="хобби", condition="б/у"
+        )
+        self.client.force_login(self.user)
+        self.data = {
+            "title": "Велосипед детский Stels",
+            "description": TEXT + " Торг.",
+            "category": "хобби",
+            "condition": "б/у",
+        }
+
+    def test_ad_signature_is_indexed_on_save(self):
+        """Тест проверяет, что сохранение объявления индексирует его и оно находится по похожему тексту."""
+
+        self.assertTrue(AdSignature.objects.filter(ad=self.ad).exists())
+
+        found = find_duplicates(compute_signature("Велосипед", TEXT))
+
+        self.assertEqual([ad for ad, _ in found], [self.ad])
+
+    def test_image_match_requires_both_hashes(self):
+        """Тест проверяет, что изображения похожи, только если близки и dHash, и aHash."""
+
+        ahash, dhash = image_hashes(picture())
+        index_ads([self.ad], {self.ad.pk: AdSignature(ahash=ahash, dhash=dhash)})
+
+        self.assertEqual(
+            find_duplicates(AdSignature(ahash=ahash, dhash=dhash ^ 1)), [(self.ad, "похожее изображение")]
+        )
+        self.assertEqual(find_duplicates(AdSignature(ahash=~ahash, dhash=dhash ^ 1)), [])
+
+    def test_oversized_buckets_do_not_crowd_out_duplicates(self):
+        """Тест проверяет, что переполненные корзины пропускаются и не вытесняют настоящий дубликат из выборки."""
+
+        ahash, dhash = image_hashes(picture())
+        noise = Ad.objects.bulk_create(Ad(title=f"Заглушка {i}", description="", user=self.other) for i in range(3))
+        index_ads(noise, {ad.pk: AdSignature(ahash=~ahash, dhash=dhash) for ad in noise})
+        duplicate = Ad.objects.create(title="Велосипед", description=TEXT, user=self.user)
+        probe = compute_signature("Велосипед", TEXT)
+        probe.ahash, probe.dhash = ahash, dhash
+
+        with mock.patch("ads.dedup.MAX_BUCKET_SIZE", 2):
+            found = find_duplicates(probe)
+
+        self.assertEqual([ad for ad, _ in found], [duplicate, self.ad])
+
+    def test_form_flags_duplicate_and_allows_confirmation(self):
+        """Тест проверяет, что форма просит подтверждения для дубликата и размещает его после подтверждения."""
+
+        response = self.client.post(reverse("ads:ad-create"), self.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Похоже, у вас уже есть такое объявление")
+        self.assertEqual(Ad.objects.count(), 1)
+
+        response = self.client.post(reverse("ads:ad-create"), {**self.data, "allow_duplicate": "on"})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Ad.objects.count(), 2)
+
+    def test_other_users_ads_are_not_flagged(self):
+        """Тест проверяет, что похожее объявление другого пользователя не мешает размещению."""
+
+        self.client.force_login(self.other)
+        response = self.client.post(reverse("ads:ad-create"), self.data)
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_find_duplicate_ads_groups_near_duplicates(self):
+        """Тест проверяет, что команда индексирует объявления без сигнатур и собирает дубликаты в группу."""
+
+        copies = Ad.objects.bulk_create(
+            Ad(title=f"Велосипед {i}", description=TEXT, user=self.other, category="хобби", condition="б/у")
+            for i in range(2)
+        )
+        Ad.objects.bulk_create([Ad(title="Диван", description="Диван-книжка", user=self.other)])
+        out = io.StringIO()
+
+        call_command("find_duplicate_ads", stdout=out)
+
+        ids = ", ".join(str(ad_id) for ad_id in sorted([self.ad.pk] + [ad.pk for ad in copies]))
+        self.assertIn(f"3: {ids}", out.getvalue())
+        self.assertIn("Проиндексировано: 3", out.getvalue())
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ads.models import Ad, ExchangeProposal
+from users.models import User
+
+
+class BulkExchangeProposalDecisionViewTest(TestCase):
+    """Тест массового принятия и отклонения предложений обмена."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        self.client.login(email="testuser@mail.ru", password="testpass")
+
+        self.ad = Ad.objects.create(title="Тест", user=self.user)
+        self.other_ad = Ad.objects.create(title="Чужое", user=self.other_user)
+        self.offers = [
+            ExchangeProposal.objects.create(owner=self.other_user, ad_sender=self.ad, ad_receiver=self.other_ad)
+            for _ in range(3)
+        ]
+        # предложение на чужое объявление: решать его может только владелец
+        self.foreign = ExchangeProposal.objects.create(owner=self.user, ad_sender=self.other_ad, ad_receiver=self.ad)
+        self.url = reverse("ads:decide-exchange-proposals")
+
+    def test_accepts_own_offers_and_skips_foreign(self):
+        """Тест проверяет, что решение применяется только к предложениям на объявления пользователя."""
+
+        ids = [self.offers[0].pk, self.offers[1].pk, self.foreign.pk, 0]
+        # пользователь, SAVEPOINT, проверка принадлежности с блокировкой, UPDATE, INSERT в журнал, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, {"action": "accept", "ids": ids}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "action": "accept",
+                "updated": [self.offers[0].pk, self.offers[1].pk],
+                "skipped": sorted([0, self.foreign.pk]),
+            },
+        )
+        statuses = dict(ExchangeProposal.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[self.offers[0].pk], ExchangeProposal.STATUS_ACCEPTED)
+        self.assertEqual(statuses[self.offers[2].pk], ExchangeProposal.STATUS_PENDING)
+        self.assertEqual(statuses[self.foreign.pk], ExchangeProposal.STATUS_PENDING)
+
+    def test_form_data_and_validation(self):
+        """Тест проверяет прием данных формой и ошибки валидации."""
+
+        response = self.client.post(self.url, {"action": "refuse", "ids": [self.offers[2].pk]})
+        self.assertEqual(response.json()["updated"], [self.offers[2].pk])
+
+        self.assertEqual(self.client.post(self.url, {"action": "delete", "ids": [1]}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {"action": "accept", "ids": ["x"]}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {"action": "accept"}).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.client.post(self.url, {"action": "accept", "ids": [1]}).status_code, 403)
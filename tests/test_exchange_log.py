@@ -0,0 +1,115 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.exchange_log import replay
+from ads.models import Ad, CategoryTradeVolume, ExchangeEvent, ExchangeProposal, ExchangeUserStats
+from ads.services import decide_proposals
+from users.models import User
+
+
+class ExchangeEventLogTest(TestCase):
+    """Тест журнала событий обмена и проекций, пересчитываемых из него."""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(email="seller@mail.ru", password="testpass")
+        self.buyer = User.objects.create_user(email="buyer@mail.ru", password="testpass")
+        self.ad = Ad.objects.create(title="Велосипед", user=self.seller, category="хобби")
+        self.other_ad = Ad.objects.create(title="Кеды", user=self.buyer, category="обувь")
+
+    def propose(self):
+        return ExchangeProposal.objects.create(owner=self.buyer, ad_sender=self.ad, ad_receiver=self.other_ad)
+
+    def kinds(self):
+        return list(ExchangeEvent.objects.order_by("id").values_list("kind", "proposal_id"))
+
+    def test_transitions_are_logged(self):
+        """Тест проверяет, что создание, решение, удаление и снятие объявления пишутся в журнал."""
+
+        accepted, refused, deleted, cancelled = ids = [self.propose().pk for _ in range(4)]
+        decide_proposals(self.seller, [accepted], ExchangeProposal.STATUS_ACCEPTED)
+        decide_proposals(self.seller, [refused], ExchangeProposal.STATUS_REFUSED)
+        ExchangeProposal.objects.get(pk=deleted).delete()
+        self.ad.soft_delete()
+
+        self.assertEqual(
+            self.kinds(),
+            [("created", pk) for pk in ids]
+            + [("accepted", accepted), ("refused", refused), ("cancelled", deleted), ("cancelled", cancelled)],
+        )
+        event = ExchangeEvent.objects.get(kind="accepted")
+        self.assertEqual(
+            (event.owner_id, event.recipient_id, event.ad_sender_category, event.ad_receiver_category),
+            (self.buyer.pk, self.seller.pk, "хобби", "обувь"),
+        )
+
+    def test_created_via_view_is_logged(self):
+        """Тест проверяет, что предложение, созданное через форму, попадает в журнал."""
+
+        self.client.force_login(self.buyer)
+        self.client.post(
+            reverse("ads:exchange-create", kwargs={"pk": self.ad.pk}),
+            {"ad_receiver": self.other_ad.pk, "comment": "Меняю"},
+        )
+
+        self.assertEqual([kind for kind, _ in self.kinds()], ["created"])
+
+    def test_log_is_append_only(self):
+        """Тест проверяет, что события журнала нельзя изменить или удалить."""
+
+        self.propose()
+
+        for statement in (lambda: ExchangeEvent.objects.update(kind="accepted"), ExchangeEvent.objects.all().delete):
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                statement()
+
+    def test_replay_builds_projections_incrementally(self):
+        """Тест проверяет, что проекции досчитываются без двойного счета и перестраиваются заново."""
+
+        first, second = self.propose(), self.propose()
+        decide_proposals(self.seller, [first.pk], ExchangeProposal.STATUS_ACCEPTED)
+
+        self.assertEqual(replay(batch_size=2, lag=0), 3)
+        decide_proposals(self.seller, [second.pk], ExchangeProposal.STATUS_REFUSED)
+        self.assertEqual(replay(lag=0), 1)
+
+        stats = ExchangeUserStats.objects.in_bulk()
+        self.assertEqual((stats[self.buyer.pk].proposals_made, stats[self.buyer.pk].accepted), (2, 1))
+        self.assertEqual((stats[self.buyer.pk].refused, stats[self.seller.pk].proposals_received), (1, 2))
+        today = timezone.localdate()
+        self.assertEqual(
+            set(CategoryTradeVolume.objects.values_list("day", "category", "proposals", "trades")),
+            {(today, "хобби", 2, 1), (today, "обувь", 0, 1)},
+        )
+
+        out = io.StringIO()
+        call_command("replay_exchange_events", rebuild=True, lag=0, stdout=out)
+        self.assertIn("Применено событий: 4", out.getvalue())
+        self.assertEqual(ExchangeUserStats.objects.get(user_id=self.buyer.pk).proposals_made, 2)
+
+    def test_replay_skips_recent_events(self):
+        """Тест проверяет, что события моложе lag откладываются до следующего прохода."""
+
+        self.propose()
+
+        self.assertEqual(replay(lag=60), 0)
+        self.assertEqual(replay(lag=0), 1)
+        self.assertLess(ExchangeEvent.objects.get().created_at, timezone.now() + timedelta(seconds=1))
+
+    def test_replay_bound_is_found_from_log_tail(self):
+        """Тест проверяет, что граница прохода ищется с конца журнала по id, а не перебором с начала."""
+
+        self.propose()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(replay(lag=0), 1)
+
+        bound = [q["sql"] for q in queries.captured_queries if '"created_at" <=' in q["sql"]]
+        self.assertEqual(len(bound), 1)
+        self.assertTrue(bound[0].endswith("DESC LIMIT 1"), bound[0])
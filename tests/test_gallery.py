@@ -0,0 +1,131 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from ads.models import Ad, AdImage
+from ads.storage import content_addressed_storage
+from users.models import User
+
+
+def photo(name, size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class AdGalleryTest(TestCase):
+    """Тест галереи фотографий объявления и обложки, скопированной в объявление."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email="seller@mail.ru", password="testpass")
+        self.client.force_login(self.user)
+
+    def create_ad(self, *images):
+        data = {"title": "Велосипед", "description": "Детский", "category": "хобби", "condition": "б/у"}
+        self.client.post(reverse("ads:ad-create"), {**data, "images": list(images)})
+        return Ad.objects.get()
+
+    def test_upload_builds_gallery_with_cover(self):
+        """Тест проверяет, что загруженные фотографии идут в галерею по порядку, а первая становится обложкой."""
+
+        ad = self.create_ad(photo("a.png", (40, 30), "red"), photo("b.png", (20, 50), "blue"))
+
+        images = list(ad.images.all())
+        self.assertEqual([(image.position, image.width, image.height) for image in images], [(0, 40, 30), (1, 20, 50)])
+        self.assertEqual((ad.image_url.name, ad.image_width, ad.image_height), (images[0].image.name, 40, 30))
+
+        self.client.post(
+            reverse("ads:ad-update", kwargs={"pk": ad.pk}),
+            {
+                "title": ad.title,
+                "description": ad.description,
+                "category": ad.category,
+                "condition": ad.condition,
+                "images": [photo("c.png", (10, 10), "green")],
+            },
+        )
+        self.assertEqual(ad.images.count(), 3)
+        self.assertEqual(Ad.objects.get().image_url.name, images[0].image.name)
+
+    def test_list_does_not_touch_gallery(self):
+        """Тест проверяет, что список объявлений не читает галерею, а страница объявления читает ее одним запросом."""
+
+        ad = self.create_ad(photo("a.png", (40, 30), "red"), photo("b.png", (20, 50), "blue"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("ads:ads-mylist"))
+        self.assertContains(response, 'width="40" height="30" loading="lazy"')
+        self.assertFalse([query for query in queries if "ads_adimage" in query["sql"]])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("ads:ad-detail", kwargs={"pk": ad.pk}))
+        self.assertContains(response, 'width="20" height="50" loading="lazy"')
+        self.assertEqual(len([query for query in queries if "ads_adimage" in query["sql"]]), 1)
+
+    def test_cover_choice_and_deletion(self):
+        """Тест проверяет выбор обложки, удаление фотографий и освобождение файла последней ссылки."""
+
+        ad = self.create_ad(photo("a.png", (40, 30), "red"), photo("b.png", (20, 50), "blue"))
+        first, second = ad.images.all()
+
+        self.client.post(reverse("ads:ad-image-cover", kwargs={"pk": ad.pk, "image_pk": second.pk}))
+        ad.refresh_from_db()
+        self.assertEqual(list(ad.images.values_list("pk", flat=True)), [second.pk, first.pk])
+        self.assertEqual((ad.image_url.name, ad.image_width), (second.image.name, 20))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("ads:ad-image-delete", kwargs={"pk": ad.pk, "image_pk": second.pk}))
+        ad.refresh_from_db()
+        self.assertEqual(ad.image_url.name, first.image.name)
+        self.assertFalse(content_addressed_storage.exists(second.image.name))
+        self.assertTrue(content_addressed_storage.exists(first.image.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("ads:ad-image-delete", kwargs={"pk": ad.pk, "image_pk": first.pk}))
+        ad.refresh_from_db()
+        self.assertFalse(ad.image_url)
+        self.assertFalse(content_addressed_storage.exists(first.image.name))
+
+    def test_only_owner_manages_gallery(self):
+        """Тест проверяет, что чужую галерею менять нельзя."""
+
+        ad = self.create_ad(photo("a.png", (40, 30), "red"))
+        image = ad.images.get()
+        self.client.force_login(User.objects.create_user(email="other@mail.ru", password="testpass"))
+
+        response = self.client.post(reverse("ads:ad-image-delete", kwargs={"pk": ad.pk, "image_pk": image.pk}))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(AdImage.objects.filter(pk=image.pk).exists())
+
+    @override_settings(AD_IMAGES_LIMIT=2)
+    def test_gallery_limit(self):
+        """Тест проверяет, что в галерею нельзя загрузить больше AD_IMAGES_LIMIT фотографий."""
+
+        colors = ["red", "green", "blue"]
+        response = self.client.post(
+            reverse("ads:ad-create"),
+            {
+                "title": "Велосипед",
+                "description": "Детский",
+                "category": "хобби",
+                "condition": "б/у",
+                "images": [photo(f"{color}.png", (10, 10), color) for color in colors],
+            },
+        )
+
+        self.assertContains(response, "не больше 2 фотографий")
+        self.assertFalse(Ad.objects.exists())
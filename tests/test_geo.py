@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ads.geo import bounding_box, nearby
+from ads.models import Ad
+from users.models import User
+
+
+class NearbyAdsTest(TestCase):
+    """Тест поиска объявлений рядом."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@mail.ru", password="testpass", latitude=55.7558, longitude=37.6173
+        )
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        # Москва (центр и ~10 км), Тверь (~160 км), Владивосток
+        self.near = Ad.objects.create(title="Рядом", user=self.other_user, latitude=55.7539, longitude=37.6208)
+        self.closer_10km = Ad.objects.create(title="10 км", user=self.other_user, latitude=55.8457, longitude=37.6173)
+        self.tver = Ad.objects.create(title="Тверь", user=self.other_user, latitude=56.8587, longitude=35.9176)
+        Ad.objects.create(title="Владивосток", user=self.other_user, latitude=43.1155, longitude=131.8855)
+        Ad.objects.create(title="Без координат", user=self.other_user)
+
+    def test_nearby_filters_by_distance(self):
+        """Тест проверяет, что отбор по квадрату и гаверсинус дают точный список с расстоянием."""
+
+        found = {ad.title: ad.distance for ad in nearby(Ad.objects.all(), 55.7558, 37.6173, 20)}
+
+        self.assertEqual(set(found), {"Рядом", "10 км"})
+        self.assertAlmostEqual(found["10 км"], 10.0, delta=0.1)
+        self.assertEqual({ad.title for ad in nearby(Ad.objects.all(), 55.7558, 37.6173, 200)}, set(found) | {"Тверь"})
+
+    def test_bounding_box_across_antimeridian(self):
+        """Тест проверяет, что у антимеридиана находятся объявления по обе стороны от него."""
+
+        east = Ad.objects.create(title="Восток", user=self.other_user, latitude=65.0, longitude=179.9)
+        west = Ad.objects.create(title="Запад", user=self.other_user, latitude=65.0, longitude=-179.9)
+
+        self.assertGreater(bounding_box(65.0, 179.95, 10)[3], 180)
+        self.assertEqual(set(nearby(Ad.objects.all(), 65.0, 179.95, 10)), {east, west})
+
+    def test_list_view_uses_profile_location(self):
+        """Тест проверяет, что список объявлений рядом строится от местоположения из профиля и идет по расстоянию."""
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+
+        response = self.client.get(reverse("ads:ads-list"), {"radius": 200})
+        self.assertEqual(list(response.context["ads"]), [self.near, self.closer_10km, self.tver])
+
+        response = self.client.get(reverse("ads:ads-list"), {"radius": "abc"})
+        self.assertTrue(response.context["location_error"])
+        self.assertEqual(len(response.context["ads"]), 5)
+
+    def test_new_ad_takes_profile_location(self):
+        """Тест проверяет, что объявление без координат получает местоположение из профиля."""
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+        self.client.post(
+            reverse("ads:ad-create"),
+            {"title": "Новое", "description": "Описание", "category": "хобби", "condition": "новый"},
+        )
+
+        ad = Ad.objects.get(title="Новое")
+        self.assertEqual((ad.latitude, ad.longitude), (self.user.latitude, self.user.longitude))
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users.auth import PasswordHashPoolBusy
+from users.models import User
+
+
+class TokenBackend:
+    """Бэкенд не на основе ModelBackend: пускает по одноразовому паролю."""
+
+    async def aauthenticate(self, request, username=None, password=None):
+        if password == "one-time-code":
+            return await User.objects.aget(email=username)
+
+    def get_user(self, user_id):
+        return User.objects.filter(pk=user_id).first()
+
+
+class LoginViewTest(TestCase):
+    """Тест асинхронного входа с проверкой пароля в пуле потоков."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="login@mail.ru", password="testpass")
+        self.url = reverse("users:login")
+
+    def test_login_redirects_and_authenticates(self):
+        """Тест проверяет вход с верным паролем и переход на страницу из next."""
+
+        response = self.client.post(self.url + "?next=/ads/", {"username": "login@mail.ru", "password": "testpass"})
+
+        self.assertRedirects(response, "/ads/", fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session["_auth_user_id"]), self.user.pk)
+
+    def test_login_page_is_not_cached_and_hides_password(self):
+        """Тест проверяет, что страница входа не кешируется, а пароль скрыт в отчетах об ошибках."""
+
+        response = self.client.get(self.url)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.post(self.url, {"username": "login@mail.ru", "password": "wrong"})
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(response.wsgi_request.sensitive_post_parameters, "__ALL__")
+
+    def test_wrong_password_and_unknown_email(self):
+        """Тест проверяет, что неверный пароль и несуществующий email дают одинаковую ошибку."""
+
+        for email, password in (("login@mail.ru", "wrong"), ("nobody@mail.ru", "testpass")):
+            response = self.client.post(self.url, {"username": email, "password": password})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Неверный email или пароль.")
+            self.assertNotIn("_auth_user_id", self.client.session)
+
+    @override_settings(AUTHENTICATION_BACKENDS=["users.backends.CachedModelBackend", "tests.test_login.TokenBackend"])
+    def test_login_tries_backends_in_order(self):
+        """Тест проверяет, что после ModelBackend вход проверяют остальные бэкенды, а неактивный не входит."""
+
+        response = self.client.post(self.url, {"username": "login@mail.ru", "password": "one-time-code"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.session["_auth_user_backend"], "tests.test_login.TokenBackend")
+
+        self.client.logout()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post(self.url, {"username": "login@mail.ru", "password": "testpass"})
+        self.assertContains(response, "Неверный email или пароль.")
+
+    def test_login_rehashes_password_with_preferred_hasher(self):
+        """Тест проверяет, что хеш старого хешера заменяется при входе хешем предпочтительного."""
+
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+        hashers = ["django.contrib.auth.hashers.ScryptPasswordHasher", "django.contrib.auth.hashers.MD5PasswordHasher"]
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.client.post(self.url, {"username": "login@mail.ru", "password": "testpass"})
+            self.user.refresh_from_db()
+
+            self.assertTrue(self.user.password.startswith("scrypt$"))
+            self.assertTrue(self.user.check_password("testpass"))
+
+    @override_settings(LOGIN_RATE_LIMIT="2/m")
+    def test_login_attempts_are_throttled_per_account(self):
+        """Тест проверяет, что после исчерпания лимита попытки входа в аккаунт получают 429."""
+
+        data = {"username": "throttled@mail.ru", "password": "wrong"}
+        statuses = [self.client.post(self.url, data).status_code for _ in range(3)]
+        other = self.client.post(self.url, {"username": "login@mail.ru", "password": "testpass"})
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(other.status_code, 302)
+
+    def test_busy_hash_pool_returns_503(self):
+        """Тест проверяет, что при заполненной очереди пула вход сразу отклоняется с 503."""
+
+        with mock.patch("users.auth.password_pool.run", side_effect=PasswordHashPoolBusy):
+            response = self.client.post(self.url, {"username": "login@mail.ru", "password": "testpass"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
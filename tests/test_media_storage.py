@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.transaction import TransactionManagementError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad
+from ads.storage import content_addressed_storage
+from users.models import User
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Тест дедуплицирующего хранилища изображений объявлений."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+
+    def create_ad(self, filename, content=b"labrador"):
+        return Ad.objects.create(title="Тест", user=self.user, image_url=SimpleUploadedFile(filename, content))
+
+    def test_same_image_is_stored_once(self):
+        """Тест проверяет, что одинаковые изображения с разными именами хранятся одним файлом."""
+
+        ad1 = self.create_ad("labrador-3.jpg")
+        ad2 = self.create_ad("labrador-3_rJRBOQn.jpg")
+
+        self.assertEqual(ad1.image_url.name, ad2.image_url.name)
+        self.assertTrue(ad1.image_url.name.startswith("ad_images/"))
+
+    def test_image_is_deleted_with_last_reference(self):
+        """Тест проверяет, что файл удаляется только вместе с последним ссылающимся объявлением."""
+
+        ad1 = self.create_ad("1.jpg")
+        ad2 = self.create_ad("2.jpg")
+        name = ad1.image_url.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(email="testuser@mail.ru", password="testpass")
+            self.client.post(reverse("ads:ad-delete", kwargs={"pk": ad1.pk}))
+        self.assertTrue(content_addressed_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad2.delete()
+        self.assertFalse(content_addressed_storage.exists(name))
+
+    def test_dedupe_media_merges_existing_duplicates(self):
+        """Тест проверяет, что команда dedupe_media сливает старые файлы-дубликаты и обновляет ссылки."""
+
+        os.makedirs(os.path.join(self.media_root, "ad_images"))
+        for filename in ("labrador-3.jpg", "labrador-3_rJRBOQn.jpg"):
+            with open(os.path.join(self.media_root, "ad_images", filename), "wb") as file:
+                file.write(b"labrador")
+        ad1 = Ad.objects.create(title="Тест 1", user=self.user, image_url="ad_images/labrador-3.jpg")
+        ad2 = Ad.objects.create(title="Тест 2", user=self.user, image_url="ad_images/labrador-3_rJRBOQn.jpg")
+        yesterday = timezone.now() - timedelta(days=1)
+        Ad.objects.update(updated_at=yesterday)
+
+        call_command("dedupe_media", stdout=StringIO())
+        ad1.refresh_from_db()
+        ad2.refresh_from_db()
+
+        self.assertEqual(ad1.image_url.name, ad2.image_url.name)
+        # смена ссылки видна partition_ads по updated_at
+        self.assertGreater(min(ad1.updated_at, ad2.updated_at), yesterday)
+        self.assertTrue(content_addressed_storage.exists(ad1.image_url.name))
+        self.assertEqual(os.listdir(os.path.join(self.media_root, "ad_images")), [ad1.image_url.name.split("/")[1]])
+
+
+class ImageReleaseRaceTest(TransactionTestCase):
+    """Тест блокировки между освобождением файла и загрузкой того же содержимого."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+
+    def test_release_waits_for_upload_of_same_content(self):
+        """Тест проверяет, что файл не удаляется, пока незакоммиченная загрузка переиспользует его."""
+
+        ad = Ad.objects.create(title="Старое", user=self.user, image_url=SimpleUploadedFile("1.jpg", b"labrador"))
+        name = ad.image_url.name
+        uploaded, finish = threading.Event(), threading.Event()
+
+        def upload():
+            with transaction.atomic():
+                Ad.objects.create(title="Новое", user=self.user, image_url=SimpleUploadedFile("2.jpg", b"labrador"))
+                uploaded.set()
+                finish.wait(5)
+            connection.close()
+
+        thread = threading.Thread(target=upload)
+        thread.start()
+        uploaded.wait(5)
+        threading.Timer(0.3, finish.set).start()
+
+        start = time.perf_counter()
+        # вне транзакции on_commit выполняется сразу: release_image ждет коммита загрузки
+        ad.delete()
+        thread.join()
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.25)
+        self.assertTrue(content_addressed_storage.exists(name))
+        self.assertEqual(Ad.objects.get(title="Новое").image_url.name, name)
+
+    def test_storage_refuses_to_save_outside_transaction(self):
+        """Тест проверяет, что вне транзакции хранилище не сохраняет файл, а сохранение объявления открывает ее."""
+
+        with self.assertRaises(TransactionManagementError):
+            content_addressed_storage.save("ad_images/1.jpg", SimpleUploadedFile("1.jpg", b"poodle"))
+
+        ad = Ad.objects.create(title="Тест", user=self.user, image_url=SimpleUploadedFile("1.jpg", b"poodle"))
+        self.assertTrue(content_addressed_storage.exists(ad.image_url.name))
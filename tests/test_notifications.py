@@ -0,0 +1,83 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ads.models import Ad, ExchangeProposal
+from ads.notifications import hub
+from users.models import User
+
+
+class ExchangeEventsTest(TestCase):
+    """Тест публикации событий по предложениям обмена."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.other_user = User.objects.create_user(email="other@mail.ru", password="otherpass")
+        self.ad = Ad.objects.create(title="Тест", user=self.user)
+        self.other_ad = Ad.objects.create(title="Чужое", user=self.other_user)
+
+    def published(self, action):
+        """Выполняет action и возвращает опубликованные после коммита события."""
+
+        with mock.patch.object(hub, "publish_local") as publish_local:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+
+        return [call.args[0] for call in publish_local.call_args_list]
+
+    def test_created_and_accepted_events(self):
+        """Тест проверяет, что о новом предложении узнает владелец объявления, а о принятии — автор предложения."""
+
+        events = self.published(
+            lambda: ExchangeProposal.objects.create(
+                owner=self.other_user, ad_sender=self.ad, ad_receiver=self.other_ad
+            )
+        )
+        proposal = ExchangeProposal.objects.get()
+        self.assertEqual(
+            events, [{"event": "created", "proposal": proposal.pk, "status": "Ожидает", "user": self.user.pk}]
+        )
+
+        proposal.status = ExchangeProposal.STATUS_ACCEPTED
+        events = self.published(proposal.save)
+        self.assertEqual([(event["event"], event["user"]) for event in events], [("accepted", self.other_user.pk)])
+
+        # повторное сохранение без смены статуса событий не порождает
+        self.assertEqual(self.published(proposal.save), [])
+
+    def test_soft_delete_notifies_other_party(self):
+        """Тест проверяет, что при удалении объявления об отмене обмена узнает только вторая сторона."""
+
+        proposal = ExchangeProposal.objects.create(owner=self.other_user, ad_sender=self.ad, ad_receiver=self.other_ad)
+
+        events = self.published(self.other_ad.soft_delete)
+
+        self.assertEqual(
+            events, [{"event": "cancelled", "proposal": proposal.pk, "status": "Отменен", "user": self.user.pk}]
+        )
+
+    async def test_event_stream(self):
+        """Тест проверяет, что поток SSE отдает событие пользователя."""
+
+        response = await self.async_client.get(reverse("ads:exchange-events"))
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("ads:exchange-events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = response.streaming_content
+        try:
+            self.assertTrue((await anext(stream)).startswith(b"retry:"))
+            hub.publish_local({"event": "created", "proposal": 1, "status": "Ожидает", "user": self.other_user.pk})
+            hub.publish_local({"event": "created", "proposal": 2, "status": "Ожидает", "user": self.user.pk})
+            chunk = await asyncio.wait_for(anext(stream), 5)
+        finally:
+            await stream.aclose()
+
+        event, data = chunk.decode().strip().split("\n")
+        self.assertEqual(event, "event: created")
+        self.assertEqual(json.loads(data.removeprefix("data: "))["proposal"], 2)
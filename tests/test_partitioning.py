@@ -0,0 +1,106 @@
+import io
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ads.models import Ad, ExchangeProposal
+from ads.partitioning import DEFAULT_PARTITION, category_partition, partition_strategy, partitions, scanned_partitions
+from users.models import User
+
+
+class AdPartitioningTest(TestCase):
+    """Тест секционирования таблицы объявлений командой partition_ads."""
+
+    def setUp(self):
+        if partition_strategy():
+            self.skipTest("ads_ad уже секционирована миграцией (AD_PARTITION_BY)")
+        self.owner = User.objects.create_user(email="owner@mail.ru", password="testpass")
+        self.other = User.objects.create_user(email="other@mail.ru", password="testpass")
+        self.ads = [
+            Ad.objects.create(title=f"Объявление {i}", description="", user=self.owner, category=category)
+            for i, category in enumerate(["хобби", "обувь", "хобби", "одежда"])
+        ]
+        self.proposal = ExchangeProposal.objects.create(
+            owner=self.other, ad_sender=self.ads[0], ad_receiver=self.ads[1], comment="Меняю"
+        )
+
+    def partition(self, **options):
+        out = io.StringIO()
+        call_command("partition_ads", stdout=out, **options)
+        return out.getvalue()
+
+    def test_partition_by_category_keeps_rows_and_prunes_by_category(self):
+        """Тест проверяет, что после переноса строки и связи сохранены, новые id продолжаются,
+        а запрос с фильтром по категории читает одну секцию."""
+
+        output = self.partition(by="category", batch_size=2, explain=True)
+
+        self.assertEqual(partition_strategy(), "category")
+        self.assertIn("Таблица секционирована (category): строк 4, секций 10", output)
+        self.assertIn(f"Поиск по категории «одежда»: секций 1 из 10 ({category_partition('одежда')})", output)
+        self.assertEqual(scanned_partitions(Ad.objects.filter(category="хобби")), [category_partition("хобби")])
+        self.assertEqual(Ad.objects.filter(category="хобби").count(), 2)
+        self.assertEqual(ExchangeProposal.objects.get().ad_receiver, self.ads[1])
+
+        ad = Ad.objects.create(title="Новое", description="", user=self.owner, category="обувь")
+        self.assertGreater(ad.pk, self.ads[-1].pk)
+        # смена категории переносит строку в другую секцию
+        ad.category = "хобби"
+        ad.save()
+        self.assertEqual(Ad.objects.filter(category="хобби").count(), 3)
+
+    def test_partition_by_month_prunes_by_created_at(self):
+        """Тест проверяет секции по месяцам: старые месяцы, месяцы вперед и отсечение по дате создания."""
+
+        old = timezone.now() - timedelta(days=90)
+        Ad.objects.filter(pk=self.ads[0].pk).update(created_at=old)
+
+        self.partition(by="month", months_ahead=2)
+
+        names = partitions()
+        self.assertEqual(partition_strategy(), "month")
+        self.assertIn(f"ads_ad_y{old:%Y}m{old:%m}", names)
+        now = timezone.now()
+        # месяцы с месяца old по текущий, два вперед и секция по умолчанию
+        self.assertEqual(len(names), (now.year - old.year) * 12 + now.month - old.month + 1 + 2 + 1)
+        month_start = now.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        recent = Ad.objects.filter(created_at__gte=month_start)
+        # старые месяцы отсекаются: читаются текущий месяц, два вперед и секция по умолчанию
+        self.assertEqual(len(scanned_partitions(recent)), 4)
+        self.assertEqual(recent.count(), 3)
+
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        """Тест проверяет, что новая секция забирает подходящие строки из секции по умолчанию."""
+
+        self.partition(by="month", months_ahead=0)
+        future = timezone.now() + timedelta(days=100)
+        Ad.objects.filter(pk=self.ads[0].pk).update(created_at=future)
+
+        output = self.partition(months_ahead=4)
+
+        self.assertIn("Создано секций: 4", output)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(Ad.objects.get(created_at=future), self.ads[0])
+
+    def test_category_added_in_middle_gets_own_partition(self):
+        """Тест проверяет, что категория, добавленная в середину списка, получает секцию,
+        а ее объявления переносятся из секции по умолчанию."""
+
+        books = Ad.objects.create(title="Книга", description="", user=self.owner, category="книги")
+        self.partition(by="category")
+        choices = list(Ad.CATEGORY_CHOICES)
+        choices.insert(2, ("книги", "Книги"))
+
+        with mock.patch.object(Ad, "CATEGORY_CHOICES", tuple(choices)):
+            output = self.partition()
+
+        self.assertIn("Создано секций: 1, всего: 11", output)
+        self.assertEqual(scanned_partitions(Ad.objects.filter(category="книги")), [category_partition("книги")])
+        self.assertEqual(Ad.objects.get(category="книги"), books)
@@ -0,0 +1,147 @@
+import io
+import os
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from config.metrics import metrics
+from config.profiling import SlowRequestProfilingMiddleware, list_profiles, read_collapsed
+from users.models import User
+
+
+@override_settings(MIDDLEWARE=["config.profiling.TemplateProfilingMiddleware"])
+class TemplateProfilingMiddlewareTest(TestCase):
+    """Тест профилирования рендеринга шаблонов."""
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_template_profiling_records_templates_and_includes(self):
+        """Тест проверяет, что время записывается для страницы, base.html и подключаемых шаблонов."""
+
+        self.client.get(reverse("ads:home"))
+        timings = metrics.snapshot()["timings"]
+
+        for name in ("home.html", "base.html", "includes/navbar.html", "includes/footer.html"):
+            self.assertEqual(timings[f"template.{name}"]["count"], 1)
+            self.assertIn(f"template.{name}.self", timings)
+
+    @override_settings(DEBUG=True)
+    def test_template_profiling_adds_server_timing_in_debug(self):
+        """Тест проверяет, что при DEBUG тайминги шаблонов попадают в заголовок Server-Timing."""
+
+        response = self.client.get(reverse("ads:home"))
+
+        self.assertIn('desc="includes/navbar.html"', response["Server-Timing"])
+
+
+class MetricsViewTest(TestCase):
+    """Тест страницы метрик."""
+
+    def test_metrics_view_forbidden_for_regular_users(self):
+        """Тест проверяет, что метрики недоступны обычным пользователям."""
+
+        User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.client.login(email="testuser@mail.ru", password="testpass")
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_view_returns_snapshot_for_staff(self):
+        """Тест проверяет, что персонал получает метрики в JSON."""
+
+        User.objects.create_user(email="admin@mail.ru", password="testpass", is_staff=True)
+        self.client.login(email="admin@mail.ru", password="testpass")
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("timings", response.json())
+
+
+def slow_search(*args, **kwargs):
+    time.sleep(0.05)
+    return []
+
+
+@mock.patch("ads.views.search_ad_ids", slow_search)
+class SlowRequestProfilingTest(TestCase):
+    """Тест профилей медленных запросов и команды request_profiles."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(PROFILES_DIR=self.directory.name, PROFILE_SAMPLE_INTERVAL=0.001)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(email="user@mail.ru", password="testpass")
+        self.staff = User.objects.create_user(email="admin@mail.ru", password="testpass", is_staff=True)
+
+    def test_staff_flag_saves_profile_of_request(self):
+        """Тест проверяет, что по флагу персонала сохраняются стеки запроса вплоть до функции представления."""
+
+        self.client.force_login(self.staff)
+        self.client.get(reverse("ads:search-ads"), {"query": "велосипед", "_profile": "1"})
+
+        names = list_profiles(self.directory.name)
+        self.assertEqual(len(names), 1)
+        self.assertIn("ads_search-ads", names[0])
+        header, stacks = read_collapsed(os.path.join(self.directory.name, names[0]))
+        self.assertEqual(
+            header[0], "GET /search/?query=%D0%B2%D0%B5%D0%BB%D0%BE%D1%81%D0%B8%D0%BF%D0%B5%D0%B4&_profile=1"
+        )
+        self.assertTrue(any("slow_search" in stack and "get_queryset" in stack for stack in stacks))
+
+    def test_flag_is_ignored_for_regular_users_and_fast_requests(self):
+        """Тест проверяет, что флаг обычного пользователя не действует, а быстрые запросы не сохраняются."""
+
+        self.client.force_login(self.user)
+        self.client.get(reverse("ads:search-ads"), {"_profile": "1"}, HTTP_X_PROFILE="1")
+        with override_settings(SLOW_REQUEST_PROFILING=True, SLOW_REQUEST_THRESHOLD=10):
+            self.client.get(reverse("ads:search-ads"))
+
+        self.assertEqual(list_profiles(self.directory.name), [])
+
+    @override_settings(SLOW_REQUEST_PROFILING=True, SLOW_REQUEST_THRESHOLD=0.01, PROFILES_KEEP=2)
+    def test_slow_requests_are_saved_with_bounded_retention(self):
+        """Тест проверяет, что медленные запросы сохраняются без флага, а хранятся только последние PROFILES_KEEP."""
+
+        for _ in range(3):
+            self.client.get(reverse("ads:search-ads"))
+
+        self.assertEqual(len(list_profiles(self.directory.name)), 2)
+
+    def test_async_requests_pass_through_without_adapting(self):
+        """Тест проверяет, что под ASGI middleware остается асинхронной и не переводит запрос в поток."""
+
+        async def get_response(request):
+            return "ответ"
+
+        middleware = SlowRequestProfilingMiddleware(get_response)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(async_to_sync(middleware)(object()), "ответ")
+
+    def test_command_lists_reports_and_renders_flamegraph(self):
+        """Тест проверяет список профилей, отчет с cProfile и SVG-flamegraph."""
+
+        self.client.force_login(self.staff)
+        self.client.get(reverse("ads:search-ads"), HTTP_X_PROFILE="cprofile")
+        svg = os.path.join(self.directory.name, "flame.svg")
+
+        out = io.StringIO()
+        call_command("request_profiles", stdout=out)
+        self.assertIn("Профилей: 1", out.getvalue())
+
+        out = io.StringIO()
+        call_command("request_profiles", "latest", svg=svg, stdout=out)
+        self.assertIn("slow_search", out.getvalue())
+        self.assertIn("cProfile:", out.getvalue())
+        with open(svg, encoding="utf-8") as file:
+            self.assertIn("slow_search", file.read())
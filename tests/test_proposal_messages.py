@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad, ExchangeProposal, ProposalMessage
+from ads.services import post_message
+from ads.views import ProposalThreadView
+from users.models import User
+
+
+class ProposalMessagesTest(TestCase):
+    """Тест переписки по предложению обмена."""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(email="seller@mail.ru", password="testpass")
+        self.buyer = User.objects.create_user(email="buyer@mail.ru", password="testpass")
+        ad = Ad.objects.create(title="Велосипед", user=self.seller)
+        other_ad = Ad.objects.create(title="Кеды", user=self.buyer)
+        self.proposal = ExchangeProposal.objects.create(owner=self.buyer, ad_sender=ad, ad_receiver=other_ad)
+        self.thread_url = reverse("ads:proposal-thread", kwargs={"pk": self.proposal.pk})
+        self.api_url = reverse("ads:api-proposal-messages", kwargs={"pk": self.proposal.pk})
+
+    def test_unread_counter_follows_messages(self):
+        """Тест проверяет, что сообщение увеличивает счетчик второй стороны, а открытие переписки его обнуляет."""
+
+        self.client.force_login(self.buyer)
+        self.client.post(self.thread_url, {"text": "Добавлю насос"})
+        self.client.post(self.thread_url, {"text": "И звонок"})
+        self.proposal.refresh_from_db()
+        self.assertEqual((self.proposal.owner_unread, self.proposal.recipient_unread), (0, 2))
+
+        self.client.force_login(self.seller)
+        response = self.client.get(reverse("ads:offers-exchanges"))
+        self.assertContains(response, '<span class="badge bg-success">2</span>')
+
+        response = self.client.get(self.thread_url)
+        self.assertEqual([message.text for message in response.context["thread"]], ["Добавлю насос", "И звонок"])
+        self.proposal.refresh_from_db()
+        self.assertEqual(self.proposal.recipient_unread, 0)
+
+    def test_incremental_fetch_by_cursor(self):
+        """Тест проверяет, что ?after= отдает только сообщения после курсора, а без новых возвращает тот же курсор."""
+
+        post_message(self.proposal, self.buyer, "Первое")
+        self.client.force_login(self.seller)
+
+        data = self.client.get(self.api_url).json()
+        self.assertEqual([message["text"] for message in data["results"]], ["Первое"])
+
+        post_message(self.proposal, self.buyer, "Второе")
+        post_message(self.proposal, self.seller, "Третье")
+        newer = self.client.get(self.api_url, {"after": data["next"]}).json()
+        # сообщения последней минуты до курсора приходят повторно, клиент отбрасывает их по id
+        self.assertEqual(
+            [(m["text"], m["mine"]) for m in newer["results"]],
+            [("Первое", False), ("Второе", False), ("Третье", True)],
+        )
+
+        repeated = self.client.get(self.api_url, {"after": newer["next"]}).json()
+        self.assertEqual(repeated["next"], newer["next"])
+        self.assertEqual(len(repeated["results"]), 3)
+        self.assertEqual(self.client.get(self.api_url, {"after": "broken"}).status_code, 400)
+
+    def test_late_committed_message_reaches_client(self):
+        """Тест проверяет, что сообщение с временем раньше курсора (закоммиченное позже) все равно приходит,
+        а сообщения старше окна повторно не отдаются."""
+
+        old = post_message(self.proposal, self.buyer, "Старое")
+        ProposalMessage.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        post_message(self.proposal, self.buyer, "Прочитанное")
+        self.client.force_login(self.seller)
+        cursor = self.client.get(self.api_url).json()["next"]
+
+        late = post_message(self.proposal, self.buyer, "Опоздавшее")
+        ProposalMessage.objects.filter(pk=late.pk).update(created_at=timezone.now() - timedelta(seconds=10))
+        data = self.client.get(self.api_url, {"after": cursor}).json()
+
+        self.assertEqual({message["text"] for message in data["results"]}, {"Опоздавшее", "Прочитанное"})
+        self.assertEqual(data["next"], cursor)
+
+    def test_thread_pages_back_by_keyset(self):
+        """Тест проверяет листание переписки назад по курсору."""
+
+        now = timezone.now()
+        ProposalMessage.objects.bulk_create(
+            ProposalMessage(proposal=self.proposal, author=self.buyer, text=str(i), created_at=now + timedelta(i))
+            for i in range(5)
+        )
+        self.client.force_login(self.buyer)
+
+        with mock.patch.object(ProposalThreadView, "page_size", 2):
+            response = self.client.get(self.thread_url)
+            self.assertEqual([message.text for message in response.context["thread"]], ["3", "4"])
+            response = self.client.get(self.thread_url, {"before": response.context["older_cursor"]})
+            self.assertEqual([message.text for message in response.context["thread"]], ["1", "2"])
+
+    def test_only_participants_see_thread(self):
+        """Тест проверяет, что переписку не видят посторонние."""
+
+        self.client.force_login(User.objects.create_user(email="other@mail.ru", password="testpass"))
+
+        self.assertEqual(self.client.get(self.thread_url).status_code, 404)
+        self.assertEqual(self.client.post(self.thread_url, {"text": "Привет"}).status_code, 404)
+        self.assertEqual(self.client.get(self.api_url).status_code, 404)
+
+    def test_messages_survive_archiving(self):
+        """Тест проверяет, что после переноса предложения в архив его переписка сохраняется."""
+
+        post_message(self.proposal, self.buyer, "Договорились")
+        ExchangeProposal.objects.filter(pk=self.proposal.pk).update(
+            status=ExchangeProposal.STATUS_ACCEPTED, created_at=timezone.now() - timedelta(days=100)
+        )
+
+        call_command("archive_proposals", days=90, stdout=StringIO())
+
+        self.assertFalse(ExchangeProposal.objects.exists())
+        self.assertEqual(
+            list(ProposalMessage.objects.filter(proposal_id=self.proposal.pk).values_list("text")), [("Договорились",)]
+        )
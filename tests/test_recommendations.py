@@ -0,0 +1,46 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ads.models import Ad, AdRecommendation, ExchangeProposal
+from users.models import User
+
+
+class ComputeRecommendationsTest(TestCase):
+    """Тест расчета и показа рекомендаций."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.seller = User.objects.create_user(email="seller@mail.ru", password="sellerpass")
+
+        self.own_book = Ad.objects.create(title="Моя книга", user=self.user, category="хобби")
+        self.shoes = Ad.objects.create(title="Кроссовки", user=self.seller, category="обувь")
+        self.phone = Ad.objects.create(title="Телефон", user=self.seller, category="электроника")
+        self.hobby = Ad.objects.create(title="Пазл", user=self.seller, category="хобби")
+        # предложение обмена на кроссовки — самый сильный сигнал интереса
+        ExchangeProposal.objects.create(owner=self.user, ad_sender=self.shoes, ad_receiver=self.own_book)
+
+    def test_ranks_by_category_affinity(self):
+        """Тест проверяет порядок рекомендаций: сначала категории из обменов, затем свои, без своих объявлений."""
+
+        call_command("compute_recommendations", "--workers", "1", stdout=StringIO())
+
+        recommendation = AdRecommendation.objects.get(user=self.user)
+        self.assertEqual(recommendation.ad_ids, [self.shoes.pk, self.hobby.pk, self.phone.pk])
+        # у продавца нет обменов, а свои объявления исключаются: ему остается только книга пользователя
+        self.assertEqual(AdRecommendation.objects.get(user=self.seller).ad_ids, [self.own_book.pk])
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+        with self.assertNumQueries(3):  # пользователь, рекомендации, объявления страницы
+            response = self.client.get(reverse("ads:ads-recommended"))
+        self.assertEqual(list(response.context["ads"]), [self.shoes, self.hobby, self.phone])
+
+    def test_falls_back_to_newest_ads(self):
+        """Тест проверяет, что без рассчитанных рекомендаций показываются новые чужие объявления."""
+
+        self.client.login(email="testuser@mail.ru", password="testpass")
+        response = self.client.get(reverse("ads:ads-recommended"))
+
+        self.assertEqual(list(response.context["ads"]), [self.hobby, self.phone, self.shoes])
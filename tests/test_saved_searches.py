@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ads.models import Ad, SavedSearch, SavedSearchMatch
+from ads.search import percolate_ad, save_search, search_ad_ids
+from users.models import User
+
+
+class SavedSearchTest(TestCase):
+    """Тест сохраненных поисков и проверки новых объявлений по ним."""
+
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@mail.ru", password="testpass")
+        self.seller = User.objects.create_user(email="seller@mail.ru", password="testpass")
+
+    def create_ad(self, title, description="", category="хобби", condition="б/у", user=None):
+        return Ad.objects.create(
+            title=title, description=description, category=category, condition=condition, user=user or self.seller
+        )
+
+    def test_ad_matches_search_only_with_all_terms(self):
+        """Тест проверяет, что объявление подходит под поиск, только если в нем есть все слова запроса."""
+
+        search, created = save_search(self.buyer, query="  Велосипед   Stels ", category="хобби")
+        full = self.create_ad("Велосипед Stels", "Детский, 16 дюймов")
+        partial = self.create_ad("Велосипед Forward", "Детский")
+        other_category = self.create_ad("Велосипед Stels", category="запчасти")
+
+        self.assertTrue(created)
+        self.assertEqual(search.query, "велосипед stels")
+        self.assertEqual([percolate_ad(ad) for ad in (full, partial, other_category)], [1, 0, 0])
+        # совпадение по обратному индексу согласовано с обычным полнотекстовым поиском
+        self.assertEqual(search_ad_ids(self.buyer, "велосипед stels", "хобби"), [full.pk])
+
+    def test_search_without_query_matches_by_category_and_skips_own_ads(self):
+        """Тест проверяет поиск только по категории и то, что свои объявления во входящие не попадают."""
+
+        save_search(self.buyer, category="обувь")
+        other = self.create_ad("Кеды", category="обувь")
+        own = self.create_ad("Ботинки", category="обувь", user=self.buyer)
+
+        self.assertEqual(percolate_ad(other), 1)
+        self.assertEqual(percolate_ad(own), 0)
+
+    def test_saving_same_search_twice_and_empty_search(self):
+        """Тест проверяет, что повторное сохранение не создает дубль, а пустой поиск не сохраняется."""
+
+        first, _ = save_search(self.buyer, query="Велосипед")
+        second, created = save_search(self.buyer, query="велосипед ")
+
+        self.assertEqual(first, second)
+        self.assertFalse(created)
+        with self.assertRaises(ValueError):
+            save_search(self.buyer)
+
+    def test_concurrent_save_returns_existing_search(self):
+        """Тест проверяет, что поиск, сохраненный параллельно между проверкой и вставкой, возвращается без ошибки."""
+
+        first, _ = save_search(self.buyer, query="велосипед")
+
+        # проверка не видит поиск, как если бы его вставил параллельный запрос
+        with mock.patch("django.db.models.query.QuerySet.first", return_value=None):
+            second, created = save_search(self.buyer, query="велосипед")
+
+        self.assertEqual(second, first)
+        self.assertFalse(created)
+        self.assertEqual(SavedSearch.objects.filter(user=self.buyer).count(), 1)
+
+    def test_new_ad_lands_in_inbox_after_commit(self):
+        """Тест проверяет, что созданное объявление после коммита попадает во входящие и отмечается просмотренным."""
+
+        self.client.force_login(self.buyer)
+        self.client.post(reverse("ads:saved-search-create"), {"query": "велосипед", "category": "", "condition": ""})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad = self.create_ad("Велосипед горный")
+
+        response = self.client.get(reverse("ads:saved-searches"))
+        self.assertEqual(response.context["searches"][0].unread, 1)
+
+        response = self.client.get(reverse("ads:saved-search-inbox"))
+        self.assertEqual([match.ad for match in response.context["matches"]], [ad])
+        self.assertFalse(SavedSearchMatch.objects.filter(user=self.buyer, is_read=False).exists())
+
+    def test_delete_saved_search_only_by_owner(self):
+        """Тест проверяет, что удалить сохраненный поиск может только его владелец."""
+
+        search, _ = save_search(self.buyer, query="велосипед")
+
+        self.client.force_login(self.seller)
+        response = self.client.post(reverse("ads:saved-search-delete", kwargs={"pk": search.pk}))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_login(self.buyer)
+        self.client.post(reverse("ads:saved-search-delete", kwargs={"pk": search.pk}))
+        self.assertFalse(SavedSearch.objects.exists())
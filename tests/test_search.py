@@ -0,0 +1,85 @@
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ads.models import Ad
+from ads.search import SingleFlight
+from config.ratelimit import LocMemRateLimiter
+from users.models import User
+
+
+class SingleFlightTest(SimpleTestCase):
+    """Тест объединения одновременных одинаковых вызовов."""
+
+    def test_single_flight_runs_concurrent_calls_once(self):
+        """Тест проверяет, что одновременные вызовы с одним ключом выполняют функцию один раз."""
+
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow_search():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return [1, 2, 3]
+
+        def worker():
+            results.append(flight.do("query", slow_search))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=worker) for _ in range(5)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[1, 2, 3]] * 6)
+
+
+class LocMemRateLimiterTest(SimpleTestCase):
+    """Тест ограничителя частоты запросов."""
+
+    def test_rate_limiter_allows_burst_then_rejects(self):
+        """Тест проверяет, что корзина пропускает всплеск до емкости и отклоняет следующий запрос."""
+
+        limiter = LocMemRateLimiter(capacity=3, period=60)
+
+        self.assertEqual([limiter.consume("ip:1") for _ in range(4)], [True, True, True, False])
+        self.assertTrue(limiter.consume("ip:2"))
+
+
+class AdSearchCachingTest(TestCase):
+    """Тест кеширования и ограничения частоты поиска."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="testuser@mail.ru", password="testpass")
+        self.ad = Ad.objects.create(title="Велосипед", description="Горный", category="хобби", user=self.user)
+
+    @override_settings(SEARCH_CACHE_TIMEOUT=30)
+    def test_identical_searches_hit_cache(self):
+        """Тест проверяет, что повторный поиск с тем же нормализованным запросом не выполняет полнотекстовый запрос."""
+
+        self.client.get(reverse("ads:search-ads") + "?query=велосипед")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("ads:search-ads") + "?query=  Велосипед ")
+
+        self.assertEqual(list(response.context["ads"]), [self.ad])
+
+    @override_settings(SEARCH_RATE_LIMIT="2/m")
+    def test_search_is_rate_limited(self):
+        """Тест проверяет, что после исчерпания лимита поиск отвечает 429."""
+
+        statuses = [self.client.get(reverse("ads:search-ads") + "?query=лимит").status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [200, 200, 429])
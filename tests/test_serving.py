@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.test.client import RequestFactory
+
+from config.serving import CACHE_IMMUTABLE, FileServingMiddleware
+
+HASHED_NAME = "ad_images/ab/" + "ab" * 32 + ".jpg"
+
+
+class FileServingTest(SimpleTestCase):
+    """Тест раздачи медиа и статики."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        os.makedirs(os.path.join(self.media_root, "ad_images", "ab"))
+        with open(os.path.join(self.media_root, HASHED_NAME), "wb") as file:
+            file.write(b"0123456789")
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, path, **headers):
+        return self.client.get(path, headers=headers)
+
+    def test_hashed_media_is_served_with_immutable_cache(self):
+        """Тест проверяет, что файл с хешем в имени отдается целиком с вечным кешированием."""
+
+        response = self.get("/media/" + HASHED_NAME)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Cache-Control"], CACHE_IMMUTABLE)
+
+    def test_if_none_match_returns_not_modified(self):
+        """Тест проверяет ответ 304 на совпадающий ETag."""
+
+        etag = self.get("/media/" + HASHED_NAME)["ETag"]
+
+        response = self.get("/media/" + HASHED_NAME, if_none_match=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_request_returns_partial_content(self):
+        """Тест проверяет отдачу части файла по заголовку Range и 416 для невыполнимого диапазона."""
+
+        response = self.get("/media/" + HASHED_NAME, range="bytes=2-5")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(self.get("/media/" + HASHED_NAME, range="bytes=20-").status_code, 416)
+
+    def test_wsgi_middleware_serves_files_before_django(self):
+        """Тест проверяет, что WSGI-обертка отдает файл, не вызывая приложение, и пропускает остальные пути."""
+
+        calls = []
+
+        def application(environ, start_response):
+            calls.append(environ["PATH_INFO"])
+            start_response("404 Not Found", [])
+            return [b""]
+
+        middleware = FileServingMiddleware(application, [("/media/", self.media_root, False)])
+        statuses = []
+        environ = RequestFactory().get("/media/" + HASHED_NAME, HTTP_RANGE="bytes=-3").environ
+
+        body = b"".join(middleware(environ, lambda status, headers: statuses.append(status)))
+        middleware(RequestFactory().get("/ads/").environ, lambda status, headers: statuses.append(status))
+
+        self.assertEqual(body, b"789")
+        self.assertEqual(statuses, ["206 Partial Content", "404 Not Found"])
+        self.assertEqual(calls, ["/ads/"])
@@ -0,0 +1,92 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ads.models import Ad
+from ads.sitemaps import build_sitemaps, chunk_name
+from users.models import User
+
+
+class SitemapTest(TestCase):
+    """Тест карты сайта: части по диапазонам id, кеш на диске и перестройка только измененных частей."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(
+            SITEMAP_ROOT=self.root, SITEMAP_BASE_URL="https://example.com", SITEMAP_CHUNK_SIZE=3
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(email="seller@mail.ru", password="testpass")
+        self.ads = [Ad.objects.create(title=f"Объявление {i}", user=user) for i in range(7)]
+
+    def chunk_urls(self, index):
+        path = os.path.join(self.root, chunk_name(index))
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, "rt") as file:
+            return [line for line in file if line.startswith("<url>")]
+
+    def pass_back(self, minutes=10):
+        """Сдвигает время прошлого прохода назад, чтобы старые изменения в новый проход не попали."""
+
+        Ad.all_objects.update(updated_at=timezone.now() - timedelta(minutes=minutes + 1))
+        build_sitemaps(full=True)
+
+    def test_full_build_splits_ads_by_id_ranges(self):
+        """Тест проверяет, что объявления раскладываются по частям по диапазонам id, а индекс ссылается на части."""
+
+        out = StringIO()
+        call_command("build_sitemaps", full=True, stdout=out)
+
+        first, last = self.ads[0].pk // 3, self.ads[-1].pk // 3
+        self.assertIn(f"всего: {last - first + 1}", out.getvalue())
+        urls = [url for index in range(first, last + 1) for url in self.chunk_urls(index)]
+        self.assertEqual(len(urls), 7)
+        self.assertIn(f"<loc>https://example.com/{self.ads[0].pk}/ad/</loc>", urls[0])
+
+        response = self.client.get(reverse("ads:sitemap"))
+        index = b"".join(response.streaming_content).decode()
+        self.assertIn(f"<loc>https://example.com/sitemaps/{chunk_name(first)}</loc>", index)
+
+        response = self.client.get(reverse("ads:sitemap-chunk", kwargs={"name": chunk_name(first)}))
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(b"<urlset", gzip.decompress(b"".join(response.streaming_content)))
+
+    def test_incremental_build_rewrites_only_changed_ranges(self):
+        """Тест проверяет, что повторный проход перестраивает только части с измененными объявлениями."""
+
+        self.pass_back()
+        changed, untouched = self.ads[0], self.ads[-1]
+        untouched_path = os.path.join(self.root, chunk_name(untouched.pk // 3))
+        mtime = os.stat(untouched_path).st_mtime_ns
+
+        changed.soft_delete()
+        rebuilt, _ = build_sitemaps()
+
+        self.assertEqual(rebuilt, 1)
+        self.assertEqual(os.stat(untouched_path).st_mtime_ns, mtime)
+        urls = "".join(self.chunk_urls(changed.pk // 3))
+        self.assertNotIn(f"/{changed.pk}/ad/", urls)
+
+    def test_new_ads_and_expiry_are_picked_up(self):
+        """Тест проверяет, что новые объявления добавляются, а снятые с публикации пропадают из карты."""
+
+        self.pass_back()
+        new_ad = Ad.objects.create(title="Новое", user=self.ads[0].user, expires_at=timezone.now())
+        build_sitemaps()
+        self.assertIn(f"/{new_ad.pk}/ad/", "".join(self.chunk_urls(new_ad.pk // 3)))
+
+        call_command("expire_ads", stdout=StringIO())
+        build_sitemaps()
+        self.assertNotIn(f"/{new_ad.pk}/ad/", "".join(self.chunk_urls(new_ad.pk // 3)))
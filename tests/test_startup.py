@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from config.importtime import parse_importtime, profile_startup
+
+# тяжелые зависимости, которые нужны только отдельным командам и функциям и не должны грузиться при старте воркера
+DEFERRED_MODULES = ("PIL", "numpy", "django.contrib.postgres.search")
+# бюджет старта: число модулей с запасом ~10% к текущему; рост сверх него — повод посмотреть startup_profile
+MAX_STARTUP_MODULES = 700
+
+
+class StartupBudgetTest(SimpleTestCase):
+    """Тест бюджета старта воркера."""
+
+    def test_parse_importtime_builds_tree(self):
+        """Тест проверяет разбор вывода -X importtime в дерево."""
+
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:        10 |         10 |     b",
+                "import time:        20 |         30 |   a",
+                "import time:         5 |         35 | root",
+            ]
+        )
+
+        records, roots = parse_importtime(output)
+
+        self.assertEqual([record.module for record in records], ["b", "a", "root"])
+        self.assertEqual([root.module for root in roots], ["root"])
+        self.assertEqual(roots[0].children[0].children[0].module, "b")
+
+    def test_worker_startup_budget(self):
+        """Тест проверяет, что старт WSGI-воркера не импортирует тяжелые модули и укладывается в бюджет."""
+
+        records, roots = profile_startup("wsgi", environment="test")
+        modules = {record.module for record in records}
+
+        for module in DEFERRED_MODULES:
+            self.assertFalse(
+                [name for name in modules if name == module or name.startswith(module + ".")],
+                f"{module} импортируется при старте",
+            )
+        self.assertIn("ads.views", modules)
+        self.assertLessEqual(len(records), MAX_STARTUP_MODULES)
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ads.models import Ad, ExchangeProposal
@@ -201,6 +203,24 @@ class OffersExchangeProposalListViewTest(TestCase):
         self.assertNotIn(self.exchange_from_other, exchanges)
         self.assertIn(self.exchange_proposed, exchanges)
 
+    def test_offers_exchange_proposal_list_view_query_count_is_constant(self):
+        """Тест проверяет, что число запросов страницы не зависит от количества предложений и объявлений."""
+
+        url = reverse("ads:offers-exchanges")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        other_user = self.exchange_from_other.owner
+        ads = Ad.objects.bulk_create(Ad(title=f"Чужое {i}", user=other_user) for i in range(30))
+        ExchangeProposal.objects.bulk_create(
+            ExchangeProposal(owner=other_user, ad_sender=self.ad2, ad_receiver=ad, comment="") for ad in ads
+        )
+
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["exchanges"]), 20)
+
     def test_offers_exchange_proposal_list_view_requires_authentication(self):
         """Тест проверяет, что только авторизованные пользователи могут посмотреть предложения обмена."""
 
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import load_backend
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import get_hasher, identify_hasher, is_password_usable, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+
+from config.metrics import metrics
+from users.models import User
+
+
+class PasswordHashPoolBusy(Exception):
+    """Очередь на проверку паролей заполнена."""
+
+
+class PasswordHashPool:
+    """Ограниченный пул потоков для хеширования паролей.
+
+    PBKDF2, scrypt и Argon2 считаются в C и отпускают GIL, поэтому потоки пула загружают все
+    ядра, а цикл событий ASGI-воркера в это время обслуживает остальные запросы. Одновременно
+    в пуле не больше PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_PENDING задач: при наплыве
+    входов лишние сразу получают отказ, а не копят очередь и память (Argon2 — до 100 МБ на хеш).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _get(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # после fork потоки пула родителя не наши
+                workers = settings.PASSWORD_HASH_WORKERS
+                self._executor = ThreadPoolExecutor(workers, thread_name_prefix="password-hash")
+                self._slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_MAX_PENDING)
+                self._pid = os.getpid()
+
+            return self._executor, self._slots
+
+    async def run(self, func, *args):
+        """Выполняет func(*args) в пуле. Бросает PasswordHashPoolBusy, если очередь заполнена."""
+
+        executor, slots = self._get()
+        if not slots.acquire(blocking=False):
+            metrics.increment("login.hash_pool.rejected")
+            raise PasswordHashPoolBusy
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            slots.release()
+
+
+password_pool = PasswordHashPool()
+
+
+def verify_password(password, encoded):
+    """Проверяет пароль по хешу. Возвращает (пароль верен, хеш нужно пересчитать).
+
+    Хеш пересчитывается, если он сделан не предпочтительным хешером (первым в PASSWORD_HASHERS)
+    или с устаревшими параметрами, например меньшим числом итераций.
+    """
+
+    if not is_password_usable(encoded):
+        return False, False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, False
+
+    if not hasher.verify(password, encoded):
+        return False, False
+    preferred = get_hasher()
+
+    return True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+async def authenticate_async(request, email, password):
+    """Асинхронный аналог authenticate для входа по email и паролю.
+
+    Бэкенды перебираются в порядке AUTHENTICATION_BACKENDS, как в django.contrib.auth.aauthenticate:
+    ModelBackend и его наследники (CachedModelBackend) проверяются здесь с хешированием в пуле,
+    остальные — своим aauthenticate. PermissionDenied от бэкенда прекращает перебор.
+    """
+
+    for path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(path)
+        if isinstance(backend, ModelBackend):
+            user = await authenticate_model_backend(backend, email, password)
+        else:
+            try:
+                user = await backend.aauthenticate(request, username=email, password=password)
+            except PermissionDenied:
+                break
+        if user is not None:
+            user.backend = path
+            return user
+
+    await user_login_failed.asend(sender=__name__, credentials={"email": email}, request=request)
+
+    return None
+
+
+async def authenticate_model_backend(backend, email, password):
+    """Проверка пароля ModelBackend без блокировки цикла событий.
+
+    Пользователь читается асинхронным ORM, а хеширование идет в password_pool. Для
+    несуществующего email тоже считается хеш, чтобы время ответа не выдавало, есть ли аккаунт.
+    Устаревший хеш при успешном входе заменяется хешем предпочтительного хешера.
+    """
+
+    try:
+        user = await User._default_manager.aget_by_natural_key(email)
+    except User.DoesNotExist:
+        await password_pool.run(make_password, password)
+        return None
+
+    valid, must_update = await password_pool.run(verify_password, password, user.password)
+    if not valid or not backend.user_can_authenticate(user):
+        return None
+
+    if must_update:
+        user.password = await password_pool.run(make_password, password)
+        await user.asave(update_fields=["password"])
+        metrics.increment("login.rehashed")
+
+    return user
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from users.models import User
+
+# в общий кеш (Redis, файлы) хеш пароля не кладется: вместо него хранится готовый хеш сессии
+CACHE_EXCLUDED_FIELDS = ("password",)
+
+
+def user_cache_key(user_id):
+    """Ключ кеша для пользователя с идентификатором user_id."""
+
+    return f"users:user:{user_id}"
+
+
+def cached_user_data(user):
+    """Данные пользователя для кеша: значения полей без хеша пароля и хеш сессии."""
+
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if field.attname not in CACHE_EXCLUDED_FIELDS
+    }
+
+    return {"fields": fields, "session_auth_hash": user.get_session_auth_hash()}
+
+
+def user_from_cache(data):
+    """Пользователь из данных кеша. Пароль — отложенное поле: при обращении он читается из БД."""
+
+    fields = data["fields"]
+    user = User.from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+    user.cached_session_auth_hash = data["session_auth_hash"]
+
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который загружает request.user из кеша вместо запроса к БД на каждый запрос.
+
+    Запись сбрасывается при любом сохранении или удалении пользователя (users.signals),
+    поэтому смена пароля, деактивация и правки в UserUpdateView видны сразу. Изменения через
+    QuerySet.update() сигналов не вызывают: до истечения USER_CACHE_TIMEOUT в кеше остается
+    прежний пользователь и прежний хеш сессии, поэтому такие изменения пароля и is_active
+    должны сами сбрасывать кеш (cache.delete(user_cache_key(pk))).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        data = cache.get(key)
+        if data is not None:
+            return user_from_cache(data)
+
+        user = super().get_user(user_id)
+        if user is not None:
+            cache.set(key, cached_user_data(user), settings.USER_CACHE_TIMEOUT)
+
+        return user
@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib.auth.forms import UserCreationForm
 
 from ads.forms import StyleFormMixin
@@ -9,7 +10,7 @@ class UserRegisterForm(StyleFormMixin, UserCreationForm):
 
     class Meta:
         model = User
-        fields = ("email", "phone", "password1", "password2")
+        fields = ("email", "phone", "latitude", "longitude", "password1", "password2")
 
     def __init__(self, *args, **kwargs):
         """Переопределение меток полей."""
@@ -21,3 +22,10 @@ class UserRegisterForm(StyleFormMixin, UserCreationForm):
         # Отключение help_text для всех полей.
         for field in self.fields.values():
             field.help_text = None
+
+
+class LoginForm(StyleFormMixin, forms.Form):
+    """Форма входа. Пароль проверяет представление, а не форма (см. users.auth)."""
+
+    username = forms.EmailField(label="Email", max_length=254)
+    password = forms.CharField(label="Пароль", strip=False, widget=forms.PasswordInput)
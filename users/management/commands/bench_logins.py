@@ -0,0 +1,72 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management import BaseCommand
+
+from users.auth import verify_password
+
+# алгоритм хешера по имени из PASSWORD_HASHER и библиотека, без которой он недоступен
+ALGORITHMS = {"pbkdf2": ("pbkdf2_sha256", None), "scrypt": ("scrypt", None), "argon2": ("argon2", "argon2")}
+
+
+class Command(BaseCommand):
+    """Бенчмарк проверки паролей: входов в секунду всего и на ядро для каждого хешера и размера пула.
+
+    Проверка идет так же, как при входе (users.auth.verify_password), в пуле из N потоков,
+    с параметрами хешеров из текущих настроек.
+    """
+
+    help = "Измеряет число входов в секунду (проверок пароля) на ядро для разных хешеров"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hashers", default=",".join(ALGORITHMS), help="Хешеры через запятую")
+        parser.add_argument(
+            "--threads", default=f"1,{settings.PASSWORD_HASH_WORKERS}", help="Размеры пула через запятую"
+        )
+        parser.add_argument("--seconds", type=float, default=3, help="Длительность замера на сочетание")
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        threads = sorted({int(count) for count in options["threads"].split(",")})
+        self.stdout.write(f"Ядер: {cores}")
+        self.stdout.write(f"{'хешер':>8} {'потоков':>8} {'входов/с':>10} {'на ядро':>10} {'мс на вход':>11}")
+
+        for name in options["hashers"].split(","):
+            algorithm, library = ALGORITHMS[name]
+            if library and find_spec(library) is None:
+                self.stdout.write(f"{name:>8} пропущен: не установлен пакет {library}")
+                continue
+
+            hasher = get_hasher(algorithm)
+            encoded = hasher.encode("bench-password", hasher.salt())
+            for count in threads:
+                rate, latency = self.measure(encoded, count, options["seconds"])
+                self.stdout.write(
+                    f"{name:>8} {count:>8} {rate:>10.1f} {rate / min(count, cores):>10.1f} {latency * 1000:>11.1f}"
+                )
+
+    @staticmethod
+    def measure(encoded, threads, seconds):
+        """Возвращает (проверок в секунду, среднее время одной проверки) для пула из threads потоков."""
+
+        def worker():
+            done, spent = 0, 0.0
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                verify_password("bench-password", encoded)
+                spent += time.perf_counter() - start
+                done += 1
+            return done, spent
+
+        start = time.perf_counter()
+        deadline = start + seconds
+        with ThreadPoolExecutor(threads) as executor:
+            results = [future.result() for future in [executor.submit(worker) for _ in range(threads)]]
+        elapsed = time.perf_counter() - start
+
+        done = sum(count for count, _ in results)
+        return done / elapsed, sum(spent for _, spent in results) / max(done, 1)
@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
@@ -25,6 +26,13 @@ class User(AbstractUser):
 
     email = models.EmailField(unique=True, verbose_name="Email")
     phone = models.CharField(max_length=15, verbose_name="Телефон", blank=True, null=True)
+    # местоположение по умолчанию для новых объявлений и поиска рядом
+    latitude = models.FloatField(
+        verbose_name="Широта", blank=True, null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        verbose_name="Долгота", blank=True, null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
 
     objects = CustomUserManager()
 
@@ -34,3 +42,15 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+
+    def get_session_auth_hash(self):
+        # пользователь из кеша request.user (users.backends) загружен без хеша пароля,
+        # но с готовым хешем сессии: проверка сессии обходится без запроса пароля из БД
+        cached = getattr(self, "cached_session_auth_hash", None)
+
+        return cached or super().get_session_auth_hash()
+
+    def set_password(self, raw_password):
+        # после смены пароля хеш сессии из кеша устарел: update_session_auth_hash должен сохранить новый
+        self.cached_session_auth_hash = None
+        super().set_password(raw_password)
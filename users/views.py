@@ -1,7 +1,23 @@
-from django.urls import reverse_lazy
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import alogin
+from django.shortcuts import redirect, render, resolve_url
+from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views import View
+from django.views.decorators.cache import never_cache
+from django.views.decorators.debug import sensitive_post_parameters
 from django.views.generic import CreateView, DetailView, UpdateView
 
-from users.forms import UserRegisterForm
+from ads.models import ExchangeUserStats
+from ads.services import seller_stats
+from config.metrics import metrics
+from config.ratelimit import get_rate_limiter
+from users.auth import PasswordHashPoolBusy, authenticate_async
+from users.forms import LoginForm, UserRegisterForm
 from users.models import User
 
 
@@ -20,7 +36,11 @@ class UserUpdateView(UpdateView):
     model = User
     form_class = UserRegisterForm
     template_name = "user_form.html"
-    success_url = reverse_lazy("users:personal-account")
+
+    def get_success_url(self):
+        """Перенаправление в личный кабинет пользователя."""
+
+        return reverse("users:personal-account", kwargs={"pk": self.object.pk})
 
 
 class PersonalAccountDetailView(DetailView):
@@ -29,3 +49,78 @@ class PersonalAccountDetailView(DetailView):
     model = User
     template_name = "personal_account.html"
     context_object_name = "user"
+
+    def get_context_data(self, **kwargs):
+        """Передача статистики объявлений и обменов пользователя в шаблон."""
+
+        context = super().get_context_data(**kwargs)
+        context["stats"] = seller_stats(self.object)
+        # проекция журнала обменов, обновляется командой replay_exchange_events
+        context["exchange_stats"] = ExchangeUserStats.objects.filter(user_id=self.object.pk).first()
+
+        return context
+
+
+class LoginView(View):
+    """Вход по email и паролю.
+
+    Асинхронное представление: проверка пароля идет в пуле потоков (users.auth), поэтому
+    под ASGI воркер не простаивает на хешировании. Попытки входа ограничены LOGIN_RATE_LIMIT
+    на аккаунт, чтобы перебор пароля к одному email не отнимал пул у остальных. Как и
+    django.contrib.auth.views.LoginView, пароль скрыт в отчетах об ошибках, а страница не кешируется.
+    """
+
+    template_name = "login.html"
+
+    # асинхронный dispatch, чтобы декораторы выбрали асинхронные обертки
+    @method_decorator([sensitive_post_parameters(), never_cache])
+    async def dispatch(self, request, *args, **kwargs):
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.render(LoginForm())
+
+    async def post(self, request, *args, **kwargs):
+        form = LoginForm(request.POST)
+        if not form.is_valid():
+            return await self.render(form)
+
+        email = form.cleaned_data["username"]
+        if settings.LOGIN_RATE_LIMIT:
+            limiter = get_rate_limiter(settings.LOGIN_RATE_LIMIT)
+            if not limiter.consume(f"login:{email.lower()}"):
+                metrics.increment("ratelimit.login.rejected")
+                form.add_error(None, "Слишком много попыток входа, попробуйте позже.")
+                return await self.render(form, status=429, retry_after=limiter.retry_after())
+
+        try:
+            user = await authenticate_async(request, email, form.cleaned_data["password"])
+        except PasswordHashPoolBusy:
+            form.add_error(None, "Сервис перегружен, попробуйте войти через несколько секунд.")
+            return await self.render(form, status=503, retry_after=1)
+        if user is None:
+            form.add_error(None, "Неверный email или пароль.")
+            return await self.render(form)
+
+        await alogin(self.request, user)
+
+        return redirect(self.get_success_url())
+
+    def get_success_url(self):
+        """Адрес из параметра next, если он ведет на этот же сайт, иначе LOGIN_REDIRECT_URL."""
+
+        next_url = self.request.POST.get("next") or self.request.GET.get("next")
+        if next_url and url_has_allowed_host_and_scheme(
+            next_url, allowed_hosts={self.request.get_host()}, require_https=self.request.is_secure()
+        ):
+            return next_url
+
+        return resolve_url(settings.LOGIN_REDIRECT_URL)
+
+    async def render(self, form, status=200, retry_after=None):
+        # контекст-процессоры читают request.user синхронно, поэтому шаблон рендерится вне цикла событий
+        response = await sync_to_async(render)(self.request, self.template_name, {"form": form}, status=status)
+        if retry_after:
+            response["Retry-After"] = str(math.ceil(retry_after))
+
+        return response